@@ -0,0 +1,8 @@
+"""
+Paquete de Benchmarks para GastoSmart
+
+Este paquete contiene las herramientas para medir el rendimiento del
+servidor. Se ejecutan desde la carpeta GastoSmart-Backend, por ejemplo:
+
+    python -m benchmarks.worker_scaling
+"""
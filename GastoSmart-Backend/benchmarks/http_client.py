@@ -0,0 +1,134 @@
+"""
+Cliente HTTP mínimo para Benchmarks
+
+Cliente HTTP/1.1 asíncrono con conexiones keep-alive, sin dependencias
+externas, pensado para generar carga con poco consumo de CPU propio.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Optional, Tuple
+
+class HTTPConnection:
+    """
+    Conexión HTTP/1.1 persistente a un servidor
+    """
+
+    def __init__(self, host: str, port: int):
+        """
+        Inicializar la conexión
+
+        Args:
+            host: Host del servidor
+            port: Puerto del servidor
+        """
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Enviar una petición y leer la respuesta completa
+
+        Args:
+            method: Método HTTP
+            path: Ruta con query string
+            body: Cuerpo a enviar como JSON (opcional)
+            headers: Cabeceras adicionales
+
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: Código, cabeceras y cuerpo
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        payload = b"" if body is None else json.dumps(body).encode()
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+
+        try:
+            status, response_headers, content = await self._read_response()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            await self.close()
+            raise
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, content
+
+    async def _read_response(self) -> Tuple[int, Dict[str, str], bytes]:
+        """Leer línea de estado, cabeceras y cuerpo de la respuesta"""
+        status_line = await self._reader.readuntil(b"\r\n")
+        status = int(status_line.split(b" ", 2)[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            content = await self._reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b"\r\n")).strip(), 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            content = b"".join(chunks)
+        else:
+            content = b""
+        return status, headers, content
+
+    async def close(self) -> None:
+        """Cerrar la conexión"""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._reader = self._writer = None
+
+async def wait_for_server(host: str, port: int, path: str = "/api/test", timeout: float = 60.0) -> None:
+    """
+    Esperar a que el servidor responda 200 en una ruta
+
+    Args:
+        host: Host del servidor
+        port: Puerto del servidor
+        path: Ruta a consultar
+        timeout: Tiempo máximo de espera en segundos
+
+    Raises:
+        TimeoutError: Si el servidor no responde a tiempo
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        connection = HTTPConnection(host, port)
+        try:
+            status, _, _ = await connection.request("GET", path)
+            if status == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await connection.close()
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError(f"El servidor {host}:{port} no respondió en {timeout}s")
+        await asyncio.sleep(0.25)
@@ -0,0 +1,517 @@
+"""
+Prueba de Carga con una Mezcla Realista de Peticiones
+
+Siembra usuarios y transacciones en una base de datos de benchmark,
+inicia el servidor (o usa uno ya en ejecución) y genera carga con la
+mezcla de operaciones de un uso normal de GastoSmart: inicio de sesión,
+listado, registro de transacciones, estadísticas, categorías, búsqueda y
+carga de páginas. Reporta el throughput y los percentiles p50/p95/p99
+por operación y guarda los resultados en JSON para comparar ejecuciones
+entre commits.
+
+Con --backend memory o --backend sqlite el servidor usa ese
+almacenamiento (STORAGE_BACKEND) cargado con un dataset NDJSON de
+tools/generate_dataset.py; así se mide la API sin MongoDB.
+
+Uso (desde GastoSmart-Backend, con MongoDB accesible):
+    python -m benchmarks.load_test --duration 30 --output results/base.json
+    python -m benchmarks.load_test --compare results/base.json
+    python -m benchmarks.load_test --url 127.0.0.1:8000 --no-seed
+    python -m benchmarks.load_test --backend memory --users 500
+    python -m benchmarks.load_test --backend sqlite --users 500 --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from benchmarks.http_client import HTTPConnection, wait_for_server
+
+# Contraseña de todos los usuarios sembrados
+BENCH_PASSWORD = "Benchmark123!"
+
+# Peso de cada operación en la mezcla (proporcional a su frecuencia en uso real)
+WORKLOAD_MIX: Dict[str, int] = {
+    "login": 5,
+    "list": 30,
+    "create": 10,
+    "stats": 15,
+    "categories": 10,
+    "search": 10,
+    "page": 20
+}
+
+# Páginas que carga el navegador
+PAGES = ["/dashboard", "/income-expenses", "/reports", "/goals", "/settings", "/login"]
+
+# Términos de búsqueda (prefijos de categorías reales)
+SEARCH_TERMS = ["Ali", "Trans", "Salario", "Serv", "Ropa", "Inv"]
+
+def _categories() -> Tuple[List[str], List[str]]:
+    """Categorías de ingresos y gastos definidas en los modelos"""
+    from models.transaction import ExpenseCategory, IncomeCategory
+    return [c.value for c in IncomeCategory], [c.value for c in ExpenseCategory]
+
+def random_transaction(rng: random.Random, now: datetime) -> Dict[str, Any]:
+    """
+    Generar los datos de una transacción realista en pesos colombianos
+
+    Args:
+        rng: Generador aleatorio
+        now: Fecha de referencia
+
+    Returns:
+        Dict[str, Any]: Campos de TransactionCreate
+    """
+    income_categories, expense_categories = _categories()
+    if rng.random() < 0.2:
+        return {
+            "type": "income",
+            "amount": float(rng.randrange(500_000, 6_000_000, 1000)),
+            "category": rng.choice(income_categories),
+            "description": "Ingreso de prueba",
+            "date": (now - timedelta(days=rng.randrange(365))).isoformat(),
+            "currency": "COP"
+        }
+    return {
+        "type": "expense",
+        "amount": float(rng.randrange(2_000, 400_000, 100)),
+        "category": rng.choice(expense_categories),
+        "description": "Gasto de prueba",
+        "date": (now - timedelta(days=rng.randrange(365), minutes=rng.randrange(1440))).isoformat(),
+        "currency": "COP"
+    }
+
+def seed_mongo(mongodb_url: str, database_name: str, users: int, transactions_per_user: int, seed: int) -> List[Dict[str, str]]:
+    """
+    Sembrar usuarios activos y sus transacciones en MongoDB
+
+    Borra antes las colecciones de usuarios y transacciones de la base de
+    datos indicada, por eso solo acepta bases cuyo nombre incluya "bench".
+
+    Args:
+        mongodb_url: URL de MongoDB
+        database_name: Base de datos de benchmark
+        users: Número de usuarios
+        transactions_per_user: Transacciones por usuario
+        seed: Semilla para que las ejecuciones sean comparables
+
+    Returns:
+        List[Dict[str, str]]: ID y correo de cada usuario sembrado
+
+    Raises:
+        ValueError: Si la base de datos no es de benchmark
+    """
+    import bcrypt
+    from pymongo import MongoClient
+
+    if "bench" not in database_name:
+        raise ValueError(f"La base de datos '{database_name}' no parece de benchmark; no se borrará")
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    client = MongoClient(mongodb_url)
+    try:
+        db = client[database_name]
+        db.users.delete_many({})
+        db.transactions.delete_many({})
+
+        # Un solo hash para todos: bcrypt es intencionalmente lento
+        hashed = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        user_docs = [
+            {
+                "first_name": "Usuario",
+                "last_name": f"Prueba {i}",
+                "email": f"bench{i}@bench.gastosmart.co",
+                "password": hashed,
+                "initial_budget": 2_000_000.0,
+                "budget_period": "mensual",
+                "budget_configured": True,
+                "registration_date": now,
+                "is_active": True,
+                "email_verified": True,
+                "last_access": None,
+                "currency": "COP",
+                "timezone": "America/Bogota"
+            }
+            for i in range(users)
+        ]
+        user_ids = db.users.insert_many(user_docs).inserted_ids
+
+        batch: List[Dict[str, Any]] = []
+        for user_id in user_ids:
+            for _ in range(transactions_per_user):
+                data = random_transaction(rng, now)
+                data["date"] = datetime.fromisoformat(data["date"])
+                data.update(user_id=str(user_id), created_at=now, updated_at=None)
+                batch.append(data)
+                if len(batch) >= 5000:
+                    db.transactions.insert_many(batch, ordered=False)
+                    batch = []
+        if batch:
+            db.transactions.insert_many(batch, ordered=False)
+
+        return [{"id": str(user_id), "email": doc["email"]} for user_id, doc in zip(user_ids, user_docs)]
+    finally:
+        client.close()
+
+def load_users(mongodb_url: str, database_name: str) -> List[Dict[str, str]]:
+    """Leer los usuarios sembrados en una ejecución anterior"""
+    from pymongo import MongoClient
+
+    client = MongoClient(mongodb_url)
+    try:
+        cursor = client[database_name].users.find({"email": {"$regex": "^bench"}}, {"email": 1})
+        return [{"id": str(doc["_id"]), "email": doc["email"]} for doc in cursor]
+    finally:
+        client.close()
+
+def write_dataset(directory: str, users: int, months: int, seed: int) -> List[Dict[str, str]]:
+    """
+    Escribir un dataset NDJSON para los backends memory y sqlite
+
+    Args:
+        directory: Directorio de salida
+        users: Número de usuarios
+        months: Meses de historia por usuario
+        seed: Semilla del dataset
+
+    Returns:
+        List[Dict[str, str]]: Usuarios (id y correo) del dataset
+    """
+    from tools.generate_dataset import main as generate_dataset
+
+    generate_dataset([
+        "--format", "ndjson", "--out", directory, "--users", str(users),
+        "--months", str(months), "--seed", str(seed), "--password", BENCH_PASSWORD
+    ])
+    return dataset_users(users, seed)
+
+def seed_sqlite(path: str, directory: str) -> None:
+    """Importar el dataset NDJSON en una base de datos SQLite"""
+    from database.backends.sqlite import SQLiteStorage
+
+    async def load() -> None:
+        storage = SQLiteStorage(path)
+        await storage.connect()
+        try:
+            await storage.import_ndjson(directory)
+        finally:
+            await storage.close()
+
+    asyncio.run(load())
+
+def dataset_users(users: int, seed: int) -> List[Dict[str, str]]:
+    """Usuarios de un dataset generado con la misma semilla (ids deterministas)"""
+    from tools.generate_dataset import user_object_id
+
+    return [
+        {"id": str(user_object_id(seed, index)), "email": f"user{index}@dataset.gastosmart.co"}
+        for index in range(users)
+    ]
+
+def build_request(operation: str, user: Dict[str, str], rng: random.Random) -> Tuple[str, str, Any]:
+    """
+    Construir la petición HTTP de una operación
+
+    Args:
+        operation: Nombre de la operación (clave de WORKLOAD_MIX)
+        user: Usuario que hace la petición
+        rng: Generador aleatorio
+
+    Returns:
+        Tuple[str, str, Any]: Método, ruta y cuerpo
+    """
+    user_id = user["id"]
+    if operation == "login":
+        return "POST", "/api/users/login", {"email": user["email"], "password": BENCH_PASSWORD}
+    if operation == "list":
+        return "GET", f"/api/transactions/?user_id={user_id}&limit=50", None
+    if operation == "create":
+        return "POST", f"/api/transactions/?user_id={user_id}", random_transaction(rng, datetime.now())
+    if operation == "stats":
+        return "GET", f"/api/transactions/stats/summary?user_id={user_id}", None
+    if operation == "categories":
+        return "GET", f"/api/transactions/categories/list?user_id={user_id}", None
+    if operation == "search":
+        term = quote(rng.choice(SEARCH_TERMS))
+        return "GET", f"/api/transactions/search/query?user_id={user_id}&query={term}", None
+    return "GET", rng.choice(PAGES), None
+
+async def _drive(
+    host: str,
+    port: int,
+    users: List[Dict[str, str]],
+    connections: int,
+    duration: float,
+    seed: int
+) -> Dict[str, Dict[str, Any]]:
+    """Ejecutar usuarios virtuales con conexiones keep-alive durante un tiempo fijo"""
+    operations = list(WORKLOAD_MIX)
+    weights = [WORKLOAD_MIX[op] for op in operations]
+    results = {op: {"latencies": [], "errors": 0, "shed": 0} for op in operations}
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        user = users[index % len(users)]
+        connection = HTTPConnection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                operation = rng.choices(operations, weights)[0]
+                method, path, body = build_request(operation, user, rng)
+                start = time.perf_counter()
+                try:
+                    status, _, _ = await connection.request(method, path, body)
+                except (OSError, asyncio.IncompleteReadError):
+                    results[operation]["errors"] += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                if status == 503:
+                    results[operation]["shed"] += 1
+                elif status >= 400:
+                    results[operation]["errors"] += 1
+                else:
+                    results[operation]["latencies"].append(elapsed)
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*[virtual_user(i) for i in range(connections)])
+    return results
+
+def _client_process(args) -> Dict[str, Dict[str, Any]]:
+    """Proceso cliente: ejecuta su parte de los usuarios virtuales"""
+    return asyncio.run(_drive(*args))
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(latencies: List[float], errors: int, shed: int, duration: float) -> Dict[str, float]:
+    """
+    Resumir las latencias de una operación
+
+    Args:
+        latencies: Latencias exitosas en segundos
+        errors: Respuestas con error
+        shed: Respuestas 503 del limitador de concurrencia
+        duration: Duración de la medición en segundos
+
+    Returns:
+        Dict[str, float]: Conteos, throughput y percentiles en milisegundos
+    """
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "shed": shed,
+        "rps": round(len(ordered) / duration, 1),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0
+    }
+
+def run_load(
+    host: str,
+    port: int,
+    users: List[Dict[str, str]],
+    connections: int,
+    duration: float,
+    processes: int,
+    seed: int
+) -> Dict[str, Dict[str, float]]:
+    """
+    Generar carga repartiendo los usuarios virtuales entre procesos cliente
+
+    Returns:
+        Dict[str, Dict[str, float]]: Resumen por operación y total ("all")
+    """
+    per_process = max(1, connections // processes)
+    jobs = [
+        (host, port, users[i::processes] or users, per_process, duration, seed + i)
+        for i in range(processes)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        partials = pool.map(_client_process, jobs)
+
+    routes: Dict[str, Dict[str, float]] = {}
+    all_latencies: List[float] = []
+    all_errors = all_shed = 0
+    for operation in WORKLOAD_MIX:
+        latencies = [value for partial in partials for value in partial[operation]["latencies"]]
+        errors = sum(partial[operation]["errors"] for partial in partials)
+        shed = sum(partial[operation]["shed"] for partial in partials)
+        routes[operation] = summarize(latencies, errors, shed, duration)
+        all_latencies.extend(latencies)
+        all_errors += errors
+        all_shed += shed
+    routes["all"] = summarize(all_latencies, all_errors, all_shed, duration)
+    return routes
+
+async def scrape_metric(host: str, port: int, name: str) -> Optional[float]:
+    """Leer el valor total de una métrica de /metrics (suma de sus series)"""
+    connection = HTTPConnection(host, port)
+    try:
+        status, _, body = await connection.request("GET", "/metrics")
+    except OSError:
+        return None
+    finally:
+        await connection.close()
+    if status != 200:
+        return None
+    total = None
+    for line in body.decode("utf-8").splitlines():
+        if line.startswith(name) and line[len(name):len(name) + 1] in (" ", "{"):
+            total = (total or 0.0) + float(line.rsplit(" ", 1)[1])
+    return total
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(routes: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """Mostrar la tabla de resultados (con la variación respecto a una ejecución anterior)"""
+    print(f"{'operación':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8} {'503':>6}"
+          + ("  Δp95     Δreq/s" if baseline else ""))
+    for operation, row in routes.items():
+        line = (f"{operation:<12} {row['rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['errors']:>8} {row['shed']:>6}")
+        previous = (baseline or {}).get("routes", {}).get(operation)
+        if previous:
+            p95_delta = (row["p95_ms"] / previous["p95_ms"] - 1) * 100 if previous["p95_ms"] else 0.0
+            rps_delta = (row["rps"] / previous["rps"] - 1) * 100 if previous["rps"] else 0.0
+            line += f"  {p95_delta:>+6.1f}%  {rps_delta:>+6.1f}%"
+        print(line)
+
+def main(argv=None) -> int:
+    """Punto de entrada de la prueba de carga"""
+    parser = argparse.ArgumentParser(description="Prueba de carga de GastoSmart con una mezcla realista")
+    parser.add_argument("--url", help="host:puerto de un servidor ya en ejecución (si no, se inicia uno)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--workers", type=int, default=1, help="Workers del servidor iniciado")
+    parser.add_argument("--backend", choices=("mongo", "memory", "sqlite"), default="mongo",
+                        help="Almacenamiento del servidor iniciado")
+    parser.add_argument("--dataset-months", type=int, default=6,
+                        help="Meses de historia por usuario con --backend memory/sqlite")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="gastosmart_bench", help="Base de datos de benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--transactions-per-user", type=int, default=200)
+    parser.add_argument("--no-seed", action="store_true", help="Reusar los datos sembrados antes")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--client-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Resultados JSON de una ejecución anterior")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida del servidor")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        args.host, args.port = host or args.host, int(port)
+
+    seed_dir = None
+    if args.backend != "mongo":
+        if args.url:
+            # El servidor ya cargó un dataset: debe ser de la misma semilla y tamaño
+            users = dataset_users(args.users, args.seed)
+        else:
+            seed_dir = tempfile.mkdtemp(prefix="gastosmart_bench_")
+            print(f"Generando {args.users} usuarios x {args.dataset_months} meses en {seed_dir}...")
+            users = write_dataset(seed_dir, args.users, args.dataset_months, args.seed)
+            if args.backend == "sqlite":
+                seed_sqlite(os.path.join(seed_dir, "bench.db"), seed_dir)
+    elif args.no_seed:
+        users = load_users(args.mongodb_url, args.database)
+    else:
+        print(f"Sembrando {args.users} usuarios x {args.transactions_per_user} transacciones en {args.database}...")
+        users = seed_mongo(args.mongodb_url, args.database, args.users, args.transactions_per_user, args.seed)
+    if not users:
+        print("No hay usuarios sembrados")
+        return 1
+
+    server = None
+    if not args.url:
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, MONGODB_URL=args.mongodb_url, DATABASE_NAME=args.database)
+        if args.backend == "memory":
+            env.update(STORAGE_BACKEND="memory", MEMORY_SEED_DIR=seed_dir)
+        elif args.backend == "sqlite":
+            env.update(STORAGE_BACKEND="sqlite", SQLITE_PATH=os.path.join(seed_dir, "bench.db"))
+        server = subprocess.Popen(
+            [sys.executable, "server.py", "--workers", str(args.workers), "--host", args.host, "--port", str(args.port)],
+            cwd=backend_dir,
+            env=env,
+            stdout=None if args.verbose else subprocess.DEVNULL,
+            stderr=None if args.verbose else subprocess.DEVNULL
+        )
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        stalls_before = asyncio.run(scrape_metric(args.host, args.port, "gastosmart_event_loop_stalls_total"))
+        if args.warmup > 0:
+            run_load(args.host, args.port, users, args.connections, args.warmup, args.client_processes, args.seed)
+        routes = run_load(
+            args.host, args.port, users, args.connections, args.duration, args.client_processes, args.seed
+        )
+        stalls_after = asyncio.run(scrape_metric(args.host, args.port, "gastosmart_event_loop_stalls_total"))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        if seed_dir:
+            shutil.rmtree(seed_dir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(routes, baseline)
+
+    # Bloqueos del bucle de eventos durante la prueba (solo del worker que respondió /metrics)
+    stalls = None if stalls_after is None else stalls_after - (stalls_before or 0.0)
+    if stalls:
+        print(f"\nAdvertencia: {stalls:.0f} bloqueos del bucle de eventos durante la prueba")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "commit": _git_commit(),
+                    "timestamp": datetime.now().isoformat(),
+                    "duration": args.duration,
+                    "connections": args.connections,
+                    "workers": None if args.url else args.workers,
+                    "backend": args.backend,
+                    "users": len(users),
+                    "transactions_per_user": args.transactions_per_user,
+                    "mix": WORKLOAD_MIX
+                },
+                "routes": routes,
+                "event_loop_stalls": stalls
+            }, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
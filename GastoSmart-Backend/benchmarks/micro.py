@@ -0,0 +1,311 @@
+"""
+Micro-benchmarks de Modelos y Conversiones
+
+Mide las funciones que se ejecutan por cada fila en las rutas más usadas:
+validación de TransactionCreate, conversión de documentos a respuestas
+(_document_to_response, _user_doc_to_response), formato de moneda, la
+serialización JSON que hace FastAPI con response_model y la caché de
+transacciones recientes (página servida desde memoria). Cada caso se mide
+con el tamaño de lote de una petición real y reporta el tiempo por
+llamada y por fila, y la memoria asignada por llamada (pico medido con
+tracemalloc). Al final se reporta la memoria que retiene la caché de
+transacciones recientes por usuario.
+
+Con --compare se comparan los resultados con una línea base guardada con
+--save y el proceso termina con código 1 si algún caso empeora más allá
+de la tolerancia, para usarlo antes de integrar un cambio.
+
+Uso (desde GastoSmart-Backend, no requiere MongoDB):
+    python -m benchmarks.micro --save benchmarks/results/micro.json
+    python -m benchmarks.micro --compare benchmarks/results/micro.json --tolerance 0.15
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+# Cada caso: (nombre, filas por llamada, función preparada)
+Case = Tuple[str, int, Callable[[], Any]]
+
+def _sample_documents(count: int) -> List[Dict[str, Any]]:
+    """Documentos de transacciones realistas (como los devuelve Motor)"""
+    from tools.generate_dataset import UserDataset
+
+    documents: List[Dict[str, Any]] = []
+    index = 0
+    while len(documents) < count:
+        user = UserDataset(seed=7, index=index, end=date(2025, 6, 30), months=3)
+        for kind, amount, category, description, when in user.transactions():
+            documents.append({
+                "_id": ObjectId(),
+                "user_id": str(user.user_id),
+                "type": kind,
+                "amount": amount,
+                "category": category,
+                "description": description,
+                "date": when,
+                "created_at": when,
+                "updated_at": None,
+                "currency": "COP"
+            })
+        index += 1
+    return documents[:count]
+
+def build_cases(batch: int) -> List[Case]:
+    """
+    Preparar los casos de medición
+
+    Args:
+        batch: Filas por lote (como el límite del listado de transacciones)
+
+    Returns:
+        List[Case]: Casos a medir
+    """
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from starlette.responses import JSONResponse
+
+    from config.regional import format_currency, parse_currency
+    from database.transaction_operations import TransactionOperations
+    from database.user_operations import UserOperations
+    from models.transaction import TransactionCreate, TransactionResponse
+    from services.recent_cache import RecentTransactionsCache
+    from tools.generate_dataset import UserDataset
+
+    documents = _sample_documents(batch)
+    payloads = [
+        {
+            "type": doc["type"],
+            "amount": doc["amount"],
+            "category": doc["category"],
+            "description": doc["description"],
+            "date": doc["date"].isoformat()
+        }
+        for doc in documents
+    ]
+    user_docs = [
+        UserDataset(seed=7, index=i, end=date(2025, 6, 30), months=1).user_document("x" * 60)
+        for i in range(batch)
+    ]
+    amounts = [doc["amount"] for doc in documents]
+    formatted = [format_currency(amount) for amount in amounts]
+
+    # Las conversiones no usan la colección
+    transaction_ops = TransactionOperations(None)
+    user_ops = UserOperations(SimpleNamespace(users=None))
+    responses = [transaction_ops._document_to_response(doc) for doc in documents]
+    response_field = create_model_field(name="Response", type_=List[TransactionResponse], mode="serialization")
+
+    recent = RecentTransactionsCache(size=batch, max_users=1)
+    recent_user = responses[0].user_id
+    recent.finish_fill(recent_user, recent.begin_fill(recent_user), responses)
+
+    async def serialize() -> bytes:
+        content = await serialize_response(field=response_field, response_content=responses)
+        return JSONResponse(content).body
+
+    def run_serialize() -> bytes:
+        coroutine = serialize()
+        try:
+            coroutine.send(None)
+        except StopIteration as done:
+            return done.value
+        raise RuntimeError("serialize_response no debería suspenderse")
+
+    return [
+        ("TransactionCreate(**payload)", batch, lambda: [TransactionCreate(**payload) for payload in payloads]),
+        ("_document_to_response", batch, lambda: [transaction_ops._document_to_response(doc) for doc in documents]),
+        ("_user_doc_to_response", batch, lambda: [user_ops._user_doc_to_response(doc) for doc in user_docs]),
+        ("format_currency", batch, lambda: [format_currency(amount) for amount in amounts]),
+        ("parse_currency", batch, lambda: [parse_currency(text) for text in formatted]),
+        ("serialize_response+JSON", batch, run_serialize),
+        ("recent_cache get_page", batch, lambda: recent.get_page(recent_user, 0, batch))
+    ]
+
+def recent_cache_footprint(batch: int, users: int = 20) -> float:
+    """
+    Medir la memoria que retiene la caché de transacciones recientes por usuario
+
+    Las respuestas del backend se descartan después de llenar la caché, así
+    que se cuenta todo lo que queda referenciado (registros, fechas, textos).
+
+    Args:
+        batch: Transacciones por usuario (RECENT_CACHE_SIZE)
+        users: Usuarios a llenar
+
+    Returns:
+        float: Bytes por usuario
+    """
+    from database.transaction_operations import TransactionOperations
+    from services.recent_cache import RecentTransactionsCache
+
+    transaction_ops = TransactionOperations(None)
+    cache = RecentTransactionsCache(size=batch, max_users=users)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for index in range(users):
+            responses = [transaction_ops._document_to_response(doc) for doc in _sample_documents(batch)]
+            user_id = f"user{index}"
+            cache.finish_fill(user_id, cache.begin_fill(user_id), responses)
+            del responses
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return retained / users
+
+def measure(func: Callable[[], Any], min_time: float, rounds: int) -> Dict[str, float]:
+    """
+    Medir una función al estilo de pytest-benchmark
+
+    Calibra las iteraciones para que cada ronda dure al menos min_time y
+    toma varias rondas; el mínimo es el valor más estable entre
+    ejecuciones. La memoria se mide aparte para no afectar los tiempos.
+
+    Args:
+        func: Función sin argumentos a medir
+        min_time: Duración mínima de cada ronda en segundos
+        rounds: Número de rondas
+
+    Returns:
+        Dict[str, float]: Tiempos por llamada (segundos) y memoria por llamada (bytes)
+    """
+    func()
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        iterations *= 2
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - start) / iterations)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "iterations": iterations,
+        "alloc_bytes": peak
+    }
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+    alloc_tolerance: float
+) -> List[str]:
+    """
+    Comparar con una línea base
+
+    Args:
+        results: Resultados actuales por caso
+        baseline: Resultados de la línea base por caso
+        tolerance: Aumento relativo permitido del tiempo mínimo
+        alloc_tolerance: Aumento relativo permitido de la memoria asignada
+
+    Returns:
+        List[str]: Descripción de cada regresión encontrada
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["min"] and current["min"] > previous["min"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: tiempo {previous['min'] * 1e6:.1f}µs -> {current['min'] * 1e6:.1f}µs "
+                f"(+{(current['min'] / previous['min'] - 1) * 100:.1f}%)"
+            )
+        if previous["alloc_bytes"] and current["alloc_bytes"] > previous["alloc_bytes"] * (1 + alloc_tolerance):
+            regressions.append(
+                f"{name}: memoria {previous['alloc_bytes'] / 1024:.1f}KiB -> {current['alloc_bytes'] / 1024:.1f}KiB "
+                f"(+{(current['alloc_bytes'] / previous['alloc_bytes'] - 1) * 100:.1f}%)"
+            )
+    return regressions
+
+def main(argv=None) -> int:
+    """Punto de entrada de los micro-benchmarks"""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de modelos y conversiones de GastoSmart")
+    parser.add_argument("--batch", type=int, default=100, help="Filas por llamada (límite del listado)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Duración mínima de cada ronda (s)")
+    parser.add_argument("--filter", help="Medir solo los casos que contengan este texto")
+    parser.add_argument("--save", help="Guardar los resultados como línea base")
+    parser.add_argument("--compare", help="Línea base con la cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Aumento de tiempo permitido (0.15 = 15%%)")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10, help="Aumento de memoria permitido")
+    args = parser.parse_args(argv)
+
+    baseline: Optional[Dict[str, Any]] = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("batch") != args.batch:
+            print(f"La línea base usa --batch {baseline.get('batch')}; se usará ese valor")
+            args.batch = baseline.get("batch", args.batch)
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'caso':<30} {'µs/llamada':>11} {'mediana':>9} {'µs/fila':>8} {'KiB/llamada':>12}")
+    for name, rows, func in build_cases(args.batch):
+        if args.filter and args.filter not in name:
+            continue
+        result = measure(func, args.min_time, args.rounds)
+        results[name] = result
+        print(f"{name:<30} {result['min'] * 1e6:>11.1f} {result['median'] * 1e6:>9.1f} "
+              f"{result['min'] * 1e6 / rows:>8.2f} {result['alloc_bytes'] / 1024:>12.1f}")
+
+    footprint = recent_cache_footprint(args.batch)
+    print(f"\nCaché de recientes: {footprint / 1024:.1f} KiB por usuario "
+          f"({footprint / args.batch:.0f} bytes por transacción)")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "batch": args.batch,
+                "python": sys.version.split()[0],
+                "cases": results,
+                "recent_cache_bytes_per_user": footprint
+            }, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline.get("cases", {}), args.tolerance, args.alloc_tolerance)
+        if regressions:
+            print("\nRegresiones respecto a la línea base:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nSin regresiones respecto a la línea base")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
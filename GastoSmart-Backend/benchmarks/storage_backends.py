@@ -0,0 +1,272 @@
+"""
+Comparación de Backends de Almacenamiento
+
+Carga el mismo dataset de tools/generate_dataset.py en cada backend
+(memory, sqlite, mongo) y mide las operaciones de transacciones
+directamente sobre la interfaz de almacenamiento, sin HTTP: listado por
+fecha y por monto, paginación profunda, filtros por mes y categoría,
+estadísticas, categorías y creación. El dataset por defecto (2.000
+usuarios x 12 meses) tiene alrededor de 1M de transacciones.
+
+Reporta el tiempo de carga y p50/p95 por operación; con --concurrency
+varias peticiones se ejecutan a la vez, como en un worker con tráfico.
+
+Uso (desde GastoSmart-Backend):
+    python -m benchmarks.storage_backends --backends memory,sqlite
+    python -m benchmarks.storage_backends --backends sqlite,mongo --concurrency 8
+    python -m benchmarks.storage_backends --dataset dataset/ --output benchmarks/results/storage.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.load_test import BENCH_PASSWORD, dataset_users
+
+# Fecha final fija: el mismo dataset en cada ejecución
+DATASET_END = date(2025, 6, 30)
+
+Operation = Callable[[str, random.Random], Awaitable[Any]]
+
+def ensure_dataset(directory: Optional[str], users: int, months: int, seed: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    Usar un dataset NDJSON existente o generar uno temporal
+
+    Args:
+        directory: Directorio de un dataset existente (None = generar)
+        users: Usuarios a generar
+        months: Meses de historia por usuario
+        seed: Semilla
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: Directorio y manifiesto del dataset
+    """
+    if directory is None:
+        from tools.generate_dataset import main as generate_dataset
+
+        directory = tempfile.mkdtemp(prefix="gastosmart_storage_")
+        print(f"Generando {users} usuarios x {months} meses en {directory}...")
+        generate_dataset([
+            "--format", "ndjson", "--out", directory, "--users", str(users), "--months", str(months),
+            "--seed", str(seed), "--end-date", DATASET_END.isoformat(), "--password", BENCH_PASSWORD
+        ])
+    with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+        return directory, json.load(f)
+
+async def open_backend(name: str, dataset: str, manifest: Dict[str, Any], workdir: str, args: argparse.Namespace):
+    """
+    Crear y cargar un backend con el dataset
+
+    Returns:
+        Tuple[StorageBackend, float]: Backend conectado y segundos de carga
+    """
+    start = time.perf_counter()
+    if name == "memory":
+        from database.backends.memory import InMemoryStorage
+
+        storage = InMemoryStorage(dataset)
+        await storage.connect()
+    elif name == "sqlite":
+        from database.backends.sqlite import SQLiteStorage
+
+        storage = SQLiteStorage(os.path.join(workdir, "storage.db"))
+        await storage.connect()
+        await storage.import_ndjson(dataset)
+    elif name == "mongo":
+        if "bench" not in args.database:
+            raise ValueError("La base de datos de benchmark debe contener 'bench' en el nombre")
+        from tools.generate_dataset import main as generate_dataset
+
+        # El generador es determinista: la misma semilla produce los mismos datos que el NDJSON
+        generate_dataset([
+            "--format", "mongo", "--mongodb-url", args.mongodb_url, "--database", args.database,
+            "--drop", "--create-indexes", "--users", str(manifest["users"]), "--months", str(manifest["months"]),
+            "--seed", str(manifest["seed"]), "--end-date", manifest["end_date"], "--activity", str(manifest["activity"]),
+            "--password", BENCH_PASSWORD
+        ])
+        from database.backends.mongo import MongoStorage
+
+        storage = MongoStorage()
+        await storage.connect()
+    else:
+        raise ValueError(f"Backend desconocido: {name}")
+    return storage, time.perf_counter() - start
+
+def build_operations(storage, manifest: Dict[str, Any]) -> Dict[str, Tuple[Operation, int]]:
+    """
+    Operaciones a medir con su peso relativo en iteraciones
+
+    Args:
+        storage: Backend conectado
+        manifest: Manifiesto del dataset
+
+    Returns:
+        Dict[str, Tuple[Operation, int]]: Nombre -> (operación, divisor de iteraciones)
+    """
+    from models.transaction import TransactionCreate, TransactionFilter, TransactionSort, ExpenseCategory
+
+    ops = storage.transaction_operations()
+    end = datetime.fromisoformat(manifest["end_date"])
+    month = TransactionFilter(date_from=end.replace(day=1), date_to=end + timedelta(days=1))
+    food = TransactionFilter(category=ExpenseCategory.FOOD.value)
+    by_amount = TransactionSort(field="amount", order="desc")
+
+    async def create(user_id: str, rng: random.Random) -> Any:
+        return await ops.create_transaction(user_id, TransactionCreate(
+            type="expense", amount=float(rng.randint(1, 500) * 100), category=ExpenseCategory.FOOD.value,
+            description="Benchmark", date=end - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        ))
+
+    return {
+        "list": (lambda user_id, rng: ops.get_user_transactions(user_id, 0, 50), 1),
+        "list_skip_200": (lambda user_id, rng: ops.get_user_transactions(user_id, 200, 50), 1),
+        "list_month": (lambda user_id, rng: ops.get_user_transactions(user_id, 0, 50, month), 1),
+        "list_category": (lambda user_id, rng: ops.get_user_transactions(user_id, 0, 50, food), 1),
+        "list_by_amount": (lambda user_id, rng: ops.get_user_transactions(user_id, 0, 50, None, by_amount), 1),
+        "stats": (lambda user_id, rng: ops.get_transaction_stats(user_id), 1),
+        "stats_month": (lambda user_id, rng: ops.get_transaction_stats(user_id, month.date_from, month.date_to), 1),
+        "categories": (lambda user_id, rng: ops.get_categories(user_id), 1),
+        "create": (create, 4)
+    }
+
+async def measure(operation: Operation, user_ids: List[str], iterations: int, concurrency: int, seed: int) -> Dict[str, float]:
+    """
+    Ejecutar una operación con usuarios al azar y medir la latencia
+
+    Args:
+        operation: Operación a medir
+        user_ids: Usuarios del dataset
+        iterations: Llamadas en total
+        concurrency: Llamadas simultáneas
+        seed: Semilla para elegir usuarios
+
+    Returns:
+        Dict[str, float]: p50/p95/media en milisegundos y operaciones por segundo
+    """
+    latencies: List[float] = []
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        for _ in range(iterations // concurrency):
+            user_id = user_ids[rng.randrange(len(user_ids))]
+            start = time.perf_counter()
+            await operation(user_id, rng)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(index) for index in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "ops_per_second": len(latencies) / elapsed
+    }
+
+async def run_backend(name: str, dataset: str, manifest: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """Cargar un backend y medir todas sus operaciones"""
+    workdir = tempfile.mkdtemp(prefix=f"gastosmart_{name}_")
+    try:
+        print(f"\n[{name}] cargando {manifest['transactions']} transacciones...")
+        storage, load_seconds = await open_backend(name, dataset, manifest, workdir, args)
+        print(f"[{name}] carga: {load_seconds:.1f}s ({manifest['transactions'] / load_seconds:,.0f} docs/s)")
+        try:
+            user_ids = [user["id"] for user in dataset_users(manifest["users"], manifest["seed"])]
+            operations = {}
+            for operation_name, (operation, divisor) in build_operations(storage, manifest).items():
+                if args.filter and args.filter not in operation_name:
+                    continue
+                # Calentar cachés (páginas de SQLite, caché de WiredTiger) antes de medir
+                await measure(operation, user_ids, max(args.concurrency, args.iterations // 10), args.concurrency, args.seed)
+                operations[operation_name] = await measure(
+                    operation, user_ids, max(args.concurrency, args.iterations // divisor), args.concurrency, args.seed
+                )
+                result = operations[operation_name]
+                print(f"[{name}] {operation_name:<15} p50 {result['p50_ms']:7.2f}ms  p95 {result['p95_ms']:7.2f}ms  "
+                      f"{result['ops_per_second']:8.0f} ops/s")
+            return {"load_seconds": load_seconds, "operations": operations}
+        finally:
+            await storage.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def print_comparison(results: Dict[str, Dict[str, Any]]) -> None:
+    """Tabla de p50 (ms) por operación y backend"""
+    backends = list(results)
+    operations = []
+    for result in results.values():
+        operations.extend(name for name in result["operations"] if name not in operations)
+
+    print(f"\n{'p50 ms':<15}" + "".join(f"{backend:>12}" for backend in backends))
+    for operation in operations:
+        row = f"{operation:<15}"
+        for backend in backends:
+            value = results[backend]["operations"].get(operation)
+            row += f"{value['p50_ms']:>12.2f}" if value else f"{'-':>12}"
+        print(row)
+    print(f"{'carga (s)':<15}" + "".join(f"{results[backend]['load_seconds']:>12.1f}" for backend in backends))
+
+def main(argv=None) -> int:
+    """Punto de entrada de la comparación de backends"""
+    parser = argparse.ArgumentParser(description="Comparación de backends de almacenamiento de GastoSmart")
+    parser.add_argument("--backends", default="memory,sqlite,mongo", help="Backends separados por coma")
+    parser.add_argument("--dataset", help="Dataset NDJSON existente (si no, se genera uno temporal)")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=400, help="Llamadas por operación")
+    parser.add_argument("--concurrency", type=int, default=1, help="Llamadas simultáneas")
+    parser.add_argument("--filter", help="Medir solo las operaciones que contengan este texto")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="gastosmart_bench_storage", help="Base de datos de benchmark")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+
+    # database.connection lee la configuración al importarse
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DATABASE_NAME"] = args.database
+
+    generated = args.dataset is None
+    dataset, manifest = ensure_dataset(args.dataset, args.users, args.months, args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for name in [backend.strip() for backend in args.backends.split(",") if backend.strip()]:
+            try:
+                results[name] = asyncio.run(run_backend(name, dataset, manifest, args))
+            except Exception as e:
+                print(f"[{name}] omitido: {e}")
+    finally:
+        if generated:
+            shutil.rmtree(dataset, ignore_errors=True)
+
+    if not results:
+        return 1
+    print_comparison(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now().isoformat(),
+                    "dataset": manifest,
+                    "iterations": args.iterations,
+                    "concurrency": args.concurrency
+                },
+                "backends": results
+            }, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
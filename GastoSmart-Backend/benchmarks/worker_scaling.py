@@ -0,0 +1,112 @@
+"""
+Benchmark de Escalado por Workers
+
+Inicia server.py con distintos números de workers y mide el throughput
+de una ruta con varios procesos cliente en paralelo, para comprobar que
+el rendimiento crece con el número de núcleos usados.
+
+Uso (desde GastoSmart-Backend, con MongoDB accesible):
+    python -m benchmarks.worker_scaling --workers 1 2 4 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.http_client import HTTPConnection, wait_for_server
+
+async def _drive(host: str, port: int, path: str, connections: int, duration: float) -> Dict[str, int]:
+    """Generar carga con varias conexiones keep-alive durante un tiempo fijo"""
+    deadline = time.perf_counter() + duration
+    counts = {"ok": 0, "errors": 0}
+
+    async def user() -> None:
+        connection = HTTPConnection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    status, _, _ = await connection.request("GET", path)
+                    counts["ok" if status < 500 else "errors"] += 1
+                except (OSError, asyncio.IncompleteReadError):
+                    counts["errors"] += 1
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*[user() for _ in range(connections)])
+    return counts
+
+def _client_process(args) -> Dict[str, int]:
+    """Proceso cliente: ejecuta su parte de las conexiones"""
+    host, port, path, connections, duration = args
+    return asyncio.run(_drive(host, port, path, connections, duration))
+
+def run_load(host: str, port: int, path: str, connections: int, duration: float, processes: int) -> Dict[str, float]:
+    """
+    Medir el throughput repartiendo las conexiones entre procesos cliente
+
+    Returns:
+        Dict[str, float]: Peticiones totales, errores y peticiones por segundo
+    """
+    per_process = max(1, connections // processes)
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_client_process, [(host, port, path, per_process, duration)] * processes)
+    ok = sum(r["ok"] for r in results)
+    errors = sum(r["errors"] for r in results)
+    return {"requests": ok, "errors": errors, "rps": ok / duration}
+
+def benchmark_workers(args: argparse.Namespace, workers: int) -> Dict[str, float]:
+    """Iniciar el servidor con N workers, medir y detenerlo"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers), "--host", args.host, "--port", str(args.port)],
+        cwd=backend_dir,
+        stdout=subprocess.DEVNULL if not args.verbose else None,
+        stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        # Calentamiento corto para abrir conexiones y llenar cachés
+        run_load(args.host, args.port, args.path, args.connections, 1.0, args.client_processes)
+        result = run_load(args.host, args.port, args.path, args.connections, args.duration, args.client_processes)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    result["workers"] = workers
+    return result
+
+def main(argv=None) -> int:
+    """Punto de entrada del benchmark"""
+    parser = argparse.ArgumentParser(description="Throughput de GastoSmart según el número de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--path", default="/api/config/regional", help="Ruta a medir")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--client-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida del servidor")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, float]] = []
+    print(f"{'workers':>8} {'req/s':>10} {'errores':>8} {'escala':>7}")
+    for workers in args.workers:
+        result = benchmark_workers(args, workers)
+        results.append(result)
+        scale = result["rps"] / results[0]["rps"] if results[0]["rps"] else 0.0
+        print(f"{workers:>8} {result['rps']:>10.0f} {result['errors']:>8} {scale:>6.2f}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"path": args.path, "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,7 @@ from .regional import (
     format_currency,
     parse_currency
 )
+from .logging_config import setup_logging, shutdown_logging, request_id_var
 
 __all__ = [
     "CURRENCY",
@@ -28,5 +29,8 @@ __all__ = [
     "NUMBER_FORMAT",
     "EXPENSE_CATEGORIES",
     "format_currency",
-    "parse_currency"
+    "parse_currency",
+    "setup_logging",
+    "shutdown_logging",
+    "request_id_var"
 ]
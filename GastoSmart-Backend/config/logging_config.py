@@ -0,0 +1,230 @@
+"""
+Configuración de Logging para GastoSmart
+
+Este archivo configura un sistema de logging que no bloquea las
+peticiones: los módulos escriben en una cola (QueueHandler) y un hilo de
+fondo (QueueListener) formatea y escribe en la salida estándar. Soporta
+registros JSON con el ID de la petición, niveles por logger y muestreo
+con límite de frecuencia para mensajes repetitivos.
+
+Variables de entorno:
+    LOG_LEVEL: Nivel general (INFO por defecto)
+    LOG_LEVELS: Niveles por logger, ej: "database=DEBUG,uvicorn.access=WARNING"
+    LOG_FORMAT: "json" (por defecto) o "text"
+    LOG_RATE_LIMIT: Máximo de registros de un mismo punto del código por ventana
+    LOG_RATE_WINDOW_S: Duración de la ventana en segundos
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "20"))
+LOG_RATE_WINDOW_S = float(os.getenv("LOG_RATE_WINDOW_S", "60"))
+
+# ID de la petición en curso (lo asigna RequestIdMiddleware)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Atributos estándar de LogRecord (el resto se exporta como campos extra)
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "suppressed"}
+
+# Loggers de uvicorn que por defecto tienen sus propios handlers
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+class RequestIdFilter(logging.Filter):
+    """
+    Agrega el ID de la petición al registro
+
+    Se ejecuta en el hilo que emite el log, antes de pasar a la cola,
+    para que el contextvar de la petición esté disponible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita la frecuencia de mensajes repetitivos
+
+    Cada punto del código que emite logs (logger, nivel, archivo y línea)
+    puede emitir hasta `limit` registros por ventana; el resto se descarta
+    y el siguiente registro que pase indica cuántos se omitieron. La clave
+    no usa el texto del mensaje: con f-strings cada mensaje es distinto.
+    """
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW_S):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        # clave -> [inicio de ventana, emitidos, omitidos]
+        self._counters: Dict[Tuple[str, int, str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                suppressed = counter[2] if counter else 0
+                self._counters[key] = [now, 1, 0]
+                if len(self._counters) > 10000:
+                    # Evitar crecimiento sin límite (muchos puntos del código distintos)
+                    self._counters = {key: self._counters[key]}
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if counter[1] < self.limit:
+                counter[1] += 1
+                return True
+            counter[2] += 1
+            return False
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formatea los registros como una línea JSON
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process
+        }
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """
+    Formato de texto legible para desarrollo
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", None)
+        return f"{text} (+{suppressed} omitidos)" if suppressed else text
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo de la petición
+
+    El QueueHandler estándar formatea el mensaje antes de encolarlo; aquí
+    solo se resuelven los argumentos y la excepción se convierte a texto,
+    y el formato JSON se hace en el hilo de fondo.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Con la cola llena se descarta el registro antes que bloquear la petición
+            pass
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """
+    Interpretar la especificación de niveles por logger
+
+    Args:
+        spec: Texto como "database=DEBUG,uvicorn.access=WARNING"
+
+    Returns:
+        Dict[str, str]: Nivel por nombre de logger
+    """
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    log_format: str = LOG_FORMAT,
+    stream=None
+) -> None:
+    """
+    Configurar el logging con cola y escritor en segundo plano
+
+    Es idempotente: si ya estaba configurado se reemplaza la configuración.
+
+    Args:
+        level: Nivel del logger raíz
+        levels: Niveles por logger (ver parse_levels)
+        log_format: "json" o "text"
+        stream: Destino de los registros (stdout por defecto)
+    """
+    global _listener
+    shutdown_logging()
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=100000)
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(RateLimitFilter())
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if log_format == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    # Los logs de uvicorn pasan por la misma cola
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """Vaciar la cola y detener el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,51 @@
+"""
+Backends de Almacenamiento de GastoSmart
+
+Cada backend implementa StorageBackend y las operaciones de
+BaseTransactionOperations y BaseUserOperations:
+
+- mongo: MongoDB con Motor (por defecto)
+- memory: estructuras en memoria del proceso, sin persistencia
+- sqlite: archivo SQLite para instalaciones de un solo servidor
+
+Los backends se importan al crearlos para no cargar dependencias que no
+se usan.
+"""
+
+from .base import (
+    StorageBackend, BaseTransactionOperations, BaseUserOperations,
+    DelegatingTransactionOperations, DelegatingUserOperations
+)
+
+def create_storage(name: str) -> StorageBackend:
+    """
+    Crear el backend de almacenamiento por nombre
+
+    Args:
+        name: Nombre del backend ('mongo', 'memory' o 'sqlite')
+
+    Returns:
+        StorageBackend: Backend sin conectar
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    if name == "mongo":
+        from .mongo import MongoStorage
+        return MongoStorage()
+    if name == "memory":
+        from .memory import InMemoryStorage
+        return InMemoryStorage()
+    if name == "sqlite":
+        from .sqlite import SQLiteStorage
+        return SQLiteStorage()
+    raise ValueError(f"Backend de almacenamiento desconocido: {name}")
+
+__all__ = [
+    "StorageBackend",
+    "BaseTransactionOperations",
+    "BaseUserOperations",
+    "DelegatingTransactionOperations",
+    "DelegatingUserOperations",
+    "create_storage",
+]
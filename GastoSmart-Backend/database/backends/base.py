@@ -0,0 +1,737 @@
+"""
+Interfaz de Almacenamiento para GastoSmart
+
+Este archivo define las operaciones que debe implementar cada backend de
+almacenamiento (MongoDB, memoria, ...). Los routers dependen solo de estas
+clases base, así que el backend se elige con la variable de entorno
+STORAGE_BACKEND sin cambiar los endpoints.
+
+Las conversiones de documentos a modelos de respuesta, el manejo de
+contraseñas y los códigos de verificación son comunes a todos los
+backends y se implementan aquí.
+"""
+
+import bcrypt
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from models.transaction import (
+    TransactionCreate, TransactionResponse, TransactionUpdate,
+    TransactionFilter, TransactionSort, TransactionStats, CategoryTotal, TransactionChanges,
+    normalize_category
+)
+from models.user import UserCreate, UserResponse, UserLogin, BudgetUpdate
+
+# Días que se conservan las marcas de transacciones eliminadas; un token de
+# sincronización más viejo obliga al cliente a recargar todo
+SYNC_TOMBSTONE_TTL_DAYS = int(os.getenv("SYNC_TOMBSTONE_TTL_DAYS", "30"))
+# Transacciones que puede afectar una actualización o eliminación masiva
+BULK_MAX_TRANSACTIONS = int(os.getenv("BULK_MAX_TRANSACTIONS", "5000"))
+
+def normalize_datetime(value: datetime) -> datetime:
+    """
+    Convertir una fecha a como la devuelve MongoDB
+
+    Los backends sin BSON la usan al guardar y al filtrar para que los
+    resultados coincidan con los del backend mongo.
+
+    Args:
+        value: Fecha con o sin zona horaria
+
+    Returns:
+        datetime: UTC sin zona horaria, truncada a milisegundos
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond - value.microsecond % 1000)
+
+def decode_extended_json(obj: Dict[str, Any]) -> Any:
+    """
+    object_hook de json.loads para el NDJSON de tools/generate_dataset.py
+
+    Convierte {"$date": ...} en datetime y {"$oid": ...} en ObjectId.
+    """
+    if len(obj) == 1:
+        if "$date" in obj:
+            text = obj["$date"]
+            if text.endswith("Z"):
+                return datetime.fromisoformat(text[:-1])
+            return normalize_datetime(datetime.fromisoformat(text))
+        if "$oid" in obj:
+            return ObjectId(obj["$oid"])
+    return obj
+
+class BaseTransactionOperations(ABC):
+    """
+    Operaciones de transacciones que debe implementar cada backend
+    """
+
+    @abstractmethod
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        """
+        Crear una nueva transacción
+
+        Raises:
+            ValueError: Si los datos son inválidos
+        """
+
+    @abstractmethod
+    async def get_transaction_by_id(self, transaction_id: str, user_id: str) -> Optional[TransactionResponse]:
+        """Obtener una transacción del usuario por ID (None si no existe)"""
+
+    @abstractmethod
+    async def get_user_transactions(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[TransactionResponse]:
+        """Obtener transacciones de un usuario con filtros y ordenamiento"""
+
+    async def get_user_transaction_fields(
+        self,
+        user_id: str,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtener solo algunos campos de las transacciones de un usuario
+
+        Mismos filtros, orden y paginación que get_user_transactions. Esta
+        implementación recorta las respuestas completas; los backends que
+        pueden leer solo las columnas pedidas la sobrescriben.
+
+        Args:
+            user_id: ID del usuario
+            fields: Campos de TransactionResponse a devolver
+            skip: Número de transacciones a saltar
+            limit: Límite de transacciones a devolver
+            filters: Filtros a aplicar
+            sort: Criterios de ordenamiento
+
+        Returns:
+            List[Dict[str, Any]]: Transacciones con los campos pedidos, listas para JSON
+        """
+        transactions = await self.get_user_transactions(user_id, skip, limit, filters, sort)
+        return [transaction.model_dump(mode="json", include=set(fields)) for transaction in transactions]
+
+    @abstractmethod
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        """Actualizar una transacción (None si no existe o no cambió)"""
+
+    @abstractmethod
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        """Eliminar una transacción (True si se eliminó)"""
+
+    @abstractmethod
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """
+        Aplicar los mismos cambios a varias transacciones (por IDs o por filtro)
+
+        Cada transacción recibe su propia versión de sincronización.
+
+        Returns:
+            List[str]: IDs de las transacciones actualizadas
+
+        Raises:
+            ValueError: Si se seleccionan más de BULK_MAX_TRANSACTIONS
+        """
+
+    @abstractmethod
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """
+        Eliminar varias transacciones (por IDs o por filtro), con sus marcas de eliminación
+
+        Returns:
+            List[str]: IDs de las transacciones eliminadas
+
+        Raises:
+            ValueError: Si se seleccionan más de BULK_MAX_TRANSACTIONS
+        """
+
+    @abstractmethod
+    async def get_transaction_stats(
+        self,
+        user_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> TransactionStats:
+        """Obtener totales de ingresos y gastos del usuario en un período"""
+
+    @abstractmethod
+    async def get_categories(self, user_id: str, transaction_type: Optional[str] = None) -> List[str]:
+        """Obtener las categorías usadas por el usuario, ordenadas"""
+
+    @abstractmethod
+    async def get_category_totals(
+        self,
+        user_id: str,
+        transaction_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[CategoryTotal]:
+        """Obtener la suma y el conteo por categoría, de mayor a menor total"""
+
+    @abstractmethod
+    async def get_version(self, user_id: str) -> int:
+        """Obtener la versión de datos del usuario (cambia con cada escritura de sus transacciones)"""
+
+    @abstractmethod
+    async def get_changes(
+        self,
+        user_id: str,
+        since: Optional[int],
+        limit: int = 500,
+        after: Optional[str] = None
+    ) -> TransactionChanges:
+        """
+        Obtener las transacciones creadas, actualizadas o eliminadas después de una versión
+
+        Cada escritura asigna a la transacción (o a su marca de eliminación)
+        la siguiente versión del usuario. Con since=None, o mayor que la
+        versión actual, se devuelven todas las transacciones con reset=True,
+        en páginas de limit en orden de ID: las siguientes páginas se piden
+        con since=version y after=el after de la página anterior.
+        """
+
+    def _new_document(self, user_id: str, transaction_data: TransactionCreate) -> Dict[str, Any]:
+        """
+        Construir el documento de una transacción nueva
+
+        Args:
+            user_id: ID del usuario propietario
+            transaction_data: Datos de la transacción
+
+        Returns:
+            Dict[str, Any]: Documento sin _id
+        """
+        return {
+            "user_id": user_id,
+            "type": transaction_data.type.value,
+            "amount": transaction_data.amount,
+            "category": transaction_data.category,
+            "category_key": normalize_category(transaction_data.category),
+            "description": transaction_data.description,
+            "date": transaction_data.date,
+            "currency": transaction_data.currency,
+            "created_at": datetime.now(),
+            "updated_at": None
+        }
+
+    def _update_fields(self, update_data: TransactionUpdate) -> Dict[str, Any]:
+        """
+        Campos a modificar en una actualización
+
+        Args:
+            update_data: Datos a actualizar
+
+        Returns:
+            Dict[str, Any]: Campos con valor y la fecha de actualización
+        """
+        update_doc = {}
+
+        if update_data.amount is not None:
+            update_doc["amount"] = update_data.amount
+        if update_data.category is not None:
+            update_doc["category"] = update_data.category
+            update_doc["category_key"] = normalize_category(update_data.category)
+        if update_data.description is not None:
+            update_doc["description"] = update_data.description
+        if update_data.date is not None:
+            update_doc["date"] = update_data.date
+
+        update_doc["updated_at"] = datetime.now()
+        return update_doc
+
+    def _check_bulk_size(self, count: int) -> None:
+        """
+        Verificar el tamaño de una operación masiva
+
+        Raises:
+            ValueError: Si supera BULK_MAX_TRANSACTIONS
+        """
+        if count > BULK_MAX_TRANSACTIONS:
+            raise ValueError(
+                f"La operación afecta más de {BULK_MAX_TRANSACTIONS} transacciones; use un filtro más específico"
+            )
+
+    def _tombstone_cutoff(self) -> datetime:
+        """Fecha antes de la cual se pueden descartar las marcas de eliminación"""
+        return datetime.now() - timedelta(days=SYNC_TOMBSTONE_TTL_DAYS)
+
+    def _merge_changes(
+        self,
+        documents: List[Dict[str, Any]],
+        tombstones: List[Tuple[int, str]],
+        current: int,
+        limit: int
+    ) -> TransactionChanges:
+        """
+        Unir transacciones modificadas y eliminadas en orden de versión
+
+        Args:
+            documents: Documentos con versión mayor a la de partida (hasta limit + 1)
+            tombstones: (versión, ID) de las eliminadas (hasta limit + 1)
+            current: Versión del usuario leída antes de las consultas
+            limit: Cambios a devolver
+
+        Returns:
+            TransactionChanges: Cambios y versión hasta la que llegan
+        """
+        entries = sorted(
+            [(doc["version"], doc, None) for doc in documents] +
+            [(version, None, transaction_id) for version, transaction_id in tombstones],
+            key=lambda entry: entry[0]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        if has_more:
+            version = entries[-1][0]
+        else:
+            version = max([current] + [entry[0] for entry in entries[-1:]])
+
+        return TransactionChanges(
+            changes=[self._document_to_response(doc) for _, doc, _ in entries if doc is not None],
+            deleted=[transaction_id for _, doc, transaction_id in entries if doc is None],
+            version=version,
+            has_more=has_more
+        )
+
+    def _reset_page(
+        self,
+        documents: List[Dict[str, Any]],
+        version: int,
+        limit: int,
+        first_page: bool
+    ) -> TransactionChanges:
+        """
+        Página de una recarga completa de las transacciones del usuario
+
+        Args:
+            documents: Documentos en orden de ID (hasta limit + 1)
+            version: Versión leída en la primera página; lo que cambie mientras
+                se recorren las páginas llega después con la sincronización incremental
+            limit: Transacciones por página
+            first_page: Solo la primera lleva reset=True (el cliente reemplaza
+                su lista y agrega las siguientes)
+
+        Returns:
+            TransactionChanges: Página y, si hay más, el ID desde el que sigue
+        """
+        has_more = len(documents) > limit
+        changes = [self._document_to_response(doc) for doc in documents[:limit]]
+        return TransactionChanges(
+            changes=changes,
+            version=version,
+            has_more=has_more,
+            reset=first_page,
+            after=changes[-1].id if has_more else None
+        )
+
+    def _document_to_response(self, doc: Dict[str, Any]) -> TransactionResponse:
+        """
+        Convertir documento a TransactionResponse
+
+        Args:
+            doc: Documento de la transacción
+
+        Returns:
+            TransactionResponse: Respuesta de transacción
+        """
+        return TransactionResponse(
+            id=str(doc["_id"]),
+            user_id=doc["user_id"],
+            type=doc["type"],
+            amount=doc["amount"],
+            category=doc["category"],
+            description=doc.get("description"),
+            date=doc["date"],
+            created_at=doc["created_at"],
+            updated_at=doc.get("updated_at"),
+            currency=doc.get("currency", "COP")
+        )
+
+    def _document_to_fields(self, doc: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+        """
+        Convertir documento a algunos campos de TransactionResponse sin crear el modelo
+
+        Args:
+            doc: Documento de la transacción (puede tener solo los campos pedidos)
+            fields: Campos a devolver
+
+        Returns:
+            Dict[str, Any]: Campos con los mismos valores JSON que TransactionResponse
+        """
+        values = {}
+        for field in fields:
+            if field == "id":
+                value = str(doc["_id"])
+            elif field == "amount":
+                value = float(doc["amount"])
+            elif field == "currency":
+                value = doc.get("currency", "COP")
+            else:
+                value = doc.get(field)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            values[field] = value
+        return values
+
+class DelegatingTransactionOperations(BaseTransactionOperations):
+    """
+    Operaciones que delegan todo en las de otro backend
+
+    Base de las capas que se agregan sobre el backend (cachés, eventos):
+    cada una sobrescribe solo los métodos que le interesan.
+    """
+
+    def __init__(self, operations: BaseTransactionOperations):
+        """
+        Args:
+            operations: Operaciones envueltas
+        """
+        self.operations = operations
+
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        return await self.operations.create_transaction(user_id, transaction_data)
+
+    async def get_transaction_by_id(self, transaction_id: str, user_id: str) -> Optional[TransactionResponse]:
+        return await self.operations.get_transaction_by_id(transaction_id, user_id)
+
+    async def get_user_transactions(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[TransactionResponse]:
+        return await self.operations.get_user_transactions(user_id, skip, limit, filters, sort)
+
+    async def get_user_transaction_fields(
+        self,
+        user_id: str,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.operations.get_user_transaction_fields(user_id, fields, skip, limit, filters, sort)
+
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        return await self.operations.update_transaction(transaction_id, user_id, update_data)
+
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        return await self.operations.delete_transaction(transaction_id, user_id)
+
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        return await self.operations.update_transactions(user_id, update_data, ids, filters)
+
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        return await self.operations.delete_transactions(user_id, ids, filters)
+
+    async def get_transaction_stats(
+        self,
+        user_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> TransactionStats:
+        return await self.operations.get_transaction_stats(user_id, date_from, date_to)
+
+    async def get_categories(self, user_id: str, transaction_type: Optional[str] = None) -> List[str]:
+        return await self.operations.get_categories(user_id, transaction_type)
+
+    async def get_category_totals(
+        self,
+        user_id: str,
+        transaction_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[CategoryTotal]:
+        return await self.operations.get_category_totals(user_id, transaction_type, date_from, date_to, limit)
+
+    async def get_version(self, user_id: str) -> int:
+        return await self.operations.get_version(user_id)
+
+    async def get_changes(
+        self,
+        user_id: str,
+        since: Optional[int],
+        limit: int = 500,
+        after: Optional[str] = None
+    ) -> TransactionChanges:
+        return await self.operations.get_changes(user_id, since, limit, after)
+
+class BaseUserOperations(ABC):
+    """
+    Operaciones de usuarios que debe implementar cada backend
+
+    `database` debe tener el atributo `verification_codes` que usa
+    EmailService para guardar los códigos de verificación.
+    """
+
+    database: Any
+
+    @abstractmethod
+    async def create_user(self, user_data: UserCreate) -> UserResponse:
+        """
+        Crear un nuevo usuario (inactivo hasta verificar el correo)
+
+        Raises:
+            ValueError: Si el correo ya existe
+        """
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
+        """Obtener usuario activo por correo electrónico"""
+
+    @abstractmethod
+    async def get_user_by_email_any_status(self, email: str) -> Optional[UserResponse]:
+        """Obtener usuario por correo electrónico (cualquier estado)"""
+
+    @abstractmethod
+    async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
+        """Obtener usuario activo por ID"""
+
+    @abstractmethod
+    async def authenticate_user(self, login_data: UserLogin) -> Optional[UserResponse]:
+        """Autenticar usuario con correo y contraseña"""
+
+    @abstractmethod
+    async def update_budget(self, user_id: str, budget_data: BudgetUpdate) -> Optional[UserResponse]:
+        """Actualizar presupuesto del usuario"""
+
+    @abstractmethod
+    async def deactivate_user(self, user_id: str) -> bool:
+        """Desactivar usuario (soft delete)"""
+
+    @abstractmethod
+    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
+        """Obtener los usuarios activos (con paginación)"""
+
+    @abstractmethod
+    async def activate_user_account(self, email: str) -> bool:
+        """Activar cuenta de usuario después de verificar email"""
+
+    @abstractmethod
+    async def update_password(self, email: str, new_password: str) -> bool:
+        """Actualizar contraseña del usuario y activar la cuenta"""
+
+    async def send_verification_code(self, email: str, purpose: str, user_name: str = None) -> bool:
+        """
+        Enviar código de verificación por correo
+
+        Args:
+            email: Correo electrónico del usuario
+            purpose: Propósito del código ('registration' o 'password_recovery')
+            user_name: Nombre del usuario (opcional)
+
+        Returns:
+            bool: True si se envió correctamente
+        """
+        try:
+            from services.email_service import EmailService
+            email_service = EmailService(self.database)
+            code = await email_service.generate_verification_code(email, purpose)
+            return await email_service.send_verification_email(email, code, purpose, user_name)
+        except Exception:
+            return False
+
+    async def verify_code(self, email: str, code: str, purpose: str) -> dict:
+        """
+        Verificar código de verificación
+
+        Args:
+            email: Correo electrónico del usuario
+            code: Código de verificación
+            purpose: Propósito del código
+
+        Returns:
+            dict: {"valid": bool, "message": str, "attempts_left": int}
+        """
+        try:
+            from services.email_service import EmailService
+            email_service = EmailService(self.database)
+            result = await email_service.verify_code(email, code, purpose)
+
+            # Si la verificación es exitosa y es para registro, activar la cuenta
+            if result["valid"] and purpose == "registration":
+                await self.activate_user_account(email)
+                result["message"] = "Cuenta activada exitosamente"
+
+            return result
+        except Exception:
+            return {
+                "valid": False,
+                "message": "Error interno del servidor",
+                "attempts_left": 0
+            }
+
+    def _hash_password(self, password: str) -> str:
+        """
+        Encriptar contraseña usando bcrypt
+
+        Args:
+            password: Contraseña en texto plano
+
+        Returns:
+            Contraseña encriptada
+        """
+        salt = bcrypt.gensalt()
+        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+        return hashed.decode('utf-8')
+
+    def _verify_password(self, password: str, hashed_password: str) -> bool:
+        """
+        Verificar contraseña
+
+        Args:
+            password: Contraseña en texto plano
+            hashed_password: Contraseña encriptada
+
+        Returns:
+            True si la contraseña es correcta
+        """
+        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def _user_doc_to_response(self, user_doc: dict) -> UserResponse:
+        """
+        Convertir documento de usuario a UserResponse
+
+        Args:
+            user_doc: Documento de usuario
+
+        Returns:
+            UserResponse
+        """
+        return UserResponse(
+            id=str(user_doc["_id"]),
+            first_name=user_doc["first_name"],
+            last_name=user_doc["last_name"],
+            email=user_doc["email"],
+            initial_budget=user_doc["initial_budget"],
+            budget_period=user_doc["budget_period"],
+            budget_configured=user_doc.get("budget_configured", False),
+            registration_date=user_doc["registration_date"],
+            is_active=user_doc["is_active"],
+            email_verified=user_doc.get("email_verified", False),
+            last_access=user_doc.get("last_access"),
+            currency=user_doc.get("currency", "COP"),
+            timezone=user_doc.get("timezone", "America/Bogota")
+        )
+
+class DelegatingUserOperations(BaseUserOperations):
+    """
+    Operaciones de usuario que delegan todo en las de otro backend
+
+    Los códigos de verificación usan las implementaciones de la clase base
+    (sobre la misma `database`), así que la activación de cuenta de
+    verify_code pasa por esta capa.
+    """
+
+    def __init__(self, operations: BaseUserOperations):
+        """
+        Args:
+            operations: Operaciones envueltas
+        """
+        self.operations = operations
+        self.database = operations.database
+
+    async def create_user(self, user_data: UserCreate) -> UserResponse:
+        return await self.operations.create_user(user_data)
+
+    async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
+        return await self.operations.get_user_by_email(email)
+
+    async def get_user_by_email_any_status(self, email: str) -> Optional[UserResponse]:
+        return await self.operations.get_user_by_email_any_status(email)
+
+    async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
+        return await self.operations.get_user_by_id(user_id)
+
+    async def authenticate_user(self, login_data: UserLogin) -> Optional[UserResponse]:
+        return await self.operations.authenticate_user(login_data)
+
+    async def update_budget(self, user_id: str, budget_data: BudgetUpdate) -> Optional[UserResponse]:
+        return await self.operations.update_budget(user_id, budget_data)
+
+    async def deactivate_user(self, user_id: str) -> bool:
+        return await self.operations.deactivate_user(user_id)
+
+    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
+        return await self.operations.get_all_users(skip, limit)
+
+    async def activate_user_account(self, email: str) -> bool:
+        return await self.operations.activate_user_account(email)
+
+    async def update_password(self, email: str, new_password: str) -> bool:
+        return await self.operations.update_password(email, new_password)
+
+class StorageBackend(ABC):
+    """
+    Backend de almacenamiento: ciclo de vida y fábrica de operaciones
+    """
+
+    # Nombre del backend (valor de STORAGE_BACKEND)
+    name: str = ""
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Abrir conexiones y preparar índices antes de recibir tráfico"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Cerrar conexiones al apagar el servidor"""
+
+    @abstractmethod
+    def transaction_operations(self) -> BaseTransactionOperations:
+        """Obtener las operaciones de transacciones"""
+
+    @abstractmethod
+    def user_operations(self) -> BaseUserOperations:
+        """Obtener las operaciones de usuarios"""
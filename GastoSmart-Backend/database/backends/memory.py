@@ -0,0 +1,809 @@
+"""
+Backend de Almacenamiento en Memoria
+
+Guarda usuarios, transacciones y códigos de verificación en estructuras
+del proceso, sin persistencia. Sirve para desarrollo sin MongoDB y para
+medir el costo de la API sin la base de datos (benchmarks/load_test.py
+--backend memory).
+
+Índices por usuario:
+- by_date / by_amount: listas ordenadas de (valor, _id); los rangos se
+  resuelven con bisect y el listado se detiene al completar skip + limit
+- by_category: categoría -> ids (índice hash)
+- totals / type_categories: totales y conteos por tipo para estadísticas
+  y categorías sin recorrer las transacciones
+
+Los usuarios tienen un índice hash por correo. Las fechas se guardan como
+las devuelve MongoDB (UTC sin zona horaria, precisión de milisegundos)
+para que los resultados coincidan con los del backend mongo.
+
+Cada proceso del servidor tiene sus propios datos: con varios workers
+(server.py) cada uno ve solo lo que se escribió en él. Con MEMORY_SEED_DIR
+todos cargan al iniciar el mismo dataset NDJSON de tools/generate_dataset.py.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from database.backends.base import (
+    StorageBackend, BaseTransactionOperations, BaseUserOperations,
+    normalize_datetime, decode_extended_json, BULK_MAX_TRANSACTIONS
+)
+from models.transaction import (
+    TransactionCreate, TransactionResponse, TransactionUpdate,
+    TransactionFilter, TransactionSort, TransactionStats, CategoryTotal, TransactionChanges,
+    normalize_category
+)
+from models.user import UserCreate, UserResponse, UserLogin, BudgetUpdate
+from services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Directorio con un dataset NDJSON para cargar al iniciar (vacío = sin datos)
+MEMORY_SEED_DIR = os.getenv("MEMORY_SEED_DIR", "")
+
+# Con un filtro de categoría que deja menos candidatos que esta fracción del
+# rango de fechas/montos, se ordenan los candidatos en vez de recorrer el rango
+CATEGORY_SCAN_RATIO = 8
+
+_MIN_ID = ObjectId(b"\x00" * 12)
+_MAX_ID = ObjectId(b"\xff" * 12)
+
+def _normalize_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalizar las fechas de un documento o de los campos a modificar"""
+    for key, value in fields.items():
+        if isinstance(value, datetime):
+            fields[key] = normalize_datetime(value)
+    return fields
+
+def _object_id(value: Any) -> Optional[ObjectId]:
+    """Convertir un ID a ObjectId (None si es inválido)"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$ne": lambda a, b: a != b
+}
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Evaluar un filtro simple (igualdad y $gt/$gte/$lt/$lte/$ne)"""
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if not all(_OPERATORS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+class _DocumentCollection:
+    """
+    Colección mínima con la interfaz de Motor que usa EmailService
+    (insert_one, find_one con sort, update_one con $set)
+    """
+
+    def __init__(self):
+        self.documents: Dict[ObjectId, Dict[str, Any]] = {}
+
+    async def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
+        # Los documentos vencidos ya no se pueden usar
+        now = datetime.now()
+        expired = [key for key, doc in self.documents.items() if doc.get("expires_at") and doc["expires_at"] <= now]
+        for key in expired:
+            del self.documents[key]
+
+        document.setdefault("_id", ObjectId())
+        self.documents[document["_id"]] = document
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def find_one(self, query: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None) -> Optional[Dict[str, Any]]:
+        matches = [doc for doc in self.documents.values() if _matches(doc, query)]
+        for field, direction in reversed(sort or []):
+            matches.sort(key=lambda doc: doc.get(field), reverse=direction < 0)
+        return matches[0] if matches else None
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> SimpleNamespace:
+        for doc in self.documents.values():
+            if _matches(doc, query):
+                fields = update.get("$set", {})
+                modified = any(doc.get(key) != value for key, value in fields.items())
+                doc.update(fields)
+                return SimpleNamespace(matched_count=1, modified_count=int(modified))
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+class _UserIndex:
+    """
+    Índices de las transacciones de un usuario
+    """
+
+    __slots__ = ("by_date", "by_amount", "by_category", "totals", "type_categories")
+
+    def __init__(self):
+        self.by_date: List[Tuple[datetime, ObjectId]] = []
+        self.by_amount: List[Tuple[float, ObjectId]] = []
+        self.by_category: Dict[str, Set[ObjectId]] = {}
+        # Tipo -> [suma de montos, cantidad]
+        self.totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        # Tipo -> categoría -> cantidad
+        self.type_categories: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, doc: Dict[str, Any], keep_sorted: bool = True) -> None:
+        """Indexar una transacción (keep_sorted=False en cargas masivas)"""
+        if keep_sorted:
+            insort(self.by_date, (doc["date"], doc["_id"]))
+            insort(self.by_amount, (doc["amount"], doc["_id"]))
+        else:
+            self.by_date.append((doc["date"], doc["_id"]))
+            self.by_amount.append((doc["amount"], doc["_id"]))
+        self.by_category.setdefault(doc["category"], set()).add(doc["_id"])
+        totals = self.totals[doc["type"]]
+        totals[0] += doc["amount"]
+        totals[1] += 1
+        self.type_categories[doc["type"]][doc["category"]] += 1
+
+    def remove(self, doc: Dict[str, Any]) -> None:
+        """Quitar una transacción de los índices"""
+        del self.by_date[bisect_left(self.by_date, (doc["date"], doc["_id"]))]
+        del self.by_amount[bisect_left(self.by_amount, (doc["amount"], doc["_id"]))]
+
+        ids = self.by_category[doc["category"]]
+        ids.discard(doc["_id"])
+        if not ids:
+            del self.by_category[doc["category"]]
+
+        totals = self.totals[doc["type"]]
+        totals[1] -= 1
+        # Sin transacciones el total vuelve a cero exacto (sin error acumulado)
+        totals[0] = totals[0] - doc["amount"] if totals[1] else 0.0
+
+        categories = self.type_categories[doc["type"]]
+        categories[doc["category"]] -= 1
+        if categories[doc["category"]] <= 0:
+            del categories[doc["category"]]
+
+    def sort(self) -> None:
+        """Ordenar los índices después de una carga masiva"""
+        self.by_date.sort()
+        self.by_amount.sort()
+
+class InMemoryStorage(StorageBackend):
+    """
+    Almacenamiento en memoria del proceso
+    """
+
+    name = "memory"
+
+    def __init__(self, seed_dir: str = MEMORY_SEED_DIR):
+        """
+        Inicializar almacenamiento vacío
+
+        Args:
+            seed_dir: Directorio NDJSON a cargar al conectar (opcional)
+        """
+        self.seed_dir = seed_dir
+        self.transactions: Dict[ObjectId, Dict[str, Any]] = {}
+        self.user_indexes: Dict[str, _UserIndex] = {}
+        self.users: Dict[ObjectId, Dict[str, Any]] = {}
+        self.users_by_email: Dict[str, ObjectId] = {}
+        # Sincronización: versión por usuario y marcas (versión, ID, fecha) de las eliminadas.
+        # Las versiones parten del momento de inicio para no repetir las de un proceso anterior
+        # (los ETag y tokens que tenga el cliente no coinciden con datos distintos)
+        self.sync_versions: Dict[str, int] = {}
+        self.version_base = int(time.time() * 1000)
+        self.tombstones: Dict[str, List[Tuple[int, str, datetime]]] = {}
+        # Usado por EmailService (como database.verification_codes en MongoDB)
+        self.verification_codes = _DocumentCollection()
+
+    async def connect(self) -> None:
+        """Cargar el dataset inicial (si se configuró)"""
+        if self.seed_dir:
+            users, transactions = await asyncio.to_thread(self.load_ndjson, self.seed_dir)
+            logger.info(f"Dataset cargado en memoria: {users} usuarios, {transactions} transacciones")
+
+    async def close(self) -> None:
+        """No hay conexiones que cerrar"""
+
+    def transaction_operations(self) -> "InMemoryTransactionOperations":
+        """Operaciones de transacciones sobre este almacenamiento"""
+        return InMemoryTransactionOperations(self)
+
+    def user_operations(self) -> "InMemoryUserOperations":
+        """Operaciones de usuarios sobre este almacenamiento"""
+        return InMemoryUserOperations(self)
+
+    def load_ndjson(self, directory: str) -> Tuple[int, int]:
+        """
+        Cargar usuarios y transacciones exportados con tools/generate_dataset.py
+
+        Args:
+            directory: Directorio con users.ndjson y transactions-*.ndjson
+
+        Returns:
+            Tuple[int, int]: Usuarios y transacciones cargados
+        """
+        users = 0
+        users_path = os.path.join(directory, "users.ndjson")
+        if os.path.exists(users_path):
+            with open(users_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self.insert_user(json.loads(line, object_hook=decode_extended_json))
+                    users += 1
+
+        transactions = 0
+        touched = set()
+        for path in sorted(glob.glob(os.path.join(directory, "transactions-*.ndjson"))):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    doc = json.loads(line, object_hook=decode_extended_json)
+                    doc["_id"] = ObjectId()
+                    self.transactions[doc["_id"]] = doc
+                    index = self.user_indexes.get(doc["user_id"])
+                    if index is None:
+                        index = self.user_indexes[doc["user_id"]] = _UserIndex()
+                    index.add(doc, keep_sorted=False)
+                    touched.add(doc["user_id"])
+                    transactions += 1
+
+        for user_id in touched:
+            self.user_indexes[user_id].sort()
+        return users, transactions
+
+    # ---- Transacciones ----
+
+    def find_transaction(self, transaction_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Buscar una transacción del usuario por ID"""
+        doc = self.transactions.get(_object_id(transaction_id))
+        if doc is None or doc["user_id"] != user_id:
+            return None
+        return doc
+
+    def next_version(self, user_id: str) -> int:
+        """Incrementar y devolver la versión de sincronización del usuario"""
+        version = self.sync_versions[user_id] = self.sync_versions.get(user_id, self.version_base) + 1
+        return version
+
+    def insert_transaction(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Guardar e indexar una transacción nueva"""
+        doc = _normalize_fields(dict(doc))
+        doc["_id"] = ObjectId()
+        doc["version"] = self.next_version(doc["user_id"])
+        self.transactions[doc["_id"]] = doc
+        index = self.user_indexes.get(doc["user_id"])
+        if index is None:
+            index = self.user_indexes[doc["user_id"]] = _UserIndex()
+        index.add(doc)
+        return doc
+
+    def update_transaction(self, doc: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        """Modificar una transacción y actualizar sus índices"""
+        index = self.user_indexes[doc["user_id"]]
+        index.remove(doc)
+        doc.update(_normalize_fields(dict(fields)))
+        doc["version"] = self.next_version(doc["user_id"])
+        index.add(doc)
+
+    def delete_transaction(self, doc: Dict[str, Any], cutoff: datetime) -> None:
+        """
+        Eliminar una transacción y sus entradas en los índices
+
+        Args:
+            doc: Documento a eliminar
+            cutoff: Las marcas de eliminación anteriores a esta fecha se descartan
+        """
+        user_id = doc["user_id"]
+        self.user_indexes[user_id].remove(doc)
+        del self.transactions[doc["_id"]]
+
+        # Las marcas están en orden de versión, que también es orden de fecha
+        tombstones = self.tombstones.setdefault(user_id, [])
+        expired = 0
+        while expired < len(tombstones) and tombstones[expired][2] < cutoff:
+            expired += 1
+        del tombstones[:expired]
+        tombstones.append((self.next_version(user_id), str(doc["_id"]), datetime.now()))
+
+    # ---- Usuarios ----
+
+    def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Buscar usuario por correo (cualquier estado)"""
+        user_id = self.users_by_email.get(email)
+        return self.users.get(user_id) if user_id is not None else None
+
+    def insert_user(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Guardar un usuario nuevo
+
+        Raises:
+            ValueError: Si el correo ya existe
+        """
+        if doc["email"] in self.users_by_email:
+            raise ValueError("El correo electrónico ya está registrado")
+        doc = _normalize_fields(dict(doc))
+        doc.setdefault("_id", ObjectId())
+        self.users[doc["_id"]] = doc
+        self.users_by_email[doc["email"]] = doc["_id"]
+        return doc
+
+    def update_user(self, doc: Dict[str, Any], fields: Dict[str, Any]) -> bool:
+        """
+        Modificar campos de un usuario
+
+        Returns:
+            bool: True si algún valor cambió (como modified_count en MongoDB)
+        """
+        fields = _normalize_fields(dict(fields))
+        modified = any(doc.get(key) != value for key, value in fields.items())
+        doc.update(fields)
+        return modified
+
+class InMemoryTransactionOperations(BaseTransactionOperations):
+    """
+    Operaciones de transacciones sobre InMemoryStorage
+    """
+
+    def __init__(self, storage: InMemoryStorage):
+        """
+        Inicializar operaciones de transacciones
+
+        Args:
+            storage: Almacenamiento en memoria
+        """
+        self.storage = storage
+
+    @traced("transactions.create_transaction")
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        """Crear una nueva transacción"""
+        try:
+            doc = self.storage.insert_transaction(self._new_document(user_id, transaction_data))
+            return self._document_to_response(doc)
+        except Exception as e:
+            logger.error(f"Error al crear transacción: {e}")
+            raise ValueError(f"Error al crear transacción: {str(e)}")
+
+    @traced("transactions.get_transaction_by_id")
+    async def get_transaction_by_id(self, transaction_id: str, user_id: str) -> Optional[TransactionResponse]:
+        """Obtener transacción por ID"""
+        doc = self.storage.find_transaction(transaction_id, user_id)
+        return self._document_to_response(doc) if doc else None
+
+    @traced("transactions.get_user_transactions")
+    async def get_user_transactions(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[TransactionResponse]:
+        """
+        Obtener transacciones de un usuario con filtros y ordenamiento
+
+        Con orden por fecha o monto se recorre el índice ordenado dentro del
+        rango del filtro y se detiene al completar la página; con orden por
+        categoría o fecha de creación se ordenan los documentos que cumplen
+        el filtro.
+        """
+        index = self.storage.user_indexes.get(user_id)
+        if index is None:
+            return []
+
+        transaction_type = None
+        categories: Optional[Set[str]] = None
+        date_from = date_to = amount_min = amount_max = None
+        if filters:
+            if filters.type:
+                transaction_type = filters.type.value
+            if filters.category:
+                # by_category tiene pocas entradas por usuario: se comparan sus claves normalizadas
+                key = normalize_category(filters.category)
+                if filters.category_exact:
+                    categories = {category for category in index.by_category if normalize_category(category) == key}
+                else:
+                    categories = {
+                        category for category in index.by_category if normalize_category(category).startswith(key)
+                    }
+            date_from = normalize_datetime(filters.date_from) if filters.date_from else None
+            date_to = normalize_datetime(filters.date_to) if filters.date_to else None
+            # Igual que en MongoDB: un monto 0 no filtra
+            amount_min = filters.amount_min or None
+            amount_max = filters.amount_max or None
+
+        def matches(doc: Dict[str, Any]) -> bool:
+            if transaction_type and doc["type"] != transaction_type:
+                return False
+            if categories is not None and doc["category"] not in categories:
+                return False
+            if date_from is not None and doc["date"] < date_from:
+                return False
+            if date_to is not None and doc["date"] > date_to:
+                return False
+            if amount_min is not None and doc["amount"] < amount_min:
+                return False
+            if amount_max is not None and doc["amount"] > amount_max:
+                return False
+            return True
+
+        field = sort.field if sort else "date"
+        descending = sort.order != "asc" if sort else True
+        documents = self.storage.transactions
+
+        if field in ("date", "amount"):
+            keys = index.by_date if field == "date" else index.by_amount
+            low, high = (date_from, date_to) if field == "date" else (amount_min, amount_max)
+            start = bisect_left(keys, (low, _MIN_ID)) if low is not None else 0
+            end = bisect_right(keys, (high, _MAX_ID)) if high is not None else len(keys)
+
+            candidates = None
+            if categories is not None:
+                candidates = set().union(*(index.by_category[category] for category in categories))
+            if candidates is None or len(candidates) * CATEGORY_SCAN_RATIO >= end - start:
+                positions = range(end - 1, start - 1, -1) if descending else range(start, end)
+                page: List[Dict[str, Any]] = []
+                skipped = 0
+                for position in positions:
+                    doc = documents[keys[position][1]]
+                    if not matches(doc):
+                        continue
+                    if skipped < skip:
+                        skipped += 1
+                        continue
+                    page.append(doc)
+                    if len(page) == limit:
+                        break
+                return [self._document_to_response(doc) for doc in page]
+            selected = [documents[_id] for _id in candidates]
+        elif categories is not None:
+            selected = [documents[_id] for category in categories for _id in index.by_category[category]]
+        else:
+            selected = [documents[_id] for _, _id in index.by_date]
+
+        selected = [doc for doc in selected if matches(doc)]
+        selected.sort(key=lambda doc: (doc[field], doc["_id"]), reverse=descending)
+        return [self._document_to_response(doc) for doc in selected[skip:skip + limit if limit else None]]
+
+    @traced("transactions.update_transaction")
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        """Actualizar una transacción existente"""
+        doc = self.storage.find_transaction(transaction_id, user_id)
+        if doc is None:
+            return None
+        self.storage.update_transaction(doc, self._update_fields(update_data))
+        return self._document_to_response(doc)
+
+    @traced("transactions.delete_transaction")
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        """Eliminar una transacción"""
+        doc = self.storage.find_transaction(transaction_id, user_id)
+        if doc is None:
+            return False
+        self.storage.delete_transaction(doc, self._tombstone_cutoff())
+        return True
+
+    async def _select_documents(
+        self,
+        user_id: str,
+        ids: Optional[List[str]],
+        filters: Optional[TransactionFilter]
+    ) -> List[Dict[str, Any]]:
+        """Documentos de una operación masiva (por IDs o con el mismo filtro del listado)"""
+        if ids is not None:
+            self._check_bulk_size(len(ids))
+            documents = (self.storage.find_transaction(transaction_id, user_id) for transaction_id in dict.fromkeys(ids))
+            return [doc for doc in documents if doc is not None]
+        page = await self.get_user_transactions(user_id, 0, BULK_MAX_TRANSACTIONS + 1, filters)
+        self._check_bulk_size(len(page))
+        return [self.storage.transactions[ObjectId(transaction.id)] for transaction in page]
+
+    @traced("transactions.update_transactions")
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """Aplicar los mismos cambios a varias transacciones"""
+        documents = await self._select_documents(user_id, ids, filters)
+        fields = self._update_fields(update_data)
+        for doc in documents:
+            self.storage.update_transaction(doc, fields)
+        return [str(doc["_id"]) for doc in documents]
+
+    @traced("transactions.delete_transactions")
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """Eliminar varias transacciones"""
+        documents = await self._select_documents(user_id, ids, filters)
+        cutoff = self._tombstone_cutoff()
+        for doc in documents:
+            self.storage.delete_transaction(doc, cutoff)
+        return [str(doc["_id"]) for doc in documents]
+
+    @traced("transactions.get_transaction_stats")
+    async def get_transaction_stats(
+        self,
+        user_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> TransactionStats:
+        """
+        Obtener estadísticas de transacciones de un usuario
+
+        Sin período se usan los totales por tipo del índice; con período se
+        suma solo el rango de fechas del índice ordenado.
+        """
+        index = self.storage.user_indexes.get(user_id)
+        totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+
+        if index is not None and not (date_from or date_to):
+            totals = index.totals
+        elif index is not None:
+            start = bisect_left(index.by_date, (normalize_datetime(date_from), _MIN_ID)) if date_from else 0
+            end = bisect_right(index.by_date, (normalize_datetime(date_to), _MAX_ID)) if date_to else len(index.by_date)
+            documents = self.storage.transactions
+            for position in range(start, end):
+                doc = documents[index.by_date[position][1]]
+                entry = totals[doc["type"]]
+                entry[0] += doc["amount"]
+                entry[1] += 1
+
+        total_income, income_count = totals["income"] if "income" in totals else (0.0, 0)
+        total_expense, expense_count = totals["expense"] if "expense" in totals else (0.0, 0)
+
+        return TransactionStats(
+            total_income=total_income,
+            total_expense=total_expense,
+            balance=total_income - total_expense,
+            transaction_count=sum(entry[1] for entry in totals.values()),
+            income_count=income_count,
+            expense_count=expense_count,
+            period_start=date_from,
+            period_end=date_to
+        )
+
+    @traced("transactions.get_categories")
+    async def get_categories(self, user_id: str, transaction_type: Optional[str] = None) -> List[str]:
+        """Obtener categorías únicas de transacciones del usuario"""
+        index = self.storage.user_indexes.get(user_id)
+        if index is None:
+            return []
+        if transaction_type:
+            return sorted(index.type_categories.get(transaction_type, ()))
+        return sorted(index.by_category)
+
+    @traced("transactions.get_category_totals")
+    async def get_category_totals(
+        self,
+        user_id: str,
+        transaction_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[CategoryTotal]:
+        """Obtener la suma y el conteo por categoría en el rango de fechas del índice ordenado"""
+        index = self.storage.user_indexes.get(user_id)
+        if index is None:
+            return []
+
+        start = bisect_left(index.by_date, (normalize_datetime(date_from), _MIN_ID)) if date_from else 0
+        end = bisect_right(index.by_date, (normalize_datetime(date_to), _MAX_ID)) if date_to else len(index.by_date)
+        documents = self.storage.transactions
+        totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        for position in range(start, end):
+            doc = documents[index.by_date[position][1]]
+            if transaction_type and doc["type"] != transaction_type:
+                continue
+            entry = totals[doc["category"]]
+            entry[0] += doc["amount"]
+            entry[1] += 1
+
+        ranked = sorted(totals.items(), key=lambda item: (-item[1][0], item[0]))
+        return [
+            CategoryTotal(category=category, total=total, count=count)
+            for category, (total, count) in ranked[:limit]
+        ]
+
+    @traced("transactions.get_version")
+    async def get_version(self, user_id: str) -> int:
+        """Obtener la versión de datos del usuario"""
+        return self.storage.sync_versions.get(user_id, 0)
+
+    @traced("transactions.get_changes")
+    async def get_changes(
+        self,
+        user_id: str,
+        since: Optional[int],
+        limit: int = 500,
+        after: Optional[str] = None
+    ) -> TransactionChanges:
+        """Obtener los cambios de transacciones del usuario desde una versión"""
+        current = self.storage.sync_versions.get(user_id, 0)
+        index = self.storage.user_indexes.get(user_id)
+        ids = [_id for _, _id in index.by_date] if index is not None else []
+        documents = self.storage.transactions
+
+        if since is None or since > current or after is not None:
+            # Recarga completa por páginas en orden de ID
+            ids.sort()
+            start = 0
+            if since is None or since > current or _object_id(after) is None:
+                since, after = current, None
+            else:
+                start = bisect_right(ids, _object_id(after))
+            return self._reset_page(
+                [documents[_id] for _id in ids[start:start + limit + 1]], since, limit, first_page=after is None
+            )
+
+        # Las transacciones cargadas del dataset no tienen versión (solo llegan con reset)
+        changed = sorted(
+            (documents[_id] for _id in ids if documents[_id].get("version", 0) > since),
+            key=lambda doc: doc["version"]
+        )
+        tombstones = [
+            (version, transaction_id)
+            for version, transaction_id, _ in self.storage.tombstones.get(user_id, ())
+            if version > since
+        ]
+        return self._merge_changes(changed[:limit + 1], tombstones[:limit + 1], current, limit)
+
+class InMemoryUserOperations(BaseUserOperations):
+    """
+    Operaciones de usuarios sobre InMemoryStorage
+    """
+
+    def __init__(self, storage: InMemoryStorage):
+        """
+        Inicializar operaciones de usuario
+
+        Args:
+            storage: Almacenamiento en memoria
+        """
+        self.storage = storage
+        self.database = storage
+
+    async def create_user(self, user_data: UserCreate) -> UserResponse:
+        """Crear un nuevo usuario (inactivo hasta verificar el correo)"""
+        if self.storage.find_user_by_email(user_data.email):
+            raise ValueError("El correo electrónico ya está registrado")
+
+        hashed_password = await asyncio.to_thread(self._hash_password, user_data.password)
+
+        # insert_user vuelve a validar el correo: otro registro pudo completarse mientras se encriptaba
+        user_doc = self.storage.insert_user({
+            "first_name": user_data.first_name,
+            "last_name": user_data.last_name,
+            "email": user_data.email,
+            "password": hashed_password,
+            "initial_budget": user_data.initial_budget,
+            "budget_period": user_data.budget_period,
+            "budget_configured": False,
+            "registration_date": datetime.now(),
+            "is_active": False,
+            "email_verified": False,
+            "last_access": None,
+            "currency": user_data.currency,
+            "timezone": user_data.timezone
+        })
+        return self._user_doc_to_response(user_doc)
+
+    def _active_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_doc = self.storage.find_user_by_email(email)
+        return user_doc if user_doc and user_doc["is_active"] else None
+
+    def _active_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        user_doc = self.storage.users.get(_object_id(user_id))
+        return user_doc if user_doc and user_doc["is_active"] else None
+
+    async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
+        """Obtener usuario activo por correo electrónico"""
+        user_doc = self._active_by_email(email)
+        return self._user_doc_to_response(user_doc) if user_doc else None
+
+    async def get_user_by_email_any_status(self, email: str) -> Optional[UserResponse]:
+        """Obtener usuario por correo electrónico (cualquier estado)"""
+        user_doc = self.storage.find_user_by_email(email)
+        return self._user_doc_to_response(user_doc) if user_doc else None
+
+    async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
+        """Obtener usuario activo por ID"""
+        user_doc = self._active_by_id(user_id)
+        return self._user_doc_to_response(user_doc) if user_doc else None
+
+    async def authenticate_user(self, login_data: UserLogin) -> Optional[UserResponse]:
+        """Autenticar usuario con correo y contraseña"""
+        user_doc = self._active_by_email(login_data.email)
+        if not user_doc:
+            return None
+
+        password_valid = await asyncio.to_thread(
+            self._verify_password, login_data.password, user_doc["password"]
+        )
+        if not password_valid:
+            return None
+
+        # Como en MongoDB, la respuesta tiene el último acceso anterior
+        response = self._user_doc_to_response(user_doc)
+        self.storage.update_user(user_doc, {"last_access": datetime.now()})
+        return response
+
+    async def update_budget(self, user_id: str, budget_data: BudgetUpdate) -> Optional[UserResponse]:
+        """Actualizar presupuesto del usuario"""
+        user_doc = self._active_by_id(user_id)
+        if not user_doc:
+            return None
+        modified = self.storage.update_user(user_doc, {
+            "initial_budget": budget_data.initial_budget,
+            "budget_period": budget_data.budget_period,
+            "budget_configured": True
+        })
+        return self._user_doc_to_response(user_doc) if modified else None
+
+    async def deactivate_user(self, user_id: str) -> bool:
+        """Desactivar usuario (soft delete)"""
+        user_doc = self.storage.users.get(_object_id(user_id))
+        if not user_doc:
+            return False
+        return self.storage.update_user(user_doc, {"is_active": False})
+
+    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
+        """Obtener los usuarios activos (con paginación)"""
+        active = (user_doc for user_doc in self.storage.users.values() if user_doc["is_active"])
+        users: List[UserResponse] = []
+        for position, user_doc in enumerate(active):
+            if position < skip:
+                continue
+            if limit and len(users) >= limit:
+                break
+            users.append(self._user_doc_to_response(user_doc))
+        return users
+
+    async def activate_user_account(self, email: str) -> bool:
+        """Activar cuenta de usuario después de verificar email"""
+        user_doc = self.storage.find_user_by_email(email)
+        if not user_doc:
+            return False
+        return self.storage.update_user(user_doc, {
+            "is_active": True,
+            "email_verified": True,
+            "verification_date": datetime.now()
+        })
+
+    async def update_password(self, email: str, new_password: str) -> bool:
+        """Actualizar contraseña del usuario y activar la cuenta"""
+        user_doc = self.storage.find_user_by_email(email)
+        if not user_doc:
+            return False
+        hashed_password = await asyncio.to_thread(self._hash_password, new_password)
+        return self.storage.update_user(user_doc, {
+            "password": hashed_password,
+            "password_updated": datetime.now(),
+            "is_active": True,
+            "email_verified": True
+        })
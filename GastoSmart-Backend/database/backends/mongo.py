@@ -0,0 +1,46 @@
+"""
+Backend de Almacenamiento MongoDB
+
+Usa las operaciones de database/transaction_operations.py y
+database/user_operations.py sobre la conexión de database/connection.py.
+"""
+
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from database.backends.base import StorageBackend
+from database.connection import connect_to_mongo, close_mongo_connection, get_async_database
+from database.indexes import ensure_indexes
+from database.transaction_operations import TransactionOperations
+from database.user_operations import UserOperations
+
+class MongoStorage(StorageBackend):
+    """
+    Almacenamiento en MongoDB (backend por defecto)
+    """
+
+    name = "mongo"
+
+    def __init__(self):
+        """Inicializar backend sin conectar"""
+        self.database: Optional[AsyncIOMotorDatabase] = None
+
+    async def connect(self) -> None:
+        """Conectar a MongoDB y asegurar los índices"""
+        await connect_to_mongo()
+        self.database = await get_async_database()
+        await ensure_indexes(self.database)
+
+    async def close(self) -> None:
+        """Cerrar la conexión a MongoDB"""
+        await close_mongo_connection()
+        self.database = None
+
+    def transaction_operations(self) -> TransactionOperations:
+        """Operaciones sobre la colección 'transactions'"""
+        return TransactionOperations(self.database.transactions)
+
+    def user_operations(self) -> UserOperations:
+        """Operaciones sobre la colección 'users'"""
+        return UserOperations(self.database)
@@ -0,0 +1,1017 @@
+"""
+Backend de Almacenamiento SQLite
+
+Base de datos embebida para instalaciones de un solo servidor que no
+necesitan MongoDB. Todos los workers de server.py comparten el mismo
+archivo:
+
+- WAL: las lecturas no se bloquean mientras otro proceso escribe
+- Conexiones reutilizadas: cada hilo del ejecutor abre una conexión al
+  primer uso y la conserva (sin abrir una por consulta)
+- Ejecutores: las consultas corren en hilos para no bloquear el bucle de
+  eventos; las lecturas en SQLITE_READ_THREADS hilos y las escrituras en
+  un único hilo, que es lo que SQLite admite a la vez por archivo
+- Índice (user_id, date, type, amount): cubre el listado por fecha y las
+  estadísticas por período, que se calculan en SQL sin leer la tabla
+- Índice (user_id, category_key): filtro por categoría exacta o por
+  prefijo como rango sobre la clave normalizada
+
+Las fechas se guardan como texto ISO de ancho fijo con milisegundos, en
+UTC sin zona horaria (como las devuelve MongoDB), así el orden del texto
+es el orden cronológico.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from database.backends.base import (
+    StorageBackend, BaseTransactionOperations, BaseUserOperations,
+    normalize_datetime, decode_extended_json, BULK_MAX_TRANSACTIONS
+)
+from models.transaction import (
+    TransactionCreate, TransactionResponse, TransactionUpdate,
+    TransactionFilter, TransactionSort, TransactionStats, CategoryTotal, TransactionChanges,
+    TRANSACTION_FIELDS, normalize_category
+)
+from models.user import UserCreate, UserResponse, UserLogin, BudgetUpdate
+from services.tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Archivo de la base de datos
+SQLITE_PATH = os.getenv("SQLITE_PATH", "gastosmart.db")
+
+# Hilos (y conexiones) de lectura por proceso
+SQLITE_READ_THREADS = int(os.getenv("SQLITE_READ_THREADS", "4"))
+
+# Caché de páginas y memoria mapeada por conexión
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+
+# Espera máxima cuando otro proceso tiene el bloqueo de escritura
+SQLITE_BUSY_TIMEOUT_S = float(os.getenv("SQLITE_BUSY_TIMEOUT_S", "5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    password TEXT NOT NULL,
+    initial_budget REAL NOT NULL,
+    budget_period TEXT NOT NULL,
+    budget_configured INTEGER NOT NULL DEFAULT 0,
+    registration_date TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    email_verified INTEGER NOT NULL DEFAULT 0,
+    last_access TEXT,
+    currency TEXT NOT NULL DEFAULT 'COP',
+    timezone TEXT NOT NULL DEFAULT 'America/Bogota',
+    verification_date TEXT,
+    password_updated TEXT
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    category_key TEXT,
+    description TEXT,
+    date TEXT NOT NULL,
+    currency TEXT NOT NULL DEFAULT 'COP',
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Listado por fecha y estadísticas por período: type y amount van en el
+-- índice para que las sumas se resuelvan sin leer la tabla
+CREATE INDEX IF NOT EXISTS transactions_user_date ON transactions (user_id, date, type, amount);
+
+-- Categorías del usuario (DISTINCT ordenado sin leer la tabla)
+CREATE INDEX IF NOT EXISTS transactions_user_category ON transactions (user_id, category, type);
+
+CREATE TABLE IF NOT EXISTS verification_codes (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    code TEXT NOT NULL,
+    purpose TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    used INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS verification_codes_email_purpose_created
+    ON verification_codes (email, purpose, created_at);
+
+-- Sincronización incremental: versión por usuario y marcas de eliminación
+CREATE TABLE IF NOT EXISTS sync_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transaction_tombstones (
+    user_id TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    deleted_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, version)
+);
+"""
+
+# Se crean después de agregar las columnas version y category_key a las bases anteriores
+_SYNC_INDEX = "CREATE INDEX IF NOT EXISTS transactions_user_version ON transactions (user_id, version)"
+_CATEGORY_KEY_INDEX = "CREATE INDEX IF NOT EXISTS transactions_user_category_key ON transactions (user_id, category_key)"
+
+# Columnas que se convierten al leer
+_DATETIME_COLUMNS = frozenset({
+    "date", "created_at", "updated_at", "registration_date", "last_access",
+    "verification_date", "password_updated", "expires_at"
+})
+_BOOLEAN_COLUMNS = frozenset({"budget_configured", "is_active", "email_verified", "used"})
+
+# Columnas de ordenamiento permitidas
+_SORT_COLUMNS = {"date": "date", "amount": "amount", "category": "category", "created_at": "created_at"}
+
+# Operadores de los filtros que usa EmailService
+_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<=", "$ne": "IS NOT"}
+
+def _to_sql(value: Any) -> Any:
+    """Convertir un valor de documento a su representación en SQLite"""
+    if isinstance(value, datetime):
+        return normalize_datetime(value).isoformat(timespec="milliseconds")
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+def _document_factory(cursor: sqlite3.Cursor, row: Tuple) -> Dict[str, Any]:
+    """row_factory: filas como documentos (id -> _id, fechas y booleanos)"""
+    document = {}
+    for (column, *_), value in zip(cursor.description, row):
+        if column == "id":
+            column = "_id"
+        elif value is not None and column in _DATETIME_COLUMNS:
+            value = datetime.fromisoformat(value)
+        elif column in _BOOLEAN_COLUMNS:
+            value = bool(value)
+        document[column] = value
+    return document
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Menor texto mayor que todos los que empiezan con prefix (el orden de SQLite es el de los code points)"""
+    following = ord(prefix[-1]) + 1
+    # Los surrogates no se pueden codificar en UTF-8
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return prefix[:-1] + chr(following)
+
+def _where(query: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Traducir un filtro simple (igualdad y $gt/$gte/$lt/$lte/$ne) a WHERE"""
+    clauses: List[str] = []
+    params: List[Any] = []
+    for field, condition in query.items():
+        column = "id" if field == "_id" else field
+        if isinstance(condition, dict):
+            for operator, operand in condition.items():
+                clauses.append(f"{column} {_OPERATORS[operator]} ?")
+                params.append(_to_sql(operand))
+        elif condition is None:
+            clauses.append(f"{column} IS NULL")
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(_to_sql(condition))
+    return " AND ".join(clauses) or "1", params
+
+def _backfill_category_keys(connection: sqlite3.Connection) -> int:
+    """Calcular category_key de las transacciones que no la tienen (un solo recorrido de la tabla)"""
+    return connection.execute(
+        "UPDATE transactions SET category_key = normalize_category(category) WHERE category_key IS NULL"
+    ).rowcount
+
+def _create_schema(connection: sqlite3.Connection) -> None:
+    """Crear tablas e índices y migrar las bases creadas sin las columnas version y category_key"""
+    connection.executescript(_SCHEMA)
+    columns = {row["name"] for row in connection.execute("PRAGMA table_info(transactions)")}
+    if "version" not in columns:
+        connection.execute("ALTER TABLE transactions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if "category_key" not in columns:
+        connection.execute("ALTER TABLE transactions ADD COLUMN category_key TEXT")
+        updated = _backfill_category_keys(connection)
+        logger.info(f"Columna category_key agregada a {updated} transacciones")
+    connection.execute(_SYNC_INDEX)
+    connection.execute(_CATEGORY_KEY_INDEX)
+
+def _next_version(connection: sqlite3.Connection, user_id: str, count: int = 1) -> int:
+    """
+    Incrementar y devolver la versión de sincronización del usuario (dentro de la escritura)
+
+    Con count > 1 reserva varias versiones y devuelve la última.
+    """
+    return connection.execute(
+        "INSERT INTO sync_versions (user_id, version) VALUES (?, ?) "
+        "ON CONFLICT (user_id) DO UPDATE SET version = version + excluded.version RETURNING version",
+        [user_id, count]
+    ).fetchone()["version"]
+
+def _insert(connection: sqlite3.Connection, table: str, document: Dict[str, Any]) -> None:
+    columns = ", ".join("id" if key == "_id" else key for key in document)
+    placeholders = ", ".join("?" for _ in document)
+    connection.execute(
+        f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+        [_to_sql(value) for value in document.values()]
+    )
+
+def _update(
+    connection: sqlite3.Connection,
+    table: str,
+    where: str,
+    params: List[Any],
+    fields: Dict[str, Any],
+    only_changes: bool = False
+) -> int:
+    """
+    Ejecutar UPDATE ... SET
+
+    Con only_changes=True solo cuenta las filas en las que algún valor
+    cambia, como modified_count en MongoDB.
+    """
+    values = [_to_sql(value) for value in fields.values()]
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    sql = f"UPDATE {table} SET {assignments} WHERE {where}"
+    if only_changes:
+        sql += " AND (" + " OR ".join(f"{column} IS NOT ?" for column in fields) + ")"
+        params = [*params, *values]
+    return connection.execute(sql, [*values, *params]).rowcount
+
+class _SQLiteCollection:
+    """
+    Tabla con la interfaz de Motor que usa EmailService
+    (insert_one, find_one con sort, update_one con $set)
+    """
+
+    def __init__(self, storage: "SQLiteStorage", table: str):
+        self.storage = storage
+        self.table = table
+
+    async def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
+        document.setdefault("_id", ObjectId())
+
+        def insert(connection: sqlite3.Connection) -> None:
+            # Los códigos vencidos ya no se pueden usar
+            connection.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", [_to_sql(datetime.now())])
+            _insert(connection, self.table, document)
+
+        await self.storage.write(insert)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def find_one(self, query: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None) -> Optional[Dict[str, Any]]:
+        where, params = _where(query)
+        sql = f"SELECT * FROM {self.table} WHERE {where}"
+        if sort:
+            sql += " ORDER BY " + ", ".join(f"{field} {'DESC' if direction < 0 else 'ASC'}" for field, direction in sort)
+        return await self.storage.read(lambda connection: connection.execute(sql + " LIMIT 1", params).fetchone())
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> SimpleNamespace:
+        where, params = _where(query)
+        count = await self.storage.write(_update, self.table, where, params, update.get("$set", {}))
+        return SimpleNamespace(matched_count=count, modified_count=count)
+
+class SQLiteStorage(StorageBackend):
+    """
+    Almacenamiento en un archivo SQLite
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH, read_threads: int = SQLITE_READ_THREADS):
+        """
+        Inicializar backend sin conectar
+
+        Args:
+            path: Archivo de la base de datos
+            read_threads: Hilos de lectura
+        """
+        self.path = path
+        self.read_threads = read_threads
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        # Usado por EmailService (como database.verification_codes en MongoDB)
+        self.verification_codes = _SQLiteCollection(self, "verification_codes")
+
+    async def connect(self) -> None:
+        """Crear los ejecutores y el esquema (tablas e índices)"""
+        self._readers = ThreadPoolExecutor(self.read_threads, thread_name_prefix="sqlite-read")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="sqlite-write")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, lambda: _create_schema(self._connection()))
+        logger.info(f"Conectado a SQLite: {self.path}")
+
+    async def close(self) -> None:
+        """Terminar los ejecutores y cerrar las conexiones"""
+        for executor in (self._readers, self._writer):
+            if executor:
+                executor.shutdown(wait=True)
+        self._readers = self._writer = None
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def transaction_operations(self) -> "SQLiteTransactionOperations":
+        """Operaciones de transacciones sobre esta base de datos"""
+        return SQLiteTransactionOperations(self)
+
+    def user_operations(self) -> "SQLiteUserOperations":
+        """Operaciones de usuarios sobre esta base de datos"""
+        return SQLiteUserOperations(self)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se abre una vez por hilo)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None: las escrituras abren su transacción explícitamente
+            connection = sqlite3.connect(
+                self.path, timeout=SQLITE_BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            # Con WAL, NORMAL no pierde consistencia ante un corte (solo las últimas transacciones)
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_MB * 1024}")
+            connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_MB * 1024 * 1024}")
+            connection.execute("PRAGMA temp_store = MEMORY")
+            connection.create_function("normalize_category", 1, normalize_category, deterministic=True)
+            connection.row_factory = _document_factory
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _execute_read(self, operation: Callable, args: Tuple) -> Any:
+        return operation(self._connection(), *args)
+
+    def _execute_write(self, operation: Callable, args: Tuple) -> Any:
+        connection = self._connection()
+        # IMMEDIATE toma el bloqueo de escritura al inicio (sin esperas a mitad de la transacción)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = operation(connection, *args)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    async def read(self, operation: Callable, *args) -> Any:
+        """
+        Ejecutar una lectura en el ejecutor de lectura
+
+        Args:
+            operation: Función que recibe la conexión y los argumentos
+            *args: Argumentos de la función
+
+        Returns:
+            Any: Resultado de la función
+        """
+        with span("sqlite.read"):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._readers, self._execute_read, operation, args
+            )
+
+    async def write(self, operation: Callable, *args) -> Any:
+        """
+        Ejecutar una escritura en una transacción del hilo de escritura
+
+        Args:
+            operation: Función que recibe la conexión y los argumentos
+            *args: Argumentos de la función
+
+        Returns:
+            Any: Resultado de la función
+        """
+        with span("sqlite.write"):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._writer, self._execute_write, operation, args
+            )
+
+    async def import_ndjson(self, directory: str, batch_size: int = 5000) -> Tuple[int, int]:
+        """
+        Importar usuarios y transacciones exportados con tools/generate_dataset.py
+
+        Args:
+            directory: Directorio con users.ndjson y transactions-*.ndjson
+            batch_size: Filas por executemany
+
+        Returns:
+            Tuple[int, int]: Usuarios y transacciones importados
+        """
+        def rows(path: str, assign_id: bool):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    document = json.loads(line, object_hook=decode_extended_json)
+                    if assign_id:
+                        document["_id"] = ObjectId()
+                    yield document
+
+        def insert_all(connection: sqlite3.Connection, table: str, documents) -> int:
+            count = 0
+            batch: List[List[Any]] = []
+            sql = None
+            for document in documents:
+                if sql is None:
+                    columns = ", ".join("id" if key == "_id" else key for key in document)
+                    sql = f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({', '.join('?' for _ in document)})"
+                batch.append([_to_sql(value) for value in document.values()])
+                if len(batch) >= batch_size:
+                    connection.executemany(sql, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                connection.executemany(sql, batch)
+                count += len(batch)
+            return count
+
+        def import_all(connection: sqlite3.Connection) -> Tuple[int, int]:
+            users = 0
+            users_path = os.path.join(directory, "users.ndjson")
+            if os.path.exists(users_path):
+                users = insert_all(connection, "users", rows(users_path, False))
+            transactions = 0
+            for path in sorted(glob.glob(os.path.join(directory, "transactions-*.ndjson"))):
+                transactions += insert_all(connection, "transactions", rows(path, True))
+            # Los datasets generados antes de category_key no la traen
+            _backfill_category_keys(connection)
+            connection.execute("ANALYZE")
+            return users, transactions
+
+        return await self.write(import_all)
+
+class SQLiteTransactionOperations(BaseTransactionOperations):
+    """
+    Operaciones de transacciones sobre SQLiteStorage
+    """
+
+    def __init__(self, storage: SQLiteStorage):
+        """
+        Inicializar operaciones de transacciones
+
+        Args:
+            storage: Almacenamiento SQLite
+        """
+        self.storage = storage
+
+    @traced("transactions.create_transaction")
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        """Crear una nueva transacción"""
+        try:
+            doc = self._new_document(user_id, transaction_data)
+            doc["_id"] = ObjectId()
+
+            def insert(connection: sqlite3.Connection) -> None:
+                doc["version"] = _next_version(connection, user_id)
+                _insert(connection, "transactions", doc)
+
+            await self.storage.write(insert)
+            for key, value in doc.items():
+                if isinstance(value, datetime):
+                    doc[key] = normalize_datetime(value)
+            return self._document_to_response(doc)
+        except Exception as e:
+            logger.error(f"Error al crear transacción: {e}")
+            raise ValueError(f"Error al crear transacción: {str(e)}")
+
+    @traced("transactions.get_transaction_by_id")
+    async def get_transaction_by_id(self, transaction_id: str, user_id: str) -> Optional[TransactionResponse]:
+        """Obtener transacción por ID"""
+        try:
+            doc = await self.storage.read(
+                lambda connection: connection.execute(
+                    "SELECT * FROM transactions WHERE id = ? AND user_id = ?", [transaction_id, user_id]
+                ).fetchone()
+            )
+            return self._document_to_response(doc) if doc else None
+        except Exception as e:
+            logger.error(f"Error al obtener transacción {transaction_id}: {e}")
+            return None
+
+    def _filter_clauses(self, user_id: str, filters: Optional[TransactionFilter]) -> Tuple[List[str], List[Any]]:
+        """Condiciones WHERE (y sus parámetros) de las transacciones de un usuario con un filtro"""
+        clauses = ["user_id = ?"]
+        params: List[Any] = [user_id]
+        if filters:
+            if filters.type:
+                clauses.append("type = ?")
+                params.append(filters.type.value)
+            if filters.category:
+                key = normalize_category(filters.category)
+                if filters.category_exact:
+                    clauses.append("category_key = ?")
+                    params.append(key)
+                elif key:
+                    # Prefijo como rango: usa el índice (user_id, category_key)
+                    clauses.append("category_key >= ? AND category_key < ?")
+                    params.extend([key, _prefix_upper_bound(key)])
+            if filters.date_from:
+                clauses.append("date >= ?")
+                params.append(_to_sql(filters.date_from))
+            if filters.date_to:
+                clauses.append("date <= ?")
+                params.append(_to_sql(filters.date_to))
+            # Igual que en MongoDB: un monto 0 no filtra
+            if filters.amount_min:
+                clauses.append("amount >= ?")
+                params.append(filters.amount_min)
+            if filters.amount_max:
+                clauses.append("amount <= ?")
+                params.append(filters.amount_max)
+        return clauses, params
+
+    @traced("transactions.get_user_transactions")
+    async def get_user_transactions(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[TransactionResponse]:
+        """Obtener transacciones de un usuario con filtros y ordenamiento"""
+        try:
+            clauses, params = self._filter_clauses(user_id, filters)
+            column = _SORT_COLUMNS.get(sort.field, "date") if sort else "date"
+            order = "ASC" if sort and sort.order == "asc" else "DESC"
+            sql = (
+                f"SELECT * FROM transactions WHERE {' AND '.join(clauses)} "
+                f"ORDER BY {column} {order}, id {order} LIMIT ? OFFSET ?"
+            )
+            params.extend([limit or -1, skip])
+
+            docs = await self.storage.read(lambda connection: connection.execute(sql, params).fetchall())
+            return [self._document_to_response(doc) for doc in docs]
+        except Exception as e:
+            logger.error(f"Error al obtener transacciones del usuario {user_id}: {e}")
+            return []
+
+    @traced("transactions.get_user_transaction_fields")
+    async def get_user_transaction_fields(
+        self,
+        user_id: str,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[Dict[str, Any]]:
+        """Obtener solo algunos campos de las transacciones de un usuario (solo se leen esas columnas)"""
+        try:
+            clauses, params = self._filter_clauses(user_id, filters)
+            column = _SORT_COLUMNS.get(sort.field, "date") if sort else "date"
+            order = "ASC" if sort and sort.order == "asc" else "DESC"
+            # Los campos de TransactionResponse se llaman igual que las columnas
+            columns = ["id"] + [field for field in fields if field in TRANSACTION_FIELDS and field != "id"]
+            sql = (
+                f"SELECT {', '.join(columns)} FROM transactions "
+                f"WHERE {' AND '.join(clauses)} ORDER BY {column} {order}, id {order} LIMIT ? OFFSET ?"
+            )
+            params.extend([limit or -1, skip])
+
+            docs = await self.storage.read(lambda connection: connection.execute(sql, params).fetchall())
+            return [self._document_to_fields(doc, fields) for doc in docs]
+        except Exception as e:
+            logger.error(f"Error al obtener transacciones del usuario {user_id}: {e}")
+            return []
+
+    @traced("transactions.update_transaction")
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        """Actualizar una transacción existente"""
+        def update(connection: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            where, params = "id = ? AND user_id = ?", [transaction_id, user_id]
+            # Sin transacción no se reserva versión
+            if connection.execute(f"SELECT 1 FROM transactions WHERE {where}", params).fetchone() is None:
+                return None
+            fields = self._update_fields(update_data)
+            fields["version"] = _next_version(connection, user_id)
+            _update(connection, "transactions", where, params, fields)
+            return connection.execute(f"SELECT * FROM transactions WHERE {where}", params).fetchone()
+
+        try:
+            doc = await self.storage.write(update)
+            return self._document_to_response(doc) if doc else None
+        except Exception as e:
+            logger.error(f"Error al actualizar transacción {transaction_id}: {e}")
+            return None
+
+    @traced("transactions.delete_transaction")
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        """Eliminar una transacción"""
+        def delete(connection: sqlite3.Connection) -> bool:
+            deleted = connection.execute(
+                "DELETE FROM transactions WHERE id = ? AND user_id = ?", [transaction_id, user_id]
+            ).rowcount
+            if not deleted:
+                return False
+            # Marca para la sincronización incremental; se descartan las vencidas
+            connection.execute(
+                "DELETE FROM transaction_tombstones WHERE user_id = ? AND deleted_at < ?",
+                [user_id, _to_sql(self._tombstone_cutoff())]
+            )
+            connection.execute(
+                "INSERT INTO transaction_tombstones (user_id, transaction_id, version, deleted_at) VALUES (?, ?, ?, ?)",
+                [user_id, transaction_id, _next_version(connection, user_id), _to_sql(datetime.now())]
+            )
+            return True
+
+        try:
+            return await self.storage.write(delete)
+        except Exception as e:
+            logger.error(f"Error al eliminar transacción {transaction_id}: {e}")
+            return False
+
+    def _select_ids(
+        self,
+        connection: sqlite3.Connection,
+        user_id: str,
+        ids: Optional[List[str]],
+        filters: Optional[TransactionFilter]
+    ) -> List[str]:
+        """IDs de una operación masiva, leídos dentro de la transacción de escritura"""
+        clauses, params = self._filter_clauses(user_id, filters)
+        if ids is not None:
+            self._check_bulk_size(len(ids))
+            ids = list(dict.fromkeys(ids))
+            clauses.append(f"id IN ({', '.join('?' for _ in ids)})")
+            params.extend(ids)
+        rows = connection.execute(
+            f"SELECT id FROM transactions WHERE {' AND '.join(clauses)} LIMIT ?",
+            [*params, BULK_MAX_TRANSACTIONS + 1]
+        ).fetchall()
+        self._check_bulk_size(len(rows))
+        return [row["_id"] for row in rows]
+
+    @traced("transactions.update_transactions")
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """Aplicar los mismos cambios a varias transacciones en una sola transacción de SQLite"""
+        def update(connection: sqlite3.Connection) -> List[str]:
+            selected = self._select_ids(connection, user_id, ids, filters)
+            if not selected:
+                return []
+            fields = self._update_fields(update_data)
+            values = [_to_sql(value) for value in fields.values()]
+            assignments = ", ".join(f"{column} = ?" for column in fields)
+            first_version = _next_version(connection, user_id, len(selected)) - len(selected) + 1
+            connection.executemany(
+                f"UPDATE transactions SET {assignments}, version = ? WHERE id = ?",
+                [[*values, first_version + position, transaction_id] for position, transaction_id in enumerate(selected)]
+            )
+            return selected
+
+        return await self.storage.write(update)
+
+    @traced("transactions.delete_transactions")
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """Eliminar varias transacciones en una sola transacción de SQLite"""
+        def delete(connection: sqlite3.Connection) -> List[str]:
+            selected = self._select_ids(connection, user_id, ids, filters)
+            if not selected:
+                return []
+            connection.executemany("DELETE FROM transactions WHERE id = ?", [[transaction_id] for transaction_id in selected])
+            # Marcas para la sincronización incremental; se descartan las vencidas
+            connection.execute(
+                "DELETE FROM transaction_tombstones WHERE user_id = ? AND deleted_at < ?",
+                [user_id, _to_sql(self._tombstone_cutoff())]
+            )
+            first_version = _next_version(connection, user_id, len(selected)) - len(selected) + 1
+            deleted_at = _to_sql(datetime.now())
+            connection.executemany(
+                "INSERT INTO transaction_tombstones (user_id, transaction_id, version, deleted_at) VALUES (?, ?, ?, ?)",
+                [[user_id, transaction_id, first_version + position, deleted_at]
+                 for position, transaction_id in enumerate(selected)]
+            )
+            return selected
+
+        return await self.storage.write(delete)
+
+    @traced("transactions.get_transaction_stats")
+    async def get_transaction_stats(
+        self,
+        user_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> TransactionStats:
+        """
+        Obtener estadísticas de transacciones de un usuario
+
+        La suma y el conteo por tipo se calculan en SQL sobre el índice
+        (user_id, date, type, amount).
+        """
+        try:
+            clauses = ["user_id = ?"]
+            params: List[Any] = [user_id]
+            if date_from:
+                clauses.append("date >= ?")
+                params.append(_to_sql(date_from))
+            if date_to:
+                clauses.append("date <= ?")
+                params.append(_to_sql(date_to))
+            sql = (
+                "SELECT type, SUM(amount) AS total_amount, COUNT(*) AS count FROM transactions "
+                f"WHERE {' AND '.join(clauses)} GROUP BY type"
+            )
+            results = await self.storage.read(lambda connection: connection.execute(sql, params).fetchall())
+
+            totals = {result["type"]: result for result in results}
+            income = totals.get("income", {"total_amount": 0.0, "count": 0})
+            expense = totals.get("expense", {"total_amount": 0.0, "count": 0})
+
+            return TransactionStats(
+                total_income=income["total_amount"],
+                total_expense=expense["total_amount"],
+                balance=income["total_amount"] - expense["total_amount"],
+                transaction_count=sum(result["count"] for result in results),
+                income_count=income["count"],
+                expense_count=expense["count"],
+                period_start=date_from,
+                period_end=date_to
+            )
+        except Exception as e:
+            logger.error(f"Error al obtener estadísticas del usuario {user_id}: {e}")
+            return TransactionStats()
+
+    @traced("transactions.get_categories")
+    async def get_categories(self, user_id: str, transaction_type: Optional[str] = None) -> List[str]:
+        """Obtener categorías únicas de transacciones del usuario"""
+        try:
+            sql = "SELECT DISTINCT category FROM transactions WHERE user_id = ?"
+            params = [user_id]
+            if transaction_type:
+                sql += " AND type = ?"
+                params.append(transaction_type)
+            sql += " ORDER BY category"
+            rows = await self.storage.read(lambda connection: connection.execute(sql, params).fetchall())
+            return [row["category"] for row in rows]
+        except Exception as e:
+            logger.error(f"Error al obtener categorías del usuario {user_id}: {e}")
+            return []
+
+    @traced("transactions.get_category_totals")
+    async def get_category_totals(
+        self,
+        user_id: str,
+        transaction_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[CategoryTotal]:
+        """Obtener la suma y el conteo por categoría (GROUP BY en SQL)"""
+        try:
+            clauses = ["user_id = ?"]
+            params: List[Any] = [user_id]
+            if transaction_type:
+                clauses.append("type = ?")
+                params.append(transaction_type)
+            if date_from:
+                clauses.append("date >= ?")
+                params.append(_to_sql(date_from))
+            if date_to:
+                clauses.append("date <= ?")
+                params.append(_to_sql(date_to))
+            sql = (
+                "SELECT category, SUM(amount) AS total, COUNT(*) AS count FROM transactions "
+                f"WHERE {' AND '.join(clauses)} GROUP BY category ORDER BY total DESC, category"
+            )
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+            rows = await self.storage.read(lambda connection: connection.execute(sql, params).fetchall())
+            return [CategoryTotal(category=row["category"], total=row["total"], count=row["count"]) for row in rows]
+        except Exception as e:
+            logger.error(f"Error al obtener totales por categoría del usuario {user_id}: {e}")
+            return []
+
+    @traced("transactions.get_version")
+    async def get_version(self, user_id: str) -> int:
+        """Obtener la versión de datos del usuario"""
+        row = await self.storage.read(
+            lambda connection: connection.execute(
+                "SELECT version FROM sync_versions WHERE user_id = ?", [user_id]
+            ).fetchone()
+        )
+        return row["version"] if row else 0
+
+    @traced("transactions.get_changes")
+    async def get_changes(
+        self,
+        user_id: str,
+        since: Optional[int],
+        limit: int = 500,
+        after: Optional[str] = None
+    ) -> TransactionChanges:
+        """Obtener los cambios de transacciones del usuario desde una versión"""
+        def changes(connection: sqlite3.Connection) -> TransactionChanges:
+            # Una transacción de lectura: versión y cambios de la misma instantánea
+            connection.execute("BEGIN")
+            try:
+                row = connection.execute("SELECT version FROM sync_versions WHERE user_id = ?", [user_id]).fetchone()
+                current = row["version"] if row else 0
+
+                if since is None or since > current or after is not None:
+                    # Recarga completa por páginas en orden de ID
+                    start_after = after if since is not None and since <= current else None
+                    documents = connection.execute(
+                        "SELECT * FROM transactions WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                        [user_id, start_after or "", limit + 1]
+                    ).fetchall()
+                    return self._reset_page(
+                        documents, since if start_after else current, limit, first_page=not start_after
+                    )
+
+                documents = connection.execute(
+                    "SELECT * FROM transactions WHERE user_id = ? AND version > ? ORDER BY version LIMIT ?",
+                    [user_id, since, limit + 1]
+                ).fetchall()
+                tombstones = connection.execute(
+                    "SELECT version, transaction_id FROM transaction_tombstones "
+                    "WHERE user_id = ? AND version > ? ORDER BY version LIMIT ?",
+                    [user_id, since, limit + 1]
+                ).fetchall()
+                return self._merge_changes(
+                    documents, [(row["version"], row["transaction_id"]) for row in tombstones], current, limit
+                )
+            finally:
+                connection.execute("COMMIT")
+
+        return await self.storage.read(changes)
+
+class SQLiteUserOperations(BaseUserOperations):
+    """
+    Operaciones de usuarios sobre SQLiteStorage
+    """
+
+    def __init__(self, storage: SQLiteStorage):
+        """
+        Inicializar operaciones de usuario
+
+        Args:
+            storage: Almacenamiento SQLite
+        """
+        self.storage = storage
+        self.database = storage
+
+    async def _find_one(self, where: str, params: List[Any]) -> Optional[Dict[str, Any]]:
+        return await self.storage.read(
+            lambda connection: connection.execute(f"SELECT * FROM users WHERE {where}", params).fetchone()
+        )
+
+    async def _update(self, where: str, params: List[Any], fields: Dict[str, Any]) -> bool:
+        """Actualizar usuarios (True si algún valor cambió)"""
+        return await self.storage.write(_update, "users", where, params, fields, True) > 0
+
+    async def create_user(self, user_data: UserCreate) -> UserResponse:
+        """Crear un nuevo usuario (inactivo hasta verificar el correo)"""
+        if await self._find_one("email = ?", [user_data.email]):
+            raise ValueError("El correo electrónico ya está registrado")
+
+        hashed_password = await asyncio.to_thread(self._hash_password, user_data.password)
+
+        user_doc = {
+            "_id": ObjectId(),
+            "first_name": user_data.first_name,
+            "last_name": user_data.last_name,
+            "email": user_data.email,
+            "password": hashed_password,
+            "initial_budget": user_data.initial_budget,
+            "budget_period": user_data.budget_period,
+            "budget_configured": False,
+            "registration_date": datetime.now(),
+            "is_active": False,
+            "email_verified": False,
+            "last_access": None,
+            "currency": user_data.currency,
+            "timezone": user_data.timezone
+        }
+        try:
+            await self.storage.write(_insert, "users", user_doc)
+        except sqlite3.IntegrityError:
+            # Otro registro con el mismo correo se completó mientras se encriptaba
+            raise ValueError("El correo electrónico ya está registrado")
+
+        user_doc["registration_date"] = normalize_datetime(user_doc["registration_date"])
+        return self._user_doc_to_response(user_doc)
+
+    async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
+        """Obtener usuario activo por correo electrónico"""
+        user_doc = await self._find_one("email = ? AND is_active = 1", [email])
+        return self._user_doc_to_response(user_doc) if user_doc else None
+
+    async def get_user_by_email_any_status(self, email: str) -> Optional[UserResponse]:
+        """Obtener usuario por correo electrónico (cualquier estado)"""
+        user_doc = await self._find_one("email = ?", [email])
+        return self._user_doc_to_response(user_doc) if user_doc else None
+
+    async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
+        """Obtener usuario activo por ID"""
+        user_doc = await self._find_one("id = ? AND is_active = 1", [user_id])
+        return self._user_doc_to_response(user_doc) if user_doc else None
+
+    async def authenticate_user(self, login_data: UserLogin) -> Optional[UserResponse]:
+        """Autenticar usuario con correo y contraseña"""
+        user_doc = await self._find_one("email = ? AND is_active = 1", [login_data.email])
+        if not user_doc:
+            return None
+
+        password_valid = await asyncio.to_thread(
+            self._verify_password, login_data.password, user_doc["password"]
+        )
+        if not password_valid:
+            return None
+
+        await self._update("id = ?", [str(user_doc["_id"])], {"last_access": datetime.now()})
+        return self._user_doc_to_response(user_doc)
+
+    async def update_budget(self, user_id: str, budget_data: BudgetUpdate) -> Optional[UserResponse]:
+        """Actualizar presupuesto del usuario"""
+        try:
+            modified = await self._update("id = ? AND is_active = 1", [user_id], {
+                "initial_budget": budget_data.initial_budget,
+                "budget_period": budget_data.budget_period,
+                "budget_configured": True
+            })
+            return await self.get_user_by_id(user_id) if modified else None
+        except Exception:
+            return None
+
+    async def deactivate_user(self, user_id: str) -> bool:
+        """Desactivar usuario (soft delete)"""
+        try:
+            return await self._update("id = ?", [user_id], {"is_active": False})
+        except Exception:
+            return False
+
+    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
+        """Obtener los usuarios activos (con paginación)"""
+        user_docs = await self.storage.read(
+            lambda connection: connection.execute(
+                "SELECT * FROM users WHERE is_active = 1 ORDER BY rowid LIMIT ? OFFSET ?", [limit or -1, skip]
+            ).fetchall()
+        )
+        return [self._user_doc_to_response(user_doc) for user_doc in user_docs]
+
+    async def activate_user_account(self, email: str) -> bool:
+        """Activar cuenta de usuario después de verificar email"""
+        try:
+            return await self._update("email = ?", [email], {
+                "is_active": True,
+                "email_verified": True,
+                "verification_date": datetime.now()
+            })
+        except Exception:
+            return False
+
+    async def update_password(self, email: str, new_password: str) -> bool:
+        """Actualizar contraseña del usuario y activar la cuenta"""
+        try:
+            hashed_password = await asyncio.to_thread(self._hash_password, new_password)
+            return await self._update("email = ?", [email], {
+                "password": hashed_password,
+                "password_updated": datetime.now(),
+                "is_active": True,
+                "email_verified": True
+            })
+        except Exception:
+            logger.exception(f"Error al actualizar la contraseña de {email}")
+            return False
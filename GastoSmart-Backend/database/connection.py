@@ -2,6 +2,12 @@ from motor.motor_asyncio import AsyncIOMotorClient #Cliente asíncrono para Fast
 from pymongo import MongoClient #Cliente síncrono para operaciones que lo requieran
 import os #Para obtener las variables de entorno
 from dotenv import load_dotenv #Para cargar las variables de entorno
+import asyncio #Para abrir las conexiones del pool en paralelo
+import logging #Registro de eventos de la conexión
+from database.monitoring import get_event_listeners #Métricas de comandos y del pool
+from database.slow_queries import slow_query_recorder, SLOW_QUERY_LOG_ENABLED #Registro de consultas lentas
+
+logger = logging.getLogger(__name__)
 
 #SINCRONICO: una cosa a la vez
 #ASINCRONICO: varias cosas a la vez
@@ -13,6 +19,10 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "gastosmart")
 
+# Tamaño del pool de conexiones por proceso
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "4"))
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+
 # Cliente asíncrono para FastAPI
 async_client = None
 
@@ -23,20 +33,39 @@ async def connect_to_mongo():
     """Conectar a MongoDB"""
     global async_client, sync_client
     try:
-        async_client = AsyncIOMotorClient(MONGODB_URL)
-        sync_client = MongoClient(MONGODB_URL)
+        listeners = get_event_listeners()
+        if SLOW_QUERY_LOG_ENABLED:
+            listeners.append(slow_query_recorder)
+        
+        async_client = AsyncIOMotorClient(
+            MONGODB_URL,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            event_listeners=listeners
+        )
+        sync_client = MongoClient(MONGODB_URL, event_listeners=get_event_listeners())
+        
+        # Los explain de consultas lentas se ejecutan con el cliente síncrono
+        if SLOW_QUERY_LOG_ENABLED:
+            slow_query_recorder.start(sync_client)
         
         # Verificar conexión
         await async_client.admin.command('ping')
-        print(f"✅ Conectado a MongoDB: {DATABASE_NAME}")
+        
+        # Calentar el pool: abrir las conexiones mínimas antes de recibir tráfico
+        await asyncio.gather(*[
+            async_client.admin.command('ping') for _ in range(MONGODB_MIN_POOL_SIZE)
+        ])
+        logger.info(f"Conectado a MongoDB: {DATABASE_NAME}")
         
     except Exception as e:
-        print(f"❌ Error conectando a MongoDB: {e}")
+        logger.error(f"Error conectando a MongoDB: {e}")
         raise e
 
 async def close_mongo_connection():
     """Cerrar conexión a MongoDB"""
     global async_client, sync_client
+    slow_query_recorder.stop()
     if async_client:
         async_client.close()
     if sync_client:
@@ -0,0 +1,68 @@
+"""
+Índices de MongoDB para GastoSmart
+
+Este archivo define los índices que necesitan las consultas de la
+aplicación y los verifica al iniciar cada proceso del servidor.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# Índices requeridos por colección: (nombre, claves)
+REQUIRED_INDEXES: Dict[str, List[Tuple[str, List[Tuple[str, int]]]]] = {
+    "transactions": [
+        # Listado por defecto y filtros de fecha: user_id + date descendente.
+        # Incluye los campos del listado para que las consultas con fields=
+        # (id, date, type, amount, category) se resuelvan solo con el índice;
+        # reemplaza al antiguo user_date (user_id, date), que queda cubierto
+        ("user_date_fields", [("user_id", 1), ("date", -1), ("type", 1), ("amount", 1), ("category", 1), ("_id", 1)]),
+        # Filtros por tipo (ingresos/gastos) y estadísticas
+        ("user_type_date", [("user_id", 1), ("type", 1), ("date", -1)]),
+        # Categorías del usuario
+        ("user_category", [("user_id", 1), ("category", 1)]),
+        # Filtro por categoría exacta o por prefijo (clave normalizada)
+        ("user_category_key", [("user_id", 1), ("category_key", 1)]),
+        # Sincronización incremental: cambios desde una versión
+        ("user_version", [("user_id", 1), ("version", 1)])
+    ],
+    "transaction_tombstones": [
+        ("user_version", [("user_id", 1), ("version", 1)])
+    ],
+    "users": [
+        ("email", [("email", 1)])
+    ],
+    "verification_codes": [
+        ("email_purpose_created", [("email", 1), ("purpose", 1), ("created_at", -1)])
+    ]
+}
+
+async def ensure_indexes(database: AsyncIOMotorDatabase) -> List[str]:
+    """
+    Verificar que existan los índices requeridos y crear los que falten
+
+    Args:
+        database: Base de datos MongoDB
+
+    Returns:
+        List[str]: Nombres de los índices creados
+    """
+    created = []
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        collection = database[collection_name]
+        try:
+            existing = await collection.index_information()
+            existing_keys = [tuple(info["key"]) for info in existing.values()]
+            for name, keys in indexes:
+                if tuple(keys) in existing_keys:
+                    continue
+                await collection.create_index(keys, name=name, background=True)
+                created.append(f"{collection_name}.{name}")
+        except Exception as e:
+            # Un índice faltante degrada el rendimiento pero no impide arrancar
+            logger.warning(f"No se pudieron verificar los índices de {collection_name}: {e}")
+    if created:
+        logger.info(f"Índices creados: {', '.join(created)}")
+    return created
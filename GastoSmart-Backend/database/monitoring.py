@@ -0,0 +1,183 @@
+"""
+Monitoreo de Comandos de MongoDB para GastoSmart
+
+Este archivo define los listeners de pymongo que registran la duración
+de cada comando por colección y tipo de comando, los comandos en vuelo y
+los contadores del pool de conexiones. Los listeners se ejecutan en el
+hilo que hace la operación, por eso solo hacen trabajo mínimo.
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+from pymongo import monitoring
+
+from services.metrics import registry
+from services.tracing import TRACING_ENABLED, current_trace, record_span
+
+mongo_command_duration = registry.histogram(
+    "gastosmart_mongo_command_duration_seconds",
+    "Duración de los comandos de MongoDB por colección y comando",
+    ("collection", "command")
+)
+mongo_command_failures = registry.counter(
+    "gastosmart_mongo_command_failures",
+    "Comandos de MongoDB que terminaron con error",
+    ("collection", "command")
+)
+mongo_commands_in_flight = registry.gauge(
+    "gastosmart_mongo_commands_in_flight",
+    "Comandos de MongoDB en curso"
+)
+mongo_pool_checked_out = registry.gauge(
+    "gastosmart_mongo_pool_checked_out_connections",
+    "Conexiones del pool de MongoDB en uso"
+)
+mongo_pool_connections_created = registry.counter(
+    "gastosmart_mongo_pool_connections_created",
+    "Conexiones abiertas por el pool de MongoDB"
+)
+mongo_pool_checkout_failures = registry.counter(
+    "gastosmart_mongo_pool_checkout_failures",
+    "Intentos fallidos de obtener una conexión del pool",
+    ("reason",)
+)
+
+# Comandos cuyo primer valor es el nombre de la colección
+_COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count", "distinct",
+    "findAndModify", "createIndexes", "listIndexes", "getMore"
+}
+
+def command_collection(command_name: str, command: dict) -> str:
+    """
+    Obtener la colección a la que va dirigido un comando
+
+    Args:
+        command_name: Nombre del comando
+        command: Documento del comando
+
+    Returns:
+        str: Nombre de la colección o "-" si no aplica
+    """
+    if command_name == "getMore":
+        return command.get("collection", "-")
+    if command_name in _COLLECTION_COMMANDS:
+        value = command.get(command_name)
+        if isinstance(value, str):
+            return value
+    return "-"
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Listener que registra la duración de los comandos de MongoDB
+    """
+
+    def __init__(self):
+        # (request_id, connection_id) -> (colección, comando)
+        self._pending: Dict[Tuple[int, tuple], Tuple[str, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._pending[(event.request_id, event.connection_id)] = (
+            command_collection(event.command_name, event.command),
+            event.command_name
+        )
+        mongo_commands_in_flight.inc()
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        labels = self._pending.pop((event.request_id, event.connection_id), ("-", event.command_name))
+        mongo_commands_in_flight.dec()
+        mongo_command_duration.observe(event.duration_micros / 1_000_000, labels)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        labels = self._pending.pop((event.request_id, event.connection_id), ("-", event.command_name))
+        mongo_commands_in_flight.dec()
+        mongo_command_duration.observe(event.duration_micros / 1_000_000, labels)
+        mongo_command_failures.inc(1, labels)
+
+class TracingCommandListener(monitoring.CommandListener):
+    """
+    Listener que registra cada comando de MongoDB como span de la traza
+
+    Motor ejecuta el driver en hilos con una copia del contexto de la
+    corrutina que llamó, así que el span actual sigue disponible aquí.
+    """
+
+    def __init__(self):
+        # (request_id, connection_id) -> colección, solo para comandos dentro de una traza
+        self._pending: Dict[Tuple[int, tuple], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if current_trace() is not None:
+            self._pending[(event.request_id, event.connection_id)] = command_collection(
+                event.command_name, event.command
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, error=str(event.failure.get("codeName", "error")))
+
+    def _record(self, event, error: Optional[str] = None) -> None:
+        collection = self._pending.pop((event.request_id, event.connection_id), None)
+        if collection is None:
+            return
+        end = time.perf_counter()
+        recorded = record_span(
+            f"mongo {event.command_name}",
+            end - event.duration_micros / 1_000_000,
+            end,
+            collection=collection
+        )
+        if recorded is not None:
+            recorded.error = error
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Listener que registra los contadores del pool de conexiones
+    """
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        mongo_pool_connections_created.inc()
+
+    def connection_check_out_failed(self, event) -> None:
+        mongo_pool_checkout_failures.inc(1, (str(event.reason),))
+
+    def connection_checked_out(self, event) -> None:
+        mongo_pool_checked_out.inc()
+
+    def connection_checked_in(self, event) -> None:
+        mongo_pool_checked_out.dec()
+
+def get_event_listeners() -> list:
+    """
+    Obtener los listeners a registrar en los clientes de MongoDB
+
+    Returns:
+        list: Listeners de comandos y del pool
+    """
+    listeners = [CommandMetricsListener(), PoolMetricsListener()]
+    if TRACING_ENABLED:
+        listeners.append(TracingCommandListener())
+    return listeners
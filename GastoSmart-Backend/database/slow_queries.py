@@ -0,0 +1,251 @@
+"""
+Registro de Consultas Lentas para GastoSmart
+
+Este archivo define un listener de pymongo que detecta los comandos que
+superan un umbral de duración, normaliza su "forma" (los campos y
+operadores usados, sin los valores) y guarda una muestra en un archivo
+local. La primera vez que aparece cada forma se captura su plan con
+explain("executionStats") en un hilo de fondo, para que el listener no
+bloquee la operación que lo disparó.
+
+El resumen y las sugerencias de índices se obtienen con:
+    python -m tools.slow_queries report
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import MongoClient, monitoring
+
+logger = logging.getLogger(__name__)
+
+# Configuración del registro (variables de entorno)
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+SLOW_QUERY_DIR = os.getenv("SLOW_QUERY_DIR", "slow_queries")
+
+# Archivos dentro del directorio del registro
+SAMPLES_FILE = "samples.jsonl"
+EXPLAINS_DIR = "explains"
+
+# Comandos de lectura/escritura cuyo plan se puede analizar
+_TRACKED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Campos que agrega el driver y que no forman parte de la consulta
+_DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "apiVersion", "$audit"}
+
+# Operadores de rango (van al final de un índice según la regla ESR)
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists", "$not"}
+
+def _placeholder(value: Any) -> str:
+    """Reemplazar un valor por el nombre de su tipo"""
+    if isinstance(value, bool):
+        return "<bool>"
+    if isinstance(value, (int, float)):
+        return "<number>"
+    if isinstance(value, str):
+        return "<str>"
+    if isinstance(value, datetime):
+        return "<date>"
+    if isinstance(value, ObjectId):
+        return "<objectid>"
+    if isinstance(value, re.Pattern):
+        return "<regex>"
+    if value is None:
+        return "<null>"
+    return f"<{type(value).__name__}>"
+
+def normalize_value(value: Any) -> Any:
+    """
+    Normalizar un filtro o etapa de agregación quitando los valores
+
+    Args:
+        value: Documento, lista o valor a normalizar
+
+    Returns:
+        Any: Estructura con los mismos campos y operadores, sin valores
+    """
+    if isinstance(value, dict):
+        normalized = {}
+        for key in sorted(value):
+            if key == "$options":
+                continue
+            if key in ("$in", "$nin", "$all") and isinstance(value[key], list):
+                normalized[key] = "<list>"
+            else:
+                normalized[key] = normalize_value(value[key])
+        return normalized
+    if isinstance(value, list):
+        return [normalize_value(item) for item in value]
+    return _placeholder(value)
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Obtener la forma normalizada de un comando
+
+    Args:
+        command_name: Nombre del comando (find, aggregate, ...)
+        command: Documento del comando
+
+    Returns:
+        Dict[str, Any]: Colección, comando, filtro, orden y proyección normalizados
+    """
+    shape: Dict[str, Any] = {"collection": command.get(command_name), "command": command_name}
+    if command_name in ("find", "count", "distinct"):
+        shape["filter"] = normalize_value(command.get("filter") or command.get("query") or {})
+        if command.get("sort"):
+            # El orden de los campos de ordenamiento sí importa
+            shape["sort"] = [[field, direction] for field, direction in command["sort"].items()]
+        if command.get("projection"):
+            shape["projection"] = sorted(command["projection"])
+        if command_name == "distinct":
+            shape["key"] = command.get("key")
+    elif command_name == "aggregate":
+        shape["pipeline"] = normalize_value(command.get("pipeline", []))
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        shape["filter"] = normalize_value(statements[0].get("q", {}))
+    elif command_name == "findAndModify":
+        shape["filter"] = normalize_value(command.get("query", {}))
+        if command.get("sort"):
+            shape["sort"] = [[field, direction] for field, direction in command["sort"].items()]
+    return shape
+
+def shape_id(shape: Dict[str, Any]) -> str:
+    """Identificador estable de una forma de consulta"""
+    encoded = json.dumps(shape, sort_keys=False, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """
+    Listener que registra los comandos lentos y captura sus planes
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        sample_rate: float = SLOW_QUERY_SAMPLE_RATE,
+        directory: str = SLOW_QUERY_DIR
+    ):
+        """
+        Inicializar el registro de consultas lentas
+
+        Args:
+            threshold_ms: Duración mínima (ms) para considerar lento un comando
+            sample_rate: Fracción de comandos lentos que se guardan (0 a 1)
+            directory: Directorio local donde se guardan muestras y planes
+        """
+        self.threshold_micros = threshold_ms * 1000
+        self.sample_rate = sample_rate
+        self.directory = directory
+
+        # (request_id, connection_id) -> (base de datos, comando)
+        self._pending: Dict[Tuple[int, tuple], Tuple[str, Dict[str, Any]]] = {}
+        self._explained = set()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=10000)
+        self._client: Optional[MongoClient] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, client: MongoClient) -> None:
+        """
+        Iniciar el hilo que escribe muestras y ejecuta los explain
+
+        Args:
+            client: Cliente síncrono de MongoDB para ejecutar explain
+        """
+        self._client = client
+        os.makedirs(os.path.join(self.directory, EXPLAINS_DIR), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="slow-query-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detener el hilo de fondo después de procesar lo pendiente"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in _TRACKED_COMMANDS:
+            self._pending[(event.request_id, event.connection_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is None or event.duration_micros < self.threshold_micros:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        database_name, command = pending
+        try:
+            self._queue.put_nowait({
+                "database": database_name,
+                "command_name": event.command_name,
+                "command": command,
+                "duration_ms": event.duration_micros / 1000,
+                "timestamp": time.time()
+            })
+        except queue.Full:
+            pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._pending.pop((event.request_id, event.connection_id), None)
+
+    def _run(self) -> None:
+        """Procesar las muestras en segundo plano"""
+        samples_path = os.path.join(self.directory, SAMPLES_FILE)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                shape = command_shape(item["command_name"], item["command"])
+                sid = shape_id(shape)
+                record = {
+                    "shape_id": sid,
+                    "shape": shape,
+                    "duration_ms": round(item["duration_ms"], 3),
+                    "timestamp": item["timestamp"]
+                }
+                with open(samples_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+                self._explain_once(sid, item)
+            except Exception as e:
+                logger.warning(f"No se pudo registrar la consulta lenta: {e}")
+
+    def _explain_once(self, sid: str, item: Dict[str, Any]) -> None:
+        """Capturar el plan de ejecución de una forma la primera vez que aparece"""
+        with self._lock:
+            if sid in self._explained:
+                return
+            self._explained.add(sid)
+
+        explain_path = os.path.join(self.directory, EXPLAINS_DIR, f"{sid}.json")
+        if os.path.exists(explain_path) or self._client is None:
+            return
+
+        command = {k: v for k, v in item["command"].items() if k not in _DRIVER_FIELDS}
+        plan = self._client[item["database"]].command(
+            {"explain": command, "verbosity": "executionStats"}
+        )
+        with open(explain_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "shape_id": sid,
+                "shape": command_shape(item["command_name"], item["command"]),
+                "captured_at": datetime.now().isoformat(),
+                "explain": plan
+            }, f, default=str, indent=2)
+
+# Instancia compartida por los clientes de MongoDB
+slow_query_recorder = SlowQueryRecorder()
@@ -0,0 +1,16 @@
+"""
+Almacenamiento Configurado
+
+Instancia única del backend elegido con STORAGE_BACKEND ('mongo' por
+defecto, 'memory' o 'sqlite'). main.py lo conecta al iniciar y los
+routers obtienen de aquí sus operaciones.
+"""
+
+import os
+
+from database.backends import create_storage
+
+# Backend de almacenamiento
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+
+storage = create_storage(STORAGE_BACKEND)
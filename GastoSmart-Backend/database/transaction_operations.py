@@ -5,21 +5,33 @@ Este archivo contiene todas las operaciones de base de datos relacionadas
 con las transacciones financieras en GastoSmart.
 """
 
-from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorCollection
 from models.transaction import (
     Transaction, TransactionCreate, TransactionResponse, 
-    TransactionUpdate, TransactionFilter, TransactionSort, TransactionStats
+    TransactionUpdate, TransactionFilter, TransactionSort, TransactionStats, CategoryTotal,
+    TransactionChanges, normalize_category
 )
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 import logging
+import os
+import re
+import time
+from services.tracing import record_span, span, traced
+from database.backends.base import BaseTransactionOperations, BULK_MAX_TRANSACTIONS
 
 logger = logging.getLogger(__name__)
 
-class TransactionOperations:
+# Una versión reservada por una escritura que no termina en este tiempo
+# (proceso caído a mitad de la escritura) deja de frenar los tokens de sincronización
+SYNC_PENDING_TIMEOUT_S = float(os.getenv("SYNC_PENDING_TIMEOUT_S", "30"))
+
+class TransactionOperations(BaseTransactionOperations):
     """
-    Clase para manejar operaciones de base de datos de transacciones
+    Clase para manejar operaciones de base de datos de transacciones en MongoDB
     """
     
     def __init__(self, collection: AsyncIOMotorCollection):
@@ -31,6 +43,143 @@ class TransactionOperations:
         """
         self.collection = collection
     
+    @property
+    def versions(self) -> AsyncIOMotorCollection:
+        """Versión de sincronización por usuario"""
+        return self.collection.database.sync_versions
+    
+    @property
+    def tombstones(self) -> AsyncIOMotorCollection:
+        """Marcas de transacciones eliminadas para la sincronización"""
+        return self.collection.database.transaction_tombstones
+    
+    def _build_query(self, user_id: str, filters: Optional[TransactionFilter] = None) -> Dict[str, Any]:
+        """
+        Construir el filtro de MongoDB de las transacciones de un usuario
+        
+        Args:
+            user_id: ID del usuario
+            filters: Filtros a aplicar
+            
+        Returns:
+            Dict[str, Any]: Consulta para find/update/delete
+        """
+        query = {"user_id": user_id}
+        
+        if filters:
+            if filters.type:
+                query["type"] = filters.type.value
+            if filters.category:
+                key = normalize_category(filters.category)
+                if filters.category_exact:
+                    query["category_key"] = key
+                else:
+                    # Prefijo anclado y sin opciones: se resuelve como rango del índice user_category_key
+                    query["category_key"] = {"$regex": f"^{re.escape(key)}"}
+            if filters.date_from or filters.date_to:
+                date_filter = {}
+                if filters.date_from:
+                    date_filter["$gte"] = filters.date_from
+                if filters.date_to:
+                    date_filter["$lte"] = filters.date_to
+                query["date"] = date_filter
+            if filters.amount_min or filters.amount_max:
+                amount_filter = {}
+                if filters.amount_min:
+                    amount_filter["$gte"] = filters.amount_min
+                if filters.amount_max:
+                    amount_filter["$lte"] = filters.amount_max
+                query["amount"] = amount_filter
+        
+        return query
+    
+    def _sort_criteria(self, sort: Optional[TransactionSort] = None) -> List[Tuple[str, int]]:
+        """
+        Construir el ordenamiento de MongoDB de un listado
+        
+        Args:
+            sort: Criterios de ordenamiento
+            
+        Returns:
+            List[Tuple[str, int]]: Campos y dirección para sort()
+        """
+        if not sort:
+            # Ordenamiento por defecto: fecha descendente
+            return [("date", -1)]
+        field_mapping = {
+            "date": "date",
+            "amount": "amount",
+            "category": "category",
+            "created_at": "created_at"
+        }
+        sort_field = field_mapping.get(sort.field, "date")
+        sort_order = 1 if sort.order == "asc" else -1
+        return [(sort_field, sort_order)]
+    
+    @asynccontextmanager
+    async def _reserve_versions(self, user_id: str, count: int = 1) -> AsyncIterator[int]:
+        """
+        Reservar versiones de sincronización para una escritura
+        
+        La versión no se asigna en la misma operación que la escritura, así
+        que una escritura con versión menor puede terminar después que otra
+        con versión mayor. Por eso la reserva queda pendiente en el contador
+        del usuario hasta que la escritura termina (aunque falle) y
+        _committed_version no pasa de la primera versión pendiente.
+        
+        Args:
+            user_id: ID del usuario
+            count: Versiones a reservar (escrituras masivas)
+            
+        Yields:
+            int: Primera versión reservada (las demás son consecutivas)
+        """
+        counter = await self.versions.find_one_and_update(
+            {"_id": user_id},
+            [
+                {"$set": {"version": {"$add": [{"$ifNull": ["$version", 0]}, count]}}},
+                {"$set": {"pending": {"$concatArrays": [
+                    {"$ifNull": ["$pending", []]},
+                    [{"version": {"$subtract": ["$version", count - 1]}, "at": datetime.now()}]
+                ]}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        first_version = counter["version"] - count + 1
+        try:
+            yield first_version
+        finally:
+            # También se descartan las reservas vencidas que hayan quedado
+            await self.versions.update_one(
+                {"_id": user_id},
+                {"$pull": {"pending": {"$or": [
+                    {"version": first_version},
+                    {"at": {"$lt": self._pending_cutoff()}}
+                ]}}}
+            )
+    
+    def _pending_cutoff(self) -> datetime:
+        """Fecha antes de la cual una reserva de versiones se considera abandonada"""
+        return datetime.now() - timedelta(seconds=SYNC_PENDING_TIMEOUT_S)
+    
+    def _committed_version(self, counter: Optional[Dict[str, Any]]) -> int:
+        """
+        Versión hasta la que todas las escrituras del usuario terminaron
+        
+        Args:
+            counter: Documento de sync_versions del usuario
+            
+        Returns:
+            int: Versión anterior a la primera reserva pendiente, o la versión actual
+        """
+        if not counter:
+            return 0
+        cutoff = self._pending_cutoff()
+        pending = [entry["version"] for entry in counter.get("pending", []) if entry["at"] >= cutoff]
+        return min(pending) - 1 if pending else counter["version"]
+    
+    @traced("transactions.create_transaction")
     async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
         """
         Crear una nueva transacción
@@ -47,20 +196,12 @@ class TransactionOperations:
         """
         try:
             # Crear documento de transacción
-            transaction_doc = {
-                "user_id": user_id,
-                "type": transaction_data.type.value,
-                "amount": transaction_data.amount,
-                "category": transaction_data.category,
-                "description": transaction_data.description,
-                "date": transaction_data.date,
-                "currency": transaction_data.currency,
-                "created_at": datetime.now(),
-                "updated_at": None
-            }
+            transaction_doc = self._new_document(user_id, transaction_data)
             
             # Insertar en la base de datos
-            result = await self.collection.insert_one(transaction_doc)
+            async with self._reserve_versions(user_id) as version:
+                transaction_doc["version"] = version
+                result = await self.collection.insert_one(transaction_doc)
             
             # Obtener la transacción creada
             created_transaction = await self.collection.find_one({"_id": result.inserted_id})
@@ -71,6 +212,7 @@ class TransactionOperations:
             logger.error(f"Error al crear transacción: {e}")
             raise ValueError(f"Error al crear transacción: {str(e)}")
     
+    @traced("transactions.get_transaction_by_id")
     async def get_transaction_by_id(self, transaction_id: str, user_id: str) -> Optional[TransactionResponse]:
         """
         Obtener transacción por ID
@@ -94,6 +236,7 @@ class TransactionOperations:
             logger.error(f"Error al obtener transacción {transaction_id}: {e}")
             return None
     
+    @traced("transactions.get_user_transactions")
     async def get_user_transactions(
         self, 
         user_id: str, 
@@ -117,57 +260,73 @@ class TransactionOperations:
         """
         try:
             # Construir filtro de consulta
-            query = {"user_id": user_id}
-            
-            if filters:
-                if filters.type:
-                    query["type"] = filters.type.value
-                if filters.category:
-                    query["category"] = {"$regex": filters.category, "$options": "i"}
-                if filters.date_from or filters.date_to:
-                    date_filter = {}
-                    if filters.date_from:
-                        date_filter["$gte"] = filters.date_from
-                    if filters.date_to:
-                        date_filter["$lte"] = filters.date_to
-                    query["date"] = date_filter
-                if filters.amount_min or filters.amount_max:
-                    amount_filter = {}
-                    if filters.amount_min:
-                        amount_filter["$gte"] = filters.amount_min
-                    if filters.amount_max:
-                        amount_filter["$lte"] = filters.amount_max
-                    query["amount"] = amount_filter
+            build_start = time.perf_counter()
+            query = self._build_query(user_id, filters)
             
             # Construir ordenamiento
-            sort_criteria = []
-            if sort:
-                field_mapping = {
-                    "date": "date",
-                    "amount": "amount",
-                    "category": "category",
-                    "created_at": "created_at"
-                }
-                sort_field = field_mapping.get(sort.field, "date")
-                sort_order = 1 if sort.order == "asc" else -1
-                sort_criteria.append((sort_field, sort_order))
-            else:
-                # Ordenamiento por defecto: fecha descendente
-                sort_criteria.append(("date", -1))
+            sort_criteria = self._sort_criteria(sort)
+            record_span("transactions.build_query", build_start, time.perf_counter())
             
             # Ejecutar consulta
-            cursor = self.collection.find(query).sort(sort_criteria).skip(skip).limit(limit)
-            transactions = []
+            with span("transactions.cursor", limit=limit) as cursor_span:
+                cursor = self.collection.find(query).sort(sort_criteria).skip(skip).limit(limit)
+                docs = [doc async for doc in cursor]
+                if cursor_span:
+                    cursor_span.set(documents=len(docs))
+            
+            with span("transactions.to_response"):
+                return [self._document_to_response(doc) for doc in docs]
+            
+        except Exception as e:
+            logger.error(f"Error al obtener transacciones del usuario {user_id}: {e}")
+            return []
+    
+    @traced("transactions.get_user_transaction_fields")
+    async def get_user_transaction_fields(
+        self,
+        user_id: str,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtener solo algunos campos de las transacciones de un usuario
+        
+        La proyección se envía a MongoDB: con los campos del listado (id,
+        date, type, amount, category) y el orden por fecha, la consulta se
+        resuelve con el índice user_date_fields sin leer los documentos.
+        
+        Args:
+            user_id: ID del usuario
+            fields: Campos de TransactionResponse a devolver
+            skip: Número de transacciones a saltar
+            limit: Límite de transacciones a devolver
+            filters: Filtros a aplicar
+            sort: Criterios de ordenamiento
+            
+        Returns:
+            List[Dict[str, Any]]: Transacciones con los campos pedidos, listas para JSON
+        """
+        try:
+            query = self._build_query(user_id, filters)
+            projection = {"_id": 1, **{field: 1 for field in fields if field != "id"}}
             
-            async for doc in cursor:
-                transactions.append(self._document_to_response(doc))
+            with span("transactions.cursor", limit=limit) as cursor_span:
+                cursor = self.collection.find(query, projection).sort(self._sort_criteria(sort)).skip(skip).limit(limit)
+                docs = [doc async for doc in cursor]
+                if cursor_span:
+                    cursor_span.set(documents=len(docs))
             
-            return transactions
+            with span("transactions.to_fields"):
+                return [self._document_to_fields(doc, fields) for doc in docs]
             
         except Exception as e:
             logger.error(f"Error al obtener transacciones del usuario {user_id}: {e}")
             return []
     
+    @traced("transactions.update_transaction")
     async def update_transaction(
         self, 
         transaction_id: str, 
@@ -186,34 +345,28 @@ class TransactionOperations:
             TransactionResponse: Transacción actualizada o None
         """
         try:
-            # Construir documento de actualización
-            update_doc = {}
-            
-            if update_data.amount is not None:
-                update_doc["amount"] = update_data.amount
-            if update_data.category is not None:
-                update_doc["category"] = update_data.category
-            if update_data.description is not None:
-                update_doc["description"] = update_data.description
-            if update_data.date is not None:
-                update_doc["date"] = update_data.date
-            
-            update_doc["updated_at"] = datetime.now()
-            
-            # Actualizar en la base de datos
-            result = await self.collection.update_one(
-                {"_id": ObjectId(transaction_id), "user_id": user_id},
-                {"$set": update_doc}
-            )
+            if not ObjectId.is_valid(transaction_id):
+                return None
+            query = {"_id": ObjectId(transaction_id), "user_id": user_id}
             
-            if result.modified_count == 0:
+            # Sin transacción no se reserva versión
+            if await self.collection.find_one(query, {"_id": 1}) is None:
                 return None
             
-            # Obtener la transacción actualizada
-            updated_transaction = await self.collection.find_one({
-                "_id": ObjectId(transaction_id),
-                "user_id": user_id
-            })
+            # Construir documento de actualización
+            update_doc = self._update_fields(update_data)
+            
+            # Actualizar en la base de datos y obtener la transacción actualizada
+            async with self._reserve_versions(user_id) as version:
+                update_doc["version"] = version
+                updated_transaction = await self.collection.find_one_and_update(
+                    query,
+                    {"$set": update_doc},
+                    return_document=ReturnDocument.AFTER
+                )
+            
+            if updated_transaction is None:
+                return None
             
             return self._document_to_response(updated_transaction)
             
@@ -221,6 +374,7 @@ class TransactionOperations:
             logger.error(f"Error al actualizar transacción {transaction_id}: {e}")
             return None
     
+    @traced("transactions.delete_transaction")
     async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
         """
         Eliminar una transacción
@@ -238,12 +392,132 @@ class TransactionOperations:
                 "user_id": user_id
             })
             
-            return result.deleted_count > 0
+            if result.deleted_count == 0:
+                return False
+            
+            # Marca para la sincronización incremental; se descartan las vencidas
+            async with self._reserve_versions(user_id) as version:
+                await self.tombstones.insert_one({
+                    "user_id": user_id,
+                    "transaction_id": transaction_id,
+                    "version": version,
+                    "deleted_at": datetime.now()
+                })
+            await self.tombstones.delete_many({"user_id": user_id, "deleted_at": {"$lt": self._tombstone_cutoff()}})
+            return True
             
         except Exception as e:
             logger.error(f"Error al eliminar transacción {transaction_id}: {e}")
             return False
     
+    async def _select_ids(
+        self,
+        user_id: str,
+        ids: Optional[List[str]],
+        filters: Optional[TransactionFilter]
+    ) -> List[ObjectId]:
+        """
+        Obtener los _id de las transacciones de una operación masiva
+        
+        Args:
+            user_id: ID del usuario
+            ids: IDs indicados por el cliente
+            filters: Filtro (si no se indican IDs)
+            
+        Returns:
+            List[ObjectId]: _id de las transacciones del usuario seleccionadas
+        """
+        query = self._build_query(user_id, filters)
+        if ids is not None:
+            self._check_bulk_size(len(ids))
+            query["_id"] = {"$in": [ObjectId(value) for value in ids if ObjectId.is_valid(value)]}
+        cursor = self.collection.find(query, {"_id": 1}).limit(BULK_MAX_TRANSACTIONS + 1)
+        object_ids = [doc["_id"] async for doc in cursor]
+        self._check_bulk_size(len(object_ids))
+        return object_ids
+    
+    @traced("transactions.update_transactions")
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """
+        Aplicar los mismos cambios a varias transacciones
+        
+        Cada transacción necesita su propia versión de sincronización, así
+        que en lugar de update_many se envía un único bulk_write no ordenado
+        con una actualización por transacción.
+        
+        Args:
+            user_id: ID del usuario propietario
+            update_data: Cambios a aplicar
+            ids: IDs de las transacciones
+            filters: Filtro de las transacciones (si no se indican IDs)
+            
+        Returns:
+            List[str]: IDs de las transacciones actualizadas
+        """
+        object_ids = await self._select_ids(user_id, ids, filters)
+        if not object_ids:
+            return []
+        
+        fields = self._update_fields(update_data)
+        async with self._reserve_versions(user_id, len(object_ids)) as first_version:
+            await self.collection.bulk_write(
+                [
+                    UpdateOne({"_id": object_id, "user_id": user_id}, {"$set": {**fields, "version": first_version + position}})
+                    for position, object_id in enumerate(object_ids)
+                ],
+                ordered=False
+            )
+        return [str(object_id) for object_id in object_ids]
+    
+    @traced("transactions.delete_transactions")
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        """
+        Eliminar varias transacciones con un delete_many
+        
+        Args:
+            user_id: ID del usuario propietario
+            ids: IDs de las transacciones
+            filters: Filtro de las transacciones (si no se indican IDs)
+            
+        Returns:
+            List[str]: IDs de las transacciones eliminadas
+        """
+        object_ids = await self._select_ids(user_id, ids, filters)
+        if not object_ids:
+            return []
+        
+        await self.collection.delete_many({"_id": {"$in": object_ids}, "user_id": user_id})
+        
+        # Marcas para la sincronización incremental; se descartan las vencidas
+        deleted_at = datetime.now()
+        async with self._reserve_versions(user_id, len(object_ids)) as first_version:
+            await self.tombstones.insert_many(
+                [
+                    {
+                        "user_id": user_id,
+                        "transaction_id": str(object_id),
+                        "version": first_version + position,
+                        "deleted_at": deleted_at
+                    }
+                    for position, object_id in enumerate(object_ids)
+                ],
+                ordered=False
+            )
+        await self.tombstones.delete_many({"user_id": user_id, "deleted_at": {"$lt": self._tombstone_cutoff()}})
+        return [str(object_id) for object_id in object_ids]
+    
+    @traced("transactions.get_transaction_stats")
     async def get_transaction_stats(
         self, 
         user_id: str, 
@@ -319,6 +593,7 @@ class TransactionOperations:
             logger.error(f"Error al obtener estadísticas del usuario {user_id}: {e}")
             return TransactionStats()
     
+    @traced("transactions.get_categories")
     async def get_categories(self, user_id: str, transaction_type: Optional[str] = None) -> List[str]:
         """
         Obtener categorías únicas de transacciones del usuario
@@ -344,25 +619,111 @@ class TransactionOperations:
             logger.error(f"Error al obtener categorías del usuario {user_id}: {e}")
             return []
     
-    def _document_to_response(self, doc: Dict[str, Any]) -> TransactionResponse:
+    @traced("transactions.get_category_totals")
+    async def get_category_totals(
+        self,
+        user_id: str,
+        transaction_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[CategoryTotal]:
+        """
+        Obtener la suma y el conteo por categoría
+        
+        Args:
+            user_id: ID del usuario
+            transaction_type: Tipo de transacción (opcional)
+            date_from: Fecha de inicio del período
+            date_to: Fecha de fin del período
+            limit: Número máximo de categorías
+            
+        Returns:
+            List[CategoryTotal]: Categorías de mayor a menor total
+        """
+        try:
+            match: Dict[str, Any] = {"user_id": user_id}
+            if transaction_type:
+                match["type"] = transaction_type
+            if date_from or date_to:
+                date_range = {}
+                if date_from:
+                    date_range["$gte"] = date_from
+                if date_to:
+                    date_range["$lte"] = date_to
+                match["date"] = date_range
+            
+            pipeline = [
+                {"$match": match},
+                {"$group": {"_id": "$category", "total": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+                {"$sort": {"total": -1, "_id": 1}}
+            ]
+            if limit:
+                pipeline.append({"$limit": limit})
+            
+            results = await self.collection.aggregate(pipeline).to_list(length=None)
+            return [
+                CategoryTotal(category=result["_id"], total=result["total"], count=result["count"])
+                for result in results
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error al obtener totales por categoría del usuario {user_id}: {e}")
+            return []
+    
+    @traced("transactions.get_version")
+    async def get_version(self, user_id: str) -> int:
         """
-        Convertir documento MongoDB a TransactionResponse
+        Obtener la versión de datos del usuario
         
         Args:
-            doc: Documento de MongoDB
+            user_id: ID del usuario
             
         Returns:
-            TransactionResponse: Respuesta de transacción
-        """
-        return TransactionResponse(
-            id=str(doc["_id"]),
-            user_id=doc["user_id"],
-            type=doc["type"],
-            amount=doc["amount"],
-            category=doc["category"],
-            description=doc.get("description"),
-            date=doc["date"],
-            created_at=doc["created_at"],
-            updated_at=doc.get("updated_at"),
-            currency=doc.get("currency", "COP")
+            int: Versión hasta la que terminaron todas sus escrituras (0 si nunca
+                escribió transacciones)
+        """
+        return self._committed_version(await self.versions.find_one({"_id": user_id}))
+    
+    @traced("transactions.get_changes")
+    async def get_changes(
+        self,
+        user_id: str,
+        since: Optional[int],
+        limit: int = 500,
+        after: Optional[str] = None
+    ) -> TransactionChanges:
+        """
+        Obtener los cambios de transacciones del usuario desde una versión
+        
+        Args:
+            user_id: ID del usuario
+            since: Versión del último cambio recibido (None = todas)
+            limit: Cambios a devolver
+            after: Último ID de la página anterior de una recarga completa
+            
+        Returns:
+            TransactionChanges: Cambios en orden de versión
+        """
+        # La versión se lee antes que los cambios y no pasa de la primera
+        # reserva pendiente: lo que termine después tiene una versión mayor y
+        # llega en la siguiente sincronización (a lo sumo repetido)
+        current = self._committed_version(await self.versions.find_one({"_id": user_id}))
+        
+        if since is None or since > current or after is not None:
+            # Recarga completa por páginas en orden de _id; todas llevan la
+            # versión leída en la primera página
+            query = {"user_id": user_id}
+            if since is None or since > current or not ObjectId.is_valid(after):
+                since, after = current, None
+            else:
+                query["_id"] = {"$gt": ObjectId(after)}
+            documents = await self.collection.find(query).sort("_id", 1).limit(limit + 1).to_list(length=None)
+            return self._reset_page(documents, since, limit, first_page=after is None)
+        
+        query = {"user_id": user_id, "version": {"$gt": since, "$lte": current}}
+        documents = await self.collection.find(query).sort("version", 1).limit(limit + 1).to_list(length=None)
+        tombstones = await self.tombstones.find(query).sort("version", 1).limit(limit + 1).to_list(length=None)
+        return self._merge_changes(
+            documents, [(doc["version"], doc["transaction_id"]) for doc in tombstones], current, limit
         )
@@ -9,12 +9,16 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from typing import Optional, List
 from datetime import datetime
-import bcrypt
+import asyncio
+import logging
 from models.user import User, UserCreate, UserResponse, UserLogin, BudgetUpdate, VerificationCodeRequest, VerificationCodeConfirm
+from database.backends.base import BaseUserOperations
 
-class UserOperations:
+logger = logging.getLogger(__name__)
+
+class UserOperations(BaseUserOperations):
     """
-    Clase para manejar operaciones de usuarios en la base de datos
+    Clase para manejar operaciones de usuarios en la base de datos MongoDB
     """
     
     def __init__(self, database: AsyncIOMotorDatabase):
@@ -48,8 +52,8 @@ class UserOperations:
         if existing_user:
             raise ValueError("El correo electrónico ya está registrado")
         
-        # Encriptar contraseña
-        hashed_password = self._hash_password(user_data.password)
+        # Encriptar contraseña (bcrypt es costoso: se ejecuta fuera del bucle de eventos)
+        hashed_password = await asyncio.to_thread(self._hash_password, user_data.password)
         
         # Crear documento de usuario (INACTIVO hasta verificar email)
         user_doc = {
@@ -145,7 +149,7 @@ class UserOperations:
         Returns:
             UserResponse si la autenticación es exitosa, None en caso contrario
         """
-        print(f"[DEBUG] Authenticating user: {login_data.email}")
+        logger.debug(f"Authenticating user: {login_data.email}")
         
         # Buscar usuario por correo
         user_doc = await self.collection.find_one({
@@ -153,12 +157,14 @@ class UserOperations:
             "is_active": True
         })
         
-        print(f"[DEBUG] User found in auth: {user_doc is not None}")
+        logger.debug(f"User found in auth: {user_doc is not None}")
         
         if user_doc:
-            print(f"[DEBUG] User is_active: {user_doc.get('is_active')}, email_verified: {user_doc.get('email_verified')}")
-            password_valid = self._verify_password(login_data.password, user_doc["password"])
-            print(f"[DEBUG] Password valid: {password_valid}")
+            logger.debug(f"User is_active: {user_doc.get('is_active')}, email_verified: {user_doc.get('email_verified')}")
+            password_valid = await asyncio.to_thread(
+                self._verify_password, login_data.password, user_doc["password"]
+            )
+            logger.debug(f"Password valid: {password_valid}")
             
             if password_valid:
                 # Actualizar último acceso
@@ -172,9 +178,9 @@ class UserOperations:
             # Buscar usuario sin restricción de estado para debug
             any_user = await self.collection.find_one({"email": login_data.email})
             if any_user:
-                print(f"[DEBUG] User exists but is_active: {any_user.get('is_active')}, email_verified: {any_user.get('email_verified')}")
+                logger.debug(f"User exists but is_active: {any_user.get('is_active')}, email_verified: {any_user.get('email_verified')}")
             else:
-                print(f"[DEBUG] User does not exist in database")
+                logger.debug("User does not exist in database")
         
         return None
     
@@ -245,56 +251,6 @@ class UserOperations:
         
         return users
     
-    async def send_verification_code(self, email: str, purpose: str, user_name: str = None) -> bool:
-        """
-        Enviar código de verificación por correo
-        
-        Args:
-            email: Correo electrónico del usuario
-            purpose: Propósito del código ('registration' o 'password_recovery')
-            user_name: Nombre del usuario (opcional)
-            
-        Returns:
-            bool: True si se envió correctamente
-        """
-        try:
-            from services.email_service import EmailService
-            email_service = EmailService(self.database)
-            code = await email_service.generate_verification_code(email, purpose)
-            return await email_service.send_verification_email(email, code, purpose, user_name)
-        except Exception:
-            return False
-    
-    async def verify_code(self, email: str, code: str, purpose: str) -> dict:
-        """
-        Verificar código de verificación
-        
-        Args:
-            email: Correo electrónico del usuario
-            code: Código de verificación
-            purpose: Propósito del código
-            
-        Returns:
-            dict: {"valid": bool, "message": str, "attempts_left": int}
-        """
-        try:
-            from services.email_service import EmailService
-            email_service = EmailService(self.database)
-            result = await email_service.verify_code(email, code, purpose)
-            
-            # Si la verificación es exitosa y es para registro, activar la cuenta
-            if result["valid"] and purpose == "registration":
-                await self.activate_user_account(email)
-                result["message"] = "Cuenta activada exitosamente"
-            
-            return result
-        except Exception:
-            return {
-                "valid": False,
-                "message": "Error interno del servidor",
-                "attempts_left": 0
-            }
-    
     async def activate_user_account(self, email: str) -> bool:
         """
         Activar cuenta de usuario después de verificar email
@@ -332,11 +288,11 @@ class UserOperations:
             bool: True si se actualizó correctamente
         """
         try:
-            print(f"[DEBUG] Updating password for email: {email}")
+            logger.debug(f"Updating password for email: {email}")
             
             # Encriptar la nueva contraseña
-            hashed_password = self._hash_password(new_password)
-            print(f"[DEBUG] Password hashed successfully")
+            hashed_password = await asyncio.to_thread(self._hash_password, new_password)
+            logger.debug("Password hashed successfully")
             
             # Actualizar la contraseña y activar la cuenta en la base de datos
             result = await self.collection.update_one(
@@ -350,61 +306,8 @@ class UserOperations:
                     }
                 }
             )
-            print(f"[DEBUG] Update result - matched: {result.matched_count}, modified: {result.modified_count}")
+            logger.debug(f"Update result - matched: {result.matched_count}, modified: {result.modified_count}")
             return result.modified_count > 0
-        except Exception as e:
-            print(f"[DEBUG] Exception in update_password: {str(e)}")
+        except Exception:
+            logger.exception(f"Error al actualizar la contraseña de {email}")
             return False
-    
-    def _hash_password(self, password: str) -> str:
-        """
-        Encriptar contraseña usando bcrypt
-        
-        Args:
-            password: Contraseña en texto plano
-            
-        Returns:
-            Contraseña encriptada
-        """
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
-    
-    def _verify_password(self, password: str, hashed_password: str) -> bool:
-        """
-        Verificar contraseña
-        
-        Args:
-            password: Contraseña en texto plano
-            hashed_password: Contraseña encriptada
-            
-        Returns:
-            True si la contraseña es correcta
-        """
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-    
-    def _user_doc_to_response(self, user_doc: dict) -> UserResponse:
-        """
-        Convertir documento de MongoDB a UserResponse
-        
-        Args:
-            user_doc: Documento de usuario de MongoDB
-            
-        Returns:
-            UserResponse
-        """
-        return UserResponse(
-            id=str(user_doc["_id"]),
-            first_name=user_doc["first_name"],
-            last_name=user_doc["last_name"],
-            email=user_doc["email"],
-            initial_budget=user_doc["initial_budget"],
-            budget_period=user_doc["budget_period"],
-            budget_configured=user_doc.get("budget_configured", False),
-            registration_date=user_doc["registration_date"],
-            is_active=user_doc["is_active"],
-            email_verified=user_doc.get("email_verified", False),
-            last_access=user_doc.get("last_access"),
-            currency=user_doc.get("currency", "COP"),
-            timezone=user_doc.get("timezone", "America/Bogota")
-        )
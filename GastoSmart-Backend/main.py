@@ -1,13 +1,35 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, HTMLResponse, Response
 import os
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from typing import Optional
 import uvicorn
-# Importar conexión a MongoDB
-from database.connection import connect_to_mongo, close_mongo_connection
+# Importar almacenamiento (MongoDB o memoria según STORAGE_BACKEND)
+from database.storage import storage
+from services.page_cache import page_cache
+from services.recent_cache import recent_cache
+from services.autocomplete import autocomplete_index
+from services.live_updates import live_hub
+from services.invalidation import invalidation_bus
+from services.loop_monitor import loop_monitor, LOOP_MONITOR_ENABLED
+# Importar limitador de concurrencia
+from middleware.concurrency import (
+    ConcurrencyLimitMiddleware, AdaptiveConcurrencyLimiter, CONCURRENCY_LIMIT_ENABLED
+)
+# Importar perfilador bajo demanda
+from middleware.profiling import ProfilingMiddleware, profiling_enabled
+# Importar logging estructurado e ID de petición
+from config.logging_config import setup_logging, shutdown_logging
+from middleware.request_id import RequestIdMiddleware
+# Importar trazas locales
+from middleware.tracing import TracingMiddleware
+from services.tracing import TRACING_ENABLED, tracer
+# Importar métricas
+from middleware.metrics import MetricsMiddleware
+from services.metrics import registry, CONTENT_TYPE_LATEST
 
 # Cargar variables de entorno
 load_dotenv()
@@ -15,11 +37,28 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manejar el ciclo de vida de la aplicación"""
-    # Startup
-    await connect_to_mongo()
+    # Startup: calentar el proceso antes de aceptar tráfico
+    # (el logging se configura aquí para reemplazar la configuración de uvicorn)
+    setup_logging()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await storage.connect()
+    await invalidation_bus.start(storage)
+    page_cache.load()
     yield
     # Shutdown
-    await close_mongo_connection()
+    await invalidation_bus.stop()
+    await storage.close()
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    tracer.stop()
+    shutdown_logging()
+
+# Invalidar las cachés del proceso cuando otro worker escribe (change streams de MongoDB)
+invalidation_bus.subscribe("transactions", recent_cache.on_remote_write, recent_cache.clear)
+invalidation_bus.subscribe("transactions", autocomplete_index.on_remote_write, autocomplete_index.clear)
+# Publicar en las conexiones en vivo de este proceso las escrituras hechas en otros workers
+invalidation_bus.subscribe("transactions", live_hub.remote_listener(storage.transaction_operations), live_hub.clear)
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -29,6 +68,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Perfilar peticiones individuales (solo si hay token o tasa de muestreo configurados)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Limitar peticiones en vuelo y rechazar la carga excedente con 503
+# (se registra antes que CORS para que las respuestas 503 lleven sus cabeceras)
+concurrency_limiter = AdaptiveConcurrencyLimiter()
+concurrency_limiter.register_metrics(registry)
+if CONCURRENCY_LIMIT_ENABLED:
+    app.add_middleware(ConcurrencyLimitMiddleware, limiter=concurrency_limiter)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -38,109 +88,109 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Medir latencias de todas las peticiones (incluidas las rechazadas con 503)
+app.add_middleware(MetricsMiddleware)
+
+# Abrir una traza por petición (usa el ID de la petición, por eso va dentro de RequestIdMiddleware)
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Asignar un ID a cada petición para correlacionar sus logs
+app.add_middleware(RequestIdMiddleware)
+
 # Servir archivos estáticos del frontend
 app.mount("/static", StaticFiles(directory="../Front-end"), name="static")
 
 # Ruta para servir el frontend
 @app.get("/")
 async def read_index():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/signup.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("signup.html"))
 
 @app.get("/signup")
 async def read_signup():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/signup.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("signup.html"))
 
 # Rutas específicas para cada página HTML
 @app.get("/login")
 async def read_login():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/login.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("login.html"))
 
 @app.get("/initial-budget")
 async def read_initial_budget():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/initial-budget.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("initial-budget.html"))
 
 @app.get("/password-reset")
 async def read_password_reset():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/password-reset.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("password-reset.html"))
 
 @app.get("/verify-recovery-code")
 async def read_verify_recovery_code():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/verify-recovery-code.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("verify-recovery-code.html"))
 
 @app.get("/verify-registration-code")
 async def read_verify_registration_code():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/verify-registration-code.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("verify-registration-code.html"))
 
 @app.get("/dashboard")
 async def read_dashboard():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/dashboard.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("dashboard.html"))
 
 
 @app.get("/goals")
 async def read_goals():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/goals.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("goals.html"))
 
 @app.get("/reports")
 async def read_reports():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/reports.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("reports.html"))
 
 @app.get("/settings")
 async def read_settings():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/settings.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("settings.html"))
 
 @app.get("/income-expenses")
 async def read_income_expenses():
-    from fastapi.responses import HTMLResponse
-    with open("../Front-end/html/income-expenses.html", "r", encoding="utf-8") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    return HTMLResponse(content=page_cache.get("income-expenses.html"))
 
 # Importar routers
 from routers.users import router as users_router
 from routers.transactions import router as transactions_router
+from routers.dashboard import router as dashboard_router
+from routers.live import router as live_router
+from routers.batch import router as batch_router
 
 # Incluir routers en la aplicación
 app.include_router(users_router)
 app.include_router(transactions_router)
+app.include_router(dashboard_router)
+app.include_router(live_router)
+app.include_router(batch_router)
 
 # Ruta de prueba
 @app.get("/api/test")
 async def test_api():
     return {"message": "¡GastoSmart API funcionando!", "status": "success"}
 
+# Ruta de métricas en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Exportar las métricas del proceso en formato de texto de Prometheus
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+# Ruta de las trazas más lentas recientes
+@app.get("/debug/traces", include_in_schema=False)
+async def get_slowest_traces(limit: int = 20, name: Optional[str] = None):
+    """
+    Listar las trazas más lentas del buffer en memoria de este proceso
+
+    Args:
+        limit: Número máximo de trazas
+        name: Filtrar por método y ruta, ej: "GET /api/transactions/"
+    """
+    return {"traces": tracer.slowest(limit=limit, name=name)}
+
 # Ruta para obtener configuración regional
 @app.get("/api/config/regional")
 async def get_regional_config():
@@ -185,4 +235,5 @@ async def read_frontend(path: str):
 if __name__ == "__main__":
     
     # Usar localhost para desarrollo local
+    # (en producción usar server.py, que crea un worker por núcleo)
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
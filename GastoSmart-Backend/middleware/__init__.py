@@ -0,0 +1,14 @@
+"""
+Paquete de Middleware para GastoSmart
+
+Este paquete contiene los middleware ASGI que envuelven la aplicación
+para controlar la carga y el comportamiento de las peticiones.
+"""
+
+from .concurrency import ConcurrencyLimitMiddleware, AdaptiveConcurrencyLimiter, RequestPriority
+
+__all__ = [
+    "ConcurrencyLimitMiddleware",
+    "AdaptiveConcurrencyLimiter",
+    "RequestPriority"
+]
@@ -0,0 +1,318 @@
+"""
+Limitador de Concurrencia Adaptativo para GastoSmart
+
+Este archivo implementa un middleware ASGI que limita el número de
+peticiones en vuelo con un algoritmo AIMD (aumento aditivo, disminución
+multiplicativa) y clases de prioridad. Cuando el servidor está saturado
+las peticiones de menor prioridad se rechazan de inmediato con 503 y
+Retry-After en lugar de acumularse en una cola sin límite.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuración del limitador (variables de entorno)
+CONCURRENCY_LIMIT_ENABLED = os.getenv("CONCURRENCY_LIMIT_ENABLED", "true").lower() == "true"
+CONCURRENCY_INITIAL_LIMIT = int(os.getenv("CONCURRENCY_INITIAL_LIMIT", "64"))
+CONCURRENCY_MIN_LIMIT = int(os.getenv("CONCURRENCY_MIN_LIMIT", "8"))
+CONCURRENCY_MAX_LIMIT = int(os.getenv("CONCURRENCY_MAX_LIMIT", "512"))
+CONCURRENCY_LATENCY_TARGET_MS = float(os.getenv("CONCURRENCY_LATENCY_TARGET_MS", "250"))
+CONCURRENCY_QUEUE_SIZE = int(os.getenv("CONCURRENCY_QUEUE_SIZE", "32"))
+CONCURRENCY_QUEUE_TIMEOUT_MS = float(os.getenv("CONCURRENCY_QUEUE_TIMEOUT_MS", "100"))
+CONCURRENCY_RETRY_AFTER_S = int(os.getenv("CONCURRENCY_RETRY_AFTER_S", "1"))
+
+class RequestPriority(IntEnum):
+    """Clases de prioridad de las peticiones (menor valor = más prioritaria)"""
+    CRITICAL = 0  # Escrituras (transacciones, login)
+    NORMAL = 1    # Lecturas y páginas
+    LOW = 2       # Estadísticas, búsquedas y exportaciones
+
+# Fracción del límite actual que puede ocupar cada clase de prioridad.
+# Las peticiones críticas pueden usar todo el límite; las de baja prioridad
+# se rechazan antes para dejar espacio a las demás.
+PRIORITY_SHARE = {
+    RequestPriority.CRITICAL: 1.0,
+    RequestPriority.NORMAL: 0.85,
+    RequestPriority.LOW: 0.5
+}
+
+# Rutas de baja prioridad (prefijos)
+LOW_PRIORITY_PREFIXES = (
+    "/api/transactions/stats",
+    "/api/transactions/search",
+    "/api/transactions/export"
+)
+
+def classify_request(method: str, path: str) -> RequestPriority:
+    """
+    Clasificar una petición según su prioridad
+
+    Args:
+        method: Método HTTP
+        path: Ruta de la petición
+
+    Returns:
+        RequestPriority: Clase de prioridad de la petición
+    """
+    if path.startswith(LOW_PRIORITY_PREFIXES):
+        return RequestPriority.LOW
+    if path == "/api/batch":
+        # Mezcla lecturas y escrituras; su tamaño lo limita BATCH_MAX_COST
+        return RequestPriority.NORMAL
+    if path.startswith("/api/") and method not in ("GET", "HEAD", "OPTIONS"):
+        # Escrituras de transacciones, login, registro y verificación
+        return RequestPriority.CRITICAL
+    return RequestPriority.NORMAL
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limitador de concurrencia AIMD con clases de prioridad
+
+    El límite crece en 1 por cada "ventana" de peticiones exitosas cuando
+    la capacidad se está usando, y se reduce multiplicativamente cuando
+    la latencia supera el objetivo o el servidor responde con error.
+    Todo el estado vive en el bucle de eventos, por lo que no usa locks.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = CONCURRENCY_INITIAL_LIMIT,
+        min_limit: int = CONCURRENCY_MIN_LIMIT,
+        max_limit: int = CONCURRENCY_MAX_LIMIT,
+        latency_target: float = CONCURRENCY_LATENCY_TARGET_MS / 1000,
+        backoff_ratio: float = 0.9,
+        queue_size: int = CONCURRENCY_QUEUE_SIZE,
+        queue_timeout: float = CONCURRENCY_QUEUE_TIMEOUT_MS / 1000
+    ):
+        """
+        Inicializar el limitador
+
+        Args:
+            initial_limit: Límite inicial de peticiones en vuelo
+            min_limit: Límite mínimo
+            max_limit: Límite máximo
+            latency_target: Latencia objetivo en segundos
+            backoff_ratio: Factor de reducción ante sobrecarga
+            queue_size: Máximo de peticiones en espera por prioridad
+            queue_timeout: Tiempo máximo de espera en cola (segundos)
+        """
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._waiters: Dict[RequestPriority, Deque[asyncio.Future]] = {
+            priority: deque() for priority in RequestPriority
+        }
+        self._last_decrease = 0.0
+
+        # Contadores para observabilidad
+        self.admitted: Dict[RequestPriority, int] = {priority: 0 for priority in RequestPriority}
+        self.shed: Dict[RequestPriority, int] = {priority: 0 for priority in RequestPriority}
+
+    def capacity(self, priority: RequestPriority) -> int:
+        """Número máximo de peticiones en vuelo que admite una prioridad"""
+        return max(1, int(self.limit * PRIORITY_SHARE[priority]))
+
+    def queued(self) -> int:
+        """Número total de peticiones esperando un turno"""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _has_waiters_before(self, priority: RequestPriority) -> bool:
+        """Verificar si hay peticiones de igual o mayor prioridad esperando"""
+        return any(self._waiters[p] for p in RequestPriority if p <= priority)
+
+    async def acquire(self, priority: RequestPriority) -> bool:
+        """
+        Solicitar un turno para ejecutar una petición
+
+        Args:
+            priority: Prioridad de la petición
+
+        Returns:
+            bool: True si la petición fue admitida, False si debe rechazarse
+        """
+        if self.in_flight < self.capacity(priority) and not self._has_waiters_before(priority):
+            self.in_flight += 1
+            self.admitted[priority] += 1
+            return True
+
+        waiters = self._waiters[priority]
+        if len(waiters) >= self.queue_size or self.queue_timeout <= 0:
+            self.shed[priority] += 1
+            return False
+
+        # Espera corta y acotada: si no se libera un turno a tiempo se rechaza
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # El turno pudo asignarse justo al vencer la espera: devolverlo
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            self.shed[priority] += 1
+            return False
+        except asyncio.CancelledError:
+            # El cliente se desconectó; devolver el turno si ya se había asignado
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+
+        self.admitted[priority] += 1
+        return True
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        """
+        Liberar un turno y ajustar el límite con el resultado de la petición
+
+        Args:
+            latency: Duración de la petición en segundos
+            failed: True si la petición terminó con error del servidor
+        """
+        if failed or latency > self.latency_target:
+            # Disminución multiplicativa, como máximo una vez por latencia objetivo
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+        elif self.in_flight * 2 >= self.limit:
+            # Aumento aditivo: +1 por cada ventana completa de peticiones
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        """Devolver un turno y despertar a la petición en espera más prioritaria"""
+        self.in_flight -= 1
+        for priority in RequestPriority:
+            waiters = self._waiters[priority]
+            while waiters and self.in_flight < self.capacity(priority):
+                future = waiters.popleft()
+                if not future.done():
+                    # El turno se entrega directamente a la petición en espera
+                    self.in_flight += 1
+                    future.set_result(True)
+            if waiters:
+                # No adelantar prioridades menores mientras esta siga esperando
+                return
+
+    def register_metrics(self, registry) -> None:
+        """
+        Exponer el estado del limitador en el registro de métricas
+
+        Args:
+            registry: Registro de métricas donde publicar los gauges
+        """
+        registry.callback_gauge(
+            "gastosmart_concurrency_limit",
+            "Límite actual de peticiones en vuelo",
+            lambda: [({}, self.limit)]
+        )
+        registry.callback_gauge(
+            "gastosmart_concurrency_queued",
+            "Peticiones esperando un turno",
+            lambda: [({}, self.queued())]
+        )
+        registry.callback_gauge(
+            "gastosmart_concurrency_admitted",
+            "Peticiones admitidas por prioridad (acumulado)",
+            lambda: [({"priority": p.name.lower()}, n) for p, n in self.admitted.items()]
+        )
+        registry.callback_gauge(
+            "gastosmart_concurrency_shed",
+            "Peticiones rechazadas con 503 por prioridad (acumulado)",
+            lambda: [({"priority": p.name.lower()}, n) for p, n in self.shed.items()]
+        )
+
+    def snapshot(self) -> Dict[str, float]:
+        """Obtener el estado actual del limitador"""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued()
+        }
+
+class ConcurrencyLimitMiddleware:
+    """
+    Middleware ASGI que aplica el limitador de concurrencia adaptativo
+
+    Las peticiones rechazadas reciben 503 con la cabecera Retry-After
+    sin llegar a ejecutar el endpoint.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        classify: Callable[[str, str], RequestPriority] = classify_request,
+        exempt_paths: Tuple[str, ...] = ("/api/test", "/metrics", "/debug/traces", "/api/live/events"),
+        retry_after: int = CONCURRENCY_RETRY_AFTER_S
+    ):
+        """
+        Inicializar el middleware
+
+        Args:
+            app: Aplicación ASGI envuelta
+            limiter: Limitador a usar (se crea uno con la configuración por defecto)
+            classify: Función que asigna la prioridad de cada petición
+            exempt_paths: Rutas que no pasan por el limitador
+            retry_after: Segundos sugeridos al cliente antes de reintentar
+        """
+        self.app = app
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.classify = classify
+        self.exempt_paths = exempt_paths
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.classify(scope["method"], scope["path"])
+        if not await self.limiter.acquire(priority):
+            await self._reject(send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.limiter.release(time.perf_counter() - start, failed=status_code >= 500)
+
+    async def _reject(self, send) -> None:
+        """Responder 503 indicando al cliente cuándo reintentar"""
+        body = b'{"detail":"Servidor ocupado, intenta de nuevo en unos segundos"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,61 @@
+"""
+Middleware de Métricas HTTP para GastoSmart
+
+Registra la latencia de cada petición en un histograma etiquetado por
+método, plantilla de ruta (ej: /api/transactions/{transaction_id}) y
+código de estado, además del número de peticiones en vuelo.
+"""
+
+import time
+
+from services.metrics import registry
+
+http_request_duration = registry.histogram(
+    "gastosmart_http_request_duration_seconds",
+    "Duración de las peticiones HTTP por ruta y código de estado",
+    ("method", "route", "status")
+)
+http_requests_in_flight = registry.gauge(
+    "gastosmart_http_requests_in_flight",
+    "Peticiones HTTP en curso"
+)
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide la latencia de las peticiones HTTP
+    """
+
+    def __init__(self, app):
+        """
+        Args:
+            app: Aplicación ASGI envuelta
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # El router deja la ruta resuelta en el scope; se usa su plantilla
+            # para no crear una serie por cada ID distinto
+            route = scope.get("route")
+            route_template = getattr(route, "path", None) or "<sin ruta>"
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                (scope["method"], route_template, str(status_code))
+            )
@@ -0,0 +1,210 @@
+"""
+Perfilador de Peticiones bajo Demanda para GastoSmart
+
+Este archivo implementa un middleware que perfila peticiones individuales
+con un muestreador en un hilo aparte. Se activa por petición con la
+cabecera X-Profile-Token (debe coincidir con PROFILE_ADMIN_TOKEN) o con
+una tasa de muestreo (PROFILE_SAMPLE_RATE).
+
+El muestreador es consciente de asyncio: cuando la tarea de la petición
+se está ejecutando guarda la pila del hilo del bucle (tiempo de CPU), y
+cuando está suspendida guarda la cadena de corrutinas que espera (tiempo
+de espera: MongoDB, hilos, red). El resultado se escribe en formato
+"folded" (una pila por línea con su conteo), listo para flamegraph.pl o
+speedscope, en PROFILE_DIR con la ruta y los tiempos en el nombre.
+
+Si ninguna de las dos opciones está configurada el middleware no se
+registra y no tiene ningún costo.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuración del perfilador (variables de entorno)
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+PROFILE_HEADER = b"x-profile-token"
+
+def profiling_enabled() -> bool:
+    """Verificar si el perfilador está configurado"""
+    return bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+def _frame_label(frame) -> str:
+    """Nombre legible de un frame: función (archivo:línea)"""
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class RequestSampler:
+    """
+    Muestreador de la pila de una tarea asyncio desde un hilo aparte
+    """
+
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop, interval: float):
+        """
+        Inicializar el muestreador
+
+        Args:
+            task: Tarea de la petición a perfilar
+            loop: Bucle de eventos donde corre la tarea
+            interval: Intervalo entre muestras en segundos
+        """
+        self.task = task
+        self.loop = loop
+        self.interval = interval
+        self.loop_thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.cpu_samples = 0
+        self.wait_samples = 0
+        # Tiempo de CPU estimado: intervalo real entre muestras en las que la tarea corría
+        self.cpu_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # Con el GIL ocupado el hilo despierta tarde; se mide el intervalo real
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            if asyncio.current_task(self.loop) is self.task:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self.cpu_samples += 1
+                    self.cpu_seconds += elapsed
+                    self.stacks[("[cpu]",) + self._running_stack(frame)] += 1
+            else:
+                self.wait_samples += 1
+                self.stacks[("[await]",) + self._suspended_stack()] += 1
+
+    def _running_stack(self, frame) -> tuple:
+        """Pila del hilo del bucle desde la entrada del middleware hasta la hoja"""
+        labels: List[str] = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            if frame.f_code is ProfilingMiddleware._profile.__code__:
+                break
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def _suspended_stack(self) -> tuple:
+        """Cadena de corrutinas que la tarea está esperando"""
+        labels: List[str] = []
+        awaitable = self.task.get_coro()
+        recording = False
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                # Hoja: un Future (I/O, executor) u otro objeto esperable
+                if recording:
+                    labels.append(f"(esperando {type(awaitable).__name__})")
+                break
+            if frame.f_code is ProfilingMiddleware._profile.__code__:
+                recording = True
+            if recording:
+                labels.append(_frame_label(frame))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return tuple(labels)
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila peticiones seleccionadas
+    """
+
+    def __init__(
+        self,
+        app,
+        admin_token: str = PROFILE_ADMIN_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        directory: str = PROFILE_DIR,
+        interval_ms: float = PROFILE_INTERVAL_MS
+    ):
+        """
+        Args:
+            app: Aplicación ASGI envuelta
+            admin_token: Token que activa el perfilado por cabecera
+            sample_rate: Fracción de peticiones perfiladas al azar (0 a 1)
+            directory: Directorio donde se escriben los perfiles
+            interval_ms: Intervalo de muestreo en milisegundos
+        """
+        self.app = app
+        self.admin_token = admin_token.encode()
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.interval = interval_ms / 1000
+
+    def _should_profile(self, scope) -> bool:
+        if self.admin_token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return value == self.admin_token
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send)
+
+    async def _profile(self, scope, receive, send):
+        """Ejecutar la petición con el muestreador activo"""
+        sampler = RequestSampler(asyncio.current_task(), asyncio.get_running_loop(), self.interval)
+        wall_start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            wall_ms = (time.perf_counter() - wall_start) * 1000
+            # Escribir el perfil fuera del bucle de eventos
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._write_profile, scope, sampler, wall_ms
+            )
+
+    def _write_profile(self, scope, sampler: RequestSampler, wall_ms: float) -> Optional[str]:
+        """
+        Guardar el perfil en formato folded
+
+        Returns:
+            Optional[str]: Ruta del archivo escrito
+        """
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        route_slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        cpu_ms = sampler.cpu_seconds * 1000
+        filename = (
+            f"{datetime.now():%Y%m%d-%H%M%S}_{scope['method']}_{route_slug}"
+            f"_wall{wall_ms:.0f}ms_cpu{cpu_ms:.0f}ms.folded"
+        )
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, filename)
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sampler.stacks.most_common():
+                    f.write(f"{';'.join(stack)} {count}\n")
+            logger.info(f"Perfil de {scope['method']} {route} guardado en {path}")
+            return path
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el perfil: {e}")
+            return None
@@ -0,0 +1,52 @@
+"""
+Middleware de ID de Petición para GastoSmart
+
+Asigna a cada petición un identificador (el de la cabecera X-Request-ID
+si el cliente lo envía) que se incluye en todos los logs emitidos durante
+la petición y se devuelve en la respuesta.
+"""
+
+import uuid
+
+from config.logging_config import request_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que propaga el ID de la petición
+    """
+
+    def __init__(self, app):
+        """
+        Args:
+            app: Aplicación ASGI envuelta
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                # Limitar el tamaño para no copiar valores arbitrarios a los logs
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex[:16]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,102 @@
+"""
+Middleware de Trazas para GastoSmart
+
+Abre una traza por cada petición HTTP (con el ID de la petición como
+identificador) y define TracedRoute, la clase de ruta de los routers de
+la API, que separa el tiempo de cada endpoint en resolución de
+dependencias, ejecución del endpoint y serialización de la respuesta.
+"""
+
+import asyncio
+import functools
+import uuid
+
+from fastapi.routing import APIRoute
+
+from config.logging_config import request_id_var
+from services.tracing import current_trace, record_span, span, tracer
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre una traza por petición
+    """
+
+    def __init__(self, app):
+        """
+        Args:
+            app: Aplicación ASGI envuelta
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = request_id_var.get() or uuid.uuid4().hex[:16]
+        trace, tokens = tracer.start_trace(trace_id, f"{scope['method']} {scope['path']}")
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Agrupar por plantilla de ruta, igual que las métricas
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            trace.name = trace.root.name = f"{scope['method']} {route}"
+            trace.root.set(status=status_code, path=scope["path"])
+            tracer.finish_trace(trace, tokens)
+
+def _traced_endpoint(endpoint):
+    """Envolver un endpoint asíncrono en un span con su nombre"""
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        with span(f"endpoint {endpoint.__name__}"):
+            return await endpoint(*args, **kwargs)
+    wrapper.__traced__ = True
+    return wrapper
+
+class TracedRoute(APIRoute):
+    """
+    Ruta de FastAPI que registra las fases de cada petición como spans
+
+    FastAPI resuelve las dependencias, llama al endpoint y serializa la
+    respuesta dentro de un mismo manejador; aquí se mide el manejador y
+    el endpoint, y la diferencia se registra como los spans
+    "dependencies" (antes del endpoint) y "serialize" (después).
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # Los endpoints síncronos se dejan igual para que sigan ejecutándose en el pool de hilos;
+        # include_router vuelve a crear las rutas con el endpoint ya envuelto
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "__traced__", False):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route_path = self.path
+
+        async def traced_handler(request):
+            with span("route", path=route_path) as route_span:
+                if route_span is None:
+                    return await handler(request)
+                trace = current_trace()
+                first = len(trace.spans)
+                response = await handler(request)
+            endpoint_span = next(
+                (s for s in trace.spans[first:]
+                 if s.parent_id == route_span.span_id and s.name.startswith("endpoint ")),
+                None
+            )
+            if endpoint_span is not None and endpoint_span.end is not None:
+                record_span("dependencies", route_span.start, endpoint_span.start, parent=route_span)
+                record_span("serialize", endpoint_span.end, route_span.end, parent=route_span)
+            return response
+
+        return traced_handler
@@ -0,0 +1,62 @@
+"""
+Modelos de Peticiones en Lote de GastoSmart
+
+Este archivo define el cuerpo y la respuesta de POST /api/batch: varias
+operaciones de las APIs de usuarios, transacciones y panel en una sola
+petición HTTP.
+"""
+
+from pydantic import BaseModel, Field, validator
+from typing import Any, List, Optional
+
+# Métodos y rutas que se pueden ejecutar dentro de un lote
+BATCH_METHODS = ("GET", "POST", "PUT", "DELETE")
+BATCH_PATH_PREFIXES = ("/api/users/", "/api/transactions", "/api/dashboard")
+
+class BatchOperation(BaseModel):
+    """
+    Operación de un lote: equivale a una petición a la API
+    """
+    id: Optional[str] = Field(None, max_length=64, description="Identificador del cliente, se devuelve en el resultado")
+    method: str = Field(..., description="GET, POST, PUT o DELETE")
+    path: str = Field(..., description="Ruta con sus parámetros, ej: /api/transactions/?user_id=...")
+    body: Optional[Any] = Field(None, description="Cuerpo JSON de la operación")
+
+    @validator('method')
+    def validate_method(cls, v):
+        v = v.upper()
+        if v not in BATCH_METHODS:
+            raise ValueError(f'Método no permitido en un lote: {v}')
+        return v
+
+    @validator('path')
+    def validate_path(cls, v):
+        if not v.startswith(BATCH_PATH_PREFIXES):
+            raise ValueError(f'Ruta no permitida en un lote: {v}')
+        return v
+
+class BatchRequest(BaseModel):
+    """
+    Cuerpo de POST /api/batch
+    """
+    operations: List[BatchOperation] = Field(..., description="Operaciones en el orden en que se aplican")
+
+    @validator('operations')
+    def validate_operations(cls, v):
+        if not v:
+            raise ValueError('El lote debe tener al menos una operación')
+        return v
+
+class BatchResult(BaseModel):
+    """
+    Resultado de una operación del lote
+    """
+    id: Optional[str] = None
+    status: int = Field(..., description="Código HTTP de la operación")
+    body: Optional[Any] = Field(None, description="Respuesta JSON de la operación")
+
+class BatchResponse(BaseModel):
+    """
+    Respuesta de POST /api/batch (un resultado por operación, en el mismo orden)
+    """
+    results: List[BatchResult]
@@ -0,0 +1,39 @@
+"""
+Modelos del Panel Principal de GastoSmart
+
+Este archivo define la respuesta agregada de /api/dashboard: todo lo que
+el panel principal y la pantalla de ingresos y gastos necesitan en una
+sola petición.
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import datetime
+
+from .user import UserResponse, BudgetPeriod
+from .transaction import TransactionResponse, TransactionStats, CategoryTotal
+
+class BudgetStatus(BaseModel):
+    """
+    Estado del presupuesto en el período actual (quincena o mes)
+    """
+    period: BudgetPeriod
+    period_start: datetime
+    period_end: datetime
+    budget: float = Field(..., description="Presupuesto configurado por el usuario")
+    spent: float = Field(0.0, description="Gastos registrados en el período")
+    remaining: float = Field(0.0, description="Presupuesto disponible (negativo si se excedió)")
+    used_percentage: float = Field(0.0, description="Porcentaje del presupuesto usado")
+
+class DashboardResponse(BaseModel):
+    """
+    Respuesta agregada del panel principal
+    """
+    user: UserResponse
+    budget: BudgetStatus
+    totals: TransactionStats = Field(..., description="Totales históricos")
+    period_totals: TransactionStats = Field(..., description="Totales del período actual")
+    recent_transactions: List[TransactionResponse]
+    top_categories: List[CategoryTotal] = Field(..., description="Categorías con más gasto en el período actual")
+    high_expense_threshold: float
+    high_expenses: List[TransactionResponse] = Field(..., description="Gastos más recientes por encima del umbral")
@@ -6,9 +6,11 @@ Este archivo define el modelo de datos para las transacciones financieras
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
+import unicodedata
 
 class TransactionType(str, Enum):
     """Tipos de transacción disponibles"""
@@ -36,6 +38,24 @@ class ExpenseCategory(str, Enum):
     SERVICES = "Servicios"
     OTHER_EXPENSES = "Otros gastos"
 
+@lru_cache(maxsize=4096)
+def normalize_category(category: str) -> str:
+    """
+    Clave normalizada de una categoría (campo category_key de cada transacción)
+    
+    Sin mayúsculas, tildes ni espacios repetidos, para filtrar por
+    categoría con un índice: "Alimentación " -> "alimentacion".
+    
+    Args:
+        category: Categoría tal como se guarda
+        
+    Returns:
+        str: Clave de la categoría
+    """
+    decomposed = unicodedata.normalize("NFKD", category.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split())
+
 class Transaction(BaseModel):
     """
     Modelo de Transacción para GastoSmart
@@ -150,6 +170,9 @@ class TransactionResponse(BaseModel):
     updated_at: Optional[datetime]
     currency: str
 
+# Campos que se pueden pedir con fields= en el listado de transacciones
+TRANSACTION_FIELDS = tuple(TransactionResponse.model_fields)
+
 class TransactionUpdate(BaseModel):
     """
     Modelo para actualizar una transacción existente
@@ -157,7 +180,7 @@ class TransactionUpdate(BaseModel):
     amount: Optional[float] = Field(None, gt=0)
     category: Optional[str] = Field(None, min_length=1)
     description: Optional[str] = Field(None, max_length=500)
-    date: Optional[datetime]
+    date: Optional[datetime] = None
     
     @validator('amount')
     def validate_amount(cls, v):
@@ -176,7 +199,10 @@ class TransactionFilter(BaseModel):
     Modelo para filtros de búsqueda de transacciones
     """
     type: Optional[TransactionType] = None
-    category: Optional[str] = None
+    category: Optional[str] = Field(
+        None, description="Inicio de la categoría, sin distinguir mayúsculas ni tildes"
+    )
+    category_exact: bool = Field(False, description="Exigir la categoría completa en lugar del prefijo")
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     amount_min: Optional[float] = Field(None, ge=0)
@@ -201,3 +227,87 @@ class TransactionStats(BaseModel):
     expense_count: int = 0
     period_start: Optional[datetime] = None
     period_end: Optional[datetime] = None
+
+class TransactionChanges(BaseModel):
+    """
+    Cambios de las transacciones de un usuario desde una versión
+
+    Sin versión de partida (reset=True) changes trae todas las transacciones,
+    por páginas: con has_more, after indica desde qué ID sigue la recarga.
+    """
+    changes: List[TransactionResponse] = []
+    deleted: List[str] = Field(default=[], description="IDs de transacciones eliminadas")
+    version: int = Field(0, description="Versión hasta la que llegan los cambios")
+    has_more: bool = False
+    reset: bool = False
+    after: Optional[str] = Field(None, description="Último ID entregado de una recarga completa que sigue")
+
+class TransactionSyncResponse(BaseModel):
+    """
+    Respuesta de la sincronización incremental de transacciones
+    """
+    changes: List[TransactionResponse] = Field(..., description="Transacciones creadas o actualizadas")
+    deleted: List[str] = Field(..., description="IDs de transacciones eliminadas")
+    sync_token: str = Field(..., description="Token para la siguiente sincronización")
+    has_more: bool = Field(..., description="Hay más cambios: volver a sincronizar con el token nuevo")
+    reset: bool = Field(..., description="changes trae todas las transacciones: reemplazar la lista local")
+
+class CategoryTotal(BaseModel):
+    """
+    Modelo para el total de una categoría en un período
+    """
+    category: str
+    total: float = 0.0
+    count: int = 0
+
+class AutocompleteSuggestion(BaseModel):
+    """
+    Sugerencia de autocompletado para el formulario de transacciones
+    """
+    field: Literal["category", "description"] = Field(..., description="Campo que se completa")
+    value: str = Field(..., description="Texto sugerido (la forma usada más recientemente)")
+    count: int = Field(..., description="Veces que el usuario lo usó en sus transacciones recientes")
+
+class TransactionBulkSelection(BaseModel):
+    """
+    Transacciones afectadas por una operación masiva: una lista de IDs o
+    un filtro (el mismo del listado), no ambos
+    """
+    ids: Optional[List[str]] = Field(None, description="IDs de las transacciones")
+    filters: Optional[TransactionFilter] = Field(None, description="Filtro de las transacciones")
+
+    @validator('filters', always=True)
+    def validate_selection(cls, v, values):
+        ids = values.get('ids')
+        if (ids is None) == (v is None):
+            raise ValueError('Indique ids o filters (solo uno de los dos)')
+        if ids is not None and not ids:
+            raise ValueError('La lista de IDs está vacía')
+        # Un filtro vacío seleccionaría todas las transacciones del usuario
+        if v is not None and not any(v.dict(exclude={'category_exact'}).values()):
+            raise ValueError('El filtro debe tener al menos un criterio')
+        return v
+
+class TransactionBulkUpdate(TransactionBulkSelection):
+    """
+    Modelo para actualizar varias transacciones con los mismos cambios
+    """
+    changes: TransactionUpdate
+
+    @validator('changes')
+    def validate_changes(cls, v):
+        if not any(value is not None for value in v.dict().values()):
+            raise ValueError('Indique al menos un campo a cambiar')
+        return v
+
+class TransactionBulkDelete(TransactionBulkSelection):
+    """
+    Modelo para eliminar varias transacciones
+    """
+
+class TransactionBulkResult(BaseModel):
+    """
+    Resultado de una operación masiva
+    """
+    count: int = Field(..., description="Transacciones afectadas")
+    ids: List[str] = Field(..., description="IDs de las transacciones afectadas")
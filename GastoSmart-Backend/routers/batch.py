@@ -0,0 +1,189 @@
+"""
+Endpoint de Peticiones en Lote
+
+En redes móviles lentas cada llamada a la API paga un viaje de ida y
+vuelta completo. POST /api/batch recibe varias operaciones y las ejecuta
+dentro del mismo proceso, pasando por el enrutador de la aplicación (las
+mismas rutas, dependencias y validaciones) sin nuevas peticiones HTTP.
+
+- Las lecturas (GET) consecutivas se ejecutan en paralelo; cada
+  escritura espera a las operaciones anteriores y se ejecuta sola, así
+  que una lectura posterior ve sus cambios
+- Cada operación tiene su propio código de estado: un error no detiene
+  el resto del lote
+- El lote se limita en número de operaciones (BATCH_MAX_OPERATIONS) y en
+  costo total (BATCH_MAX_COST): lecturas 1, escrituras 2, estadísticas y
+  exportaciones 3, panel principal 5
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from middleware.concurrency import classify_request, RequestPriority
+from middleware.tracing import TracedRoute
+from models.batch import BatchOperation, BatchRequest, BatchResponse, BatchResult
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Crear router para las peticiones en lote
+router = APIRouter(prefix="/api/batch", tags=["lote"], route_class=TracedRoute)
+
+# Límites de cada lote
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "20"))
+BATCH_MAX_COST = int(os.getenv("BATCH_MAX_COST", "40"))
+
+# Costo de cada operación según su prioridad en el limitador de concurrencia
+OPERATION_COST = {
+    RequestPriority.NORMAL: 1,
+    RequestPriority.CRITICAL: 2,
+    RequestPriority.LOW: 3
+}
+# El panel principal hace seis consultas
+DASHBOARD_COST = 5
+
+# Datos de la petición del lote que heredan las operaciones (incluye los
+# manejadores de excepciones de FastAPI para que los errores se respondan igual)
+INHERITED_SCOPE_KEYS = (
+    "asgi", "http_version", "scheme", "server", "client", "root_path",
+    "app", "state", "extensions", "starlette.exception_handlers"
+)
+
+batch_operations = registry.counter(
+    "gastosmart_batch_operations",
+    "Operaciones ejecutadas dentro de peticiones en lote por método y clase de estado",
+    ("method", "status")
+)
+
+def operation_cost(operation: BatchOperation) -> int:
+    """
+    Calcular el costo de una operación del lote
+
+    Args:
+        operation: Operación
+
+    Returns:
+        int: Costo que cuenta contra BATCH_MAX_COST
+    """
+    path = operation.path.partition("?")[0]
+    if path.startswith("/api/dashboard"):
+        return DASHBOARD_COST
+    return OPERATION_COST[classify_request(operation.method, path)]
+
+async def run_operation(request: Request, operation: BatchOperation) -> BatchResult:
+    """
+    Ejecutar una operación con el enrutador de la aplicación
+
+    Args:
+        request: Petición del lote
+        operation: Operación a ejecutar
+
+    Returns:
+        BatchResult: Código de estado y respuesta de la operación
+    """
+    path, _, query = operation.path.partition("?")
+    body = b"" if operation.body is None else json.dumps(operation.body).encode()
+
+    headers = [(name, value) for name, value in request.scope["headers"]
+               if name not in (b"content-type", b"content-length")]
+    if operation.body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+    scope = {key: request.scope[key] for key in INHERITED_SCOPE_KEYS if key in request.scope}
+    scope.update({
+        "type": "http",
+        "method": operation.method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers
+    })
+
+    body_sent = False
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            return {"type": "http.disconnect"}
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    response = {"status": 500, "content_type": "", "body": []}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            for name, value in message.get("headers", []):
+                if name == b"content-type":
+                    response["content_type"] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    try:
+        await request.app.router(scope, receive, send)
+    except Exception as e:
+        logger.error(f"Error en la operación {operation.method} {path} del lote: {e}")
+        result = BatchResult(id=operation.id, status=500, body={"detail": "Error interno del servidor"})
+    else:
+        content = b"".join(response["body"])
+        if not content:
+            data = None
+        elif response["content_type"].startswith("application/json"):
+            data = json.loads(content)
+        else:
+            data = content.decode("utf-8", errors="replace")
+        result = BatchResult(id=operation.id, status=response["status"], body=data)
+
+    batch_operations.inc(labelvalues=(operation.method, f"{result.status // 100}xx"))
+    return result
+
+@router.post("", response_model=BatchResponse)
+async def execute_batch(batch: BatchRequest, request: Request):
+    """
+    Ejecutar varias operaciones de la API en una sola petición
+
+    Args:
+        batch: Operaciones en el orden en que se aplican
+        request: Petición HTTP (las operaciones heredan sus cabeceras)
+
+    Returns:
+        BatchResponse: Un resultado por operación, en el mismo orden
+
+    Raises:
+        HTTPException: Si el lote supera el número de operaciones o el costo permitidos
+    """
+    operations = batch.operations
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"El lote supera el máximo de {BATCH_MAX_OPERATIONS} operaciones"
+        )
+    cost = sum(operation_cost(operation) for operation in operations)
+    if cost > BATCH_MAX_COST:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"El costo del lote ({cost}) supera el máximo de {BATCH_MAX_COST}"
+        )
+
+    results: List[Optional[BatchResult]] = [None] * len(operations)
+    reads: List[int] = []
+
+    async def run_reads():
+        outcomes = await asyncio.gather(*[run_operation(request, operations[i]) for i in reads])
+        for index, outcome in zip(reads, outcomes):
+            results[index] = outcome
+        reads.clear()
+
+    for index, operation in enumerate(operations):
+        if operation.method == "GET":
+            reads.append(index)
+            continue
+        # Las escrituras ven el efecto de todo lo anterior y las lecturas siguientes ven el suyo
+        await run_reads()
+        results[index] = await run_operation(request, operation)
+    await run_reads()
+
+    return BatchResponse(results=results)
@@ -0,0 +1,141 @@
+"""
+Endpoint del Panel Principal
+
+El panel principal y la pantalla de ingresos y gastos pedían el usuario,
+el listado completo de transacciones (dos veces) y los totales por
+separado, y luego filtraban y sumaban en JavaScript. GET /api/dashboard
+devuelve todo en una respuesta; las consultas se hacen en paralelo con
+asyncio.gather.
+"""
+
+import asyncio
+import math
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Tuple
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, HTTPException, Depends, status, Query
+
+from config.regional import TIMEZONE
+from database.backends import BaseTransactionOperations, BaseUserOperations
+from models.dashboard import BudgetStatus, DashboardResponse
+from models.transaction import TransactionFilter, TransactionSort
+from models.user import BudgetPeriod
+from middleware.tracing import TracedRoute
+from routers.transactions import get_transaction_operations
+from routers.users import get_user_operations
+
+# Crear router para el panel principal
+router = APIRouter(prefix="/api/dashboard", tags=["panel"], route_class=TracedRoute)
+
+# Umbral de "gastos altos" que usaba income-expenses.js
+HIGH_EXPENSE_THRESHOLD = 600000.0
+
+def current_period(period: BudgetPeriod, today: date) -> Tuple[datetime, datetime]:
+    """
+    Calcular el período de presupuesto que contiene una fecha
+
+    Las quincenas van del 1 al 15 y del 16 al fin de mes.
+
+    Args:
+        period: Período del presupuesto del usuario
+        today: Fecha de referencia
+
+    Returns:
+        Tuple[datetime, datetime]: Inicio y fin (inclusivo) del período
+    """
+    last_day = monthrange(today.year, today.month)[1]
+    if period == BudgetPeriod.BYWEEKLY:
+        first, last = (1, 15) if today.day <= 15 else (16, last_day)
+    else:
+        first, last = 1, last_day
+
+    start = datetime(today.year, today.month, first)
+    end = datetime(today.year, today.month, last) + timedelta(days=1) - timedelta(microseconds=1)
+    return start, end
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    user_id: str = Query(..., description="ID del usuario"),
+    recent_limit: int = Query(10, ge=1, le=100, description="Transacciones recientes a devolver"),
+    top_categories: int = Query(5, ge=1, le=50, description="Categorías de gasto a devolver"),
+    high_expense_threshold: float = Query(HIGH_EXPENSE_THRESHOLD, gt=0, description="Monto a partir del cual un gasto es alto"),
+    high_expense_limit: int = Query(20, ge=1, le=100, description="Gastos altos a devolver"),
+    user_ops: BaseUserOperations = Depends(get_user_operations),
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
+):
+    """
+    Obtener todo lo que necesita el panel principal en una sola respuesta
+
+    Incluye el resumen del usuario, el estado del presupuesto en el período
+    actual, los totales históricos y del período, las transacciones
+    recientes, las categorías con más gasto del período y los gastos más
+    recientes por encima del umbral (amount > high_expense_threshold).
+
+    Args:
+        user_id: ID del usuario
+        recent_limit: Transacciones recientes a devolver
+        top_categories: Categorías de gasto a devolver
+        high_expense_threshold: Monto a partir del cual un gasto es alto
+        high_expense_limit: Gastos altos a devolver
+        user_ops: Operaciones de usuario
+        transaction_ops: Operaciones de transacciones
+
+    Returns:
+        DashboardResponse: Datos del panel principal
+
+    Raises:
+        HTTPException: Si el usuario no existe o hay error en el servidor
+    """
+    try:
+        # El período depende del usuario, así que se consulta primero
+        user = await user_ops.get_user_by_id(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuario no encontrado"
+            )
+
+        period_start, period_end = current_period(user.budget_period, datetime.now(ZoneInfo(TIMEZONE)).date())
+        # amount_min es inclusivo: el siguiente float sobre el umbral equivale a amount > umbral
+        high_filter = TransactionFilter(type="expense", amount_min=math.nextafter(high_expense_threshold, math.inf))
+
+        totals, period_totals, recent, categories, high = await asyncio.gather(
+            transaction_ops.get_transaction_stats(user_id),
+            transaction_ops.get_transaction_stats(user_id, period_start, period_end),
+            # Orden por defecto: lo responde la caché de transacciones recientes
+            transaction_ops.get_user_transactions(user_id, 0, recent_limit, None, TransactionSort()),
+            transaction_ops.get_category_totals(user_id, "expense", period_start, period_end, top_categories),
+            transaction_ops.get_user_transactions(user_id, 0, high_expense_limit, high_filter, TransactionSort())
+        )
+
+        spent = period_totals.total_expense
+        budget = BudgetStatus(
+            period=user.budget_period,
+            period_start=period_start,
+            period_end=period_end,
+            budget=user.initial_budget,
+            spent=spent,
+            remaining=user.initial_budget - spent,
+            used_percentage=round(spent / user.initial_budget * 100, 2) if user.initial_budget else 0.0
+        )
+
+        return DashboardResponse(
+            user=user,
+            budget=budget,
+            totals=totals,
+            period_totals=period_totals,
+            recent_transactions=recent,
+            top_categories=categories,
+            high_expense_threshold=high_expense_threshold,
+            high_expenses=high
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al obtener el panel principal"
+        )
@@ -0,0 +1,138 @@
+"""
+Endpoints de Actualizaciones en Vivo
+
+Canal de eventos por usuario para que el frontend vea los cambios hechos
+desde otro dispositivo sin volver a pedir el listado ni las estadísticas.
+Se ofrece como Server-Sent Events (GET /api/live/events, recomendado:
+funciona sobre HTTP normal y el navegador reconecta solo) y como
+WebSocket (/api/live/ws). Los eventos se describen en services/live_updates.py.
+"""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, status, Query, WebSocket
+from fastapi.responses import StreamingResponse
+
+from database.backends import BaseUserOperations
+from middleware.tracing import TracedRoute
+from routers.users import get_user_operations
+from services.live_updates import live_hub, HEARTBEAT, LIVE_HEARTBEAT_S
+
+# Crear router para las actualizaciones en vivo
+router = APIRouter(prefix="/api/live", tags=["en vivo"], route_class=TracedRoute)
+
+# Códigos de cierre de WebSocket: usuario inválido y límite de conexiones alcanzado
+WS_POLICY_VIOLATION = 1008
+WS_TRY_AGAIN_LATER = 1013
+
+@router.get("/events")
+async def live_events(
+    user_id: str = Query(..., description="ID del usuario"),
+    user_ops: BaseUserOperations = Depends(get_user_operations)
+):
+    """
+    Abrir un flujo de Server-Sent Events con los cambios del usuario
+
+    La conexión no pasa por el limitador de concurrencia: queda abierta
+    sin consumir recursos mientras no haya eventos. Al reconectar, el
+    cliente debe sincronizar con /api/transactions/sync para recuperar lo
+    que cambió mientras estuvo desconectado.
+
+    Con varios workers, los cambios hechos en otro worker solo llegan si
+    corre el bus de invalidación (MongoDB con replica set); con los
+    backends memory y sqlite use un solo worker.
+
+    Args:
+        user_id: ID del usuario
+        user_ops: Operaciones de usuario
+
+    Returns:
+        StreamingResponse: Flujo text/event-stream
+
+    Raises:
+        HTTPException: Si el usuario no existe o no se aceptan más conexiones
+    """
+    if not live_hub.enabled or live_hub.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Actualizaciones en vivo no disponibles"
+        )
+
+    if not await user_ops.get_user_by_id(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+
+    async def stream():
+        # La suscripción se hace dentro del generador para que el finally
+        # la quite aunque el cliente se desconecte antes del primer evento
+        queue = live_hub.subscribe(user_id)
+        if queue is None:
+            yield b"event: resync\ndata: {}\n\n"
+            return
+        try:
+            yield f"retry: {int(LIVE_HEARTBEAT_S * 1000)}\n\n".encode()
+            while True:
+                message = await queue.get()
+                if message is HEARTBEAT:
+                    yield b": ping\n\n"
+                else:
+                    event, data = message
+                    yield f"event: {event}\ndata: {data}\n\n".encode()
+        finally:
+            live_hub.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # Sin caché ni buffering en proxies (nginx) para que los eventos lleguen al instante
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def live_websocket(
+    websocket: WebSocket,
+    user_id: str = Query(..., description="ID del usuario"),
+    user_ops: BaseUserOperations = Depends(get_user_operations)
+):
+    """
+    Canal WebSocket con los mismos eventos que /api/live/events
+
+    Cada mensaje es un JSON {"event": ..., "data": ...}; los latidos
+    llegan como {"event": "ping"}.
+
+    Args:
+        websocket: Conexión WebSocket
+        user_id: ID del usuario
+        user_ops: Operaciones de usuario
+    """
+    if not await user_ops.get_user_by_id(user_id):
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return
+
+    queue = live_hub.subscribe(user_id) if live_hub.enabled else None
+    if queue is None:
+        await websocket.close(code=WS_TRY_AGAIN_LATER)
+        return
+
+    async def forward():
+        while True:
+            message = await queue.get()
+            if message is HEARTBEAT:
+                await websocket.send_text('{"event":"ping"}')
+            else:
+                event, data = message
+                await websocket.send_text(f'{{"event":"{event}","data":{data}}}')
+
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(forward())
+        try:
+            # Los mensajes del cliente se ignoran; solo interesa detectar el cierre
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+    finally:
+        live_hub.unsubscribe(user_id, queue)
@@ -6,39 +6,61 @@ relacionadas con transacciones financieras en GastoSmart.
 Implementa el requerimiento RQF-005: Registro de ingreso.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response
+from fastapi.responses import JSONResponse
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime
-from database.connection import get_async_database
-from database.transaction_operations import TransactionOperations
+import base64
+import hashlib
+import logging
+import time
+from database.backends import BaseTransactionOperations
+from database.backends.base import SYNC_TOMBSTONE_TTL_DAYS
+from database.storage import storage
+from services.recent_cache import recent_cache
+from services.live_updates import live_hub
+from services.single_flight import request_coalescer
+from services.autocomplete import autocomplete_index
+from services.invalidation import invalidation_bus
 from models.transaction import (
     TransactionCreate, TransactionResponse, TransactionUpdate,
-    TransactionFilter, TransactionSort, TransactionStats
+    TransactionFilter, TransactionSort, TransactionStats, TransactionSyncResponse,
+    TransactionBulkUpdate, TransactionBulkDelete, TransactionBulkResult, TRANSACTION_FIELDS,
+    TransactionType, AutocompleteSuggestion
+)
+from middleware.tracing import TracedRoute
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+conditional_requests = registry.counter(
+    "gastosmart_conditional_requests",
+    "Lecturas con ETag por resultado (not_modified = 304 sin consultar la base de datos)",
+    ("result",)
 )
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
 # Crear router para transacciones
-router = APIRouter(prefix="/api/transactions", tags=["transacciones"])
+router = APIRouter(prefix="/api/transactions", tags=["transacciones"], route_class=TracedRoute)
 
-def get_transaction_operations(db: AsyncIOMotorDatabase = Depends(get_async_database)) -> TransactionOperations:
+def get_transaction_operations() -> BaseTransactionOperations:
     """
     Obtener instancia de operaciones de transacciones
     
-    Args:
-        db: Base de datos MongoDB
-        
     Returns:
-        TransactionOperations: Instancia para operaciones de transacciones
+        BaseTransactionOperations: Operaciones del backend configurado (STORAGE_BACKEND),
+            con la caché de transacciones recientes, los eventos en vivo, el índice de
+            autocompletado, la agrupación de lecturas idénticas concurrentes y el
+            registro de escrituras propias del bus de invalidación
     """
-    # Usar la colección de transacciones
-    transactions_collection = db.transactions
-    return TransactionOperations(transactions_collection)
+    return live_hub.wrap(autocomplete_index.wrap(recent_cache.wrap(
+        request_coalescer.wrap_transactions(invalidation_bus.wrap(storage.transaction_operations()))
+    )))
 
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction_data: TransactionCreate,
     user_id: str = Query(..., description="ID del usuario"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Crear una nueva transacción (ingreso o gasto)
@@ -90,14 +112,23 @@ async def get_transactions(
     skip: int = Query(0, ge=0, description="Número de transacciones a saltar"),
     limit: int = Query(100, ge=1, le=1000, description="Límite de transacciones a devolver"),
     transaction_type: Optional[str] = Query(None, description="Tipo de transacción (income/expense)"),
-    category: Optional[str] = Query(None, description="Categoría de la transacción"),
+    category: Optional[str] = Query(
+        None, description="Categoría de la transacción (prefijo, sin distinguir mayúsculas ni tildes)"
+    ),
+    category_exact: bool = Query(False, description="Filtrar por la categoría completa en lugar del prefijo"),
     date_from: Optional[datetime] = Query(None, description="Fecha de inicio del filtro"),
     date_to: Optional[datetime] = Query(None, description="Fecha de fin del filtro"),
     amount_min: Optional[float] = Query(None, ge=0, description="Monto mínimo"),
     amount_max: Optional[float] = Query(None, ge=0, description="Monto máximo"),
     sort_by: str = Query("date", description="Campo por el cual ordenar"),
     sort_order: str = Query("desc", description="Orden de clasificación (asc/desc)"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    fields: Optional[str] = Query(
+        None,
+        description="Campos a devolver separados por comas, ej: date,amount,category,type (id siempre se incluye)"
+    ),
+    request: Request = None,
+    response: Response = None,
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Obtener transacciones del usuario con filtros y ordenamiento
@@ -106,30 +137,47 @@ async def get_transactions(
     y opciones de ordenamiento, incluyendo el algoritmo merge-sort
     implementado en el frontend.
     
+    Con fields= cada transacción trae solo los campos pedidos (y su id):
+    la base de datos lee solo esas columnas y la respuesta es más liviana.
+    
     Args:
         user_id: ID del usuario
         skip: Número de transacciones a saltar (paginación)
         limit: Límite de transacciones a devolver
         transaction_type: Filtrar por tipo de transacción
-        category: Filtrar por categoría
+        category: Filtrar por categoría (inicio de la clave normalizada)
+        category_exact: Exigir la categoría completa
         date_from: Fecha de inicio del filtro
         date_to: Fecha de fin del filtro
         amount_min: Monto mínimo
         amount_max: Monto máximo
         sort_by: Campo por el cual ordenar
         sort_order: Orden de clasificación
+        fields: Campos a devolver (todos si no se indica)
+        request: Petición (para el ETag)
+        response: Respuesta (para el ETag)
         transaction_ops: Operaciones de transacciones
         
     Returns:
         List[TransactionResponse]: Lista de transacciones filtradas y ordenadas
+            (304 sin cuerpo si coincide If-None-Match)
+        
+    Raises:
+        HTTPException: Si fields tiene campos desconocidos o hay error en el servidor
     """
+    selected_fields = parse_fields(fields)
     try:
+        not_modified = await check_not_modified(request, response, transaction_ops, user_id)
+        if not_modified:
+            return not_modified
+        
         # Construir filtros
         filters = None
         if any([transaction_type, category, date_from, date_to, amount_min, amount_max]):
             filters = TransactionFilter(
                 type=transaction_type,
                 category=category,
+                category_exact=category_exact,
                 date_from=date_from,
                 date_to=date_to,
                 amount_min=amount_min,
@@ -139,6 +187,20 @@ async def get_transactions(
         # Construir ordenamiento
         sort = TransactionSort(field=sort_by, order=sort_order)
         
+        if selected_fields:
+            # Respuesta parcial: se serializa sin validar contra TransactionResponse
+            rows = await transaction_ops.get_user_transaction_fields(
+                user_id=user_id,
+                fields=selected_fields,
+                skip=skip,
+                limit=limit,
+                filters=filters,
+                sort=sort
+            )
+            return JSONResponse(rows, headers={
+                key: value for key, value in response.headers.items() if key != "content-length"
+            })
+        
         transactions = await transaction_ops.get_user_transactions(
             user_id=user_id,
             skip=skip,
@@ -155,11 +217,292 @@ async def get_transactions(
             detail="Error al obtener transacciones"
         )
 
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Leer el parámetro fields= del listado de transacciones
+    
+    Args:
+        fields: Nombres de campos de TransactionResponse separados por comas
+        
+    Returns:
+        Optional[List[str]]: Campos pedidos más id, en el orden del modelo
+            (None si no se indicó o se pidieron todos)
+        
+    Raises:
+        HTTPException: Si algún campo no existe
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(TRANSACTION_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos: {', '.join(sorted(unknown))}. Disponibles: {', '.join(TRANSACTION_FIELDS)}"
+        )
+    requested.add("id")
+    if len(requested) == len(TRANSACTION_FIELDS):
+        return None
+    return [field for field in TRANSACTION_FIELDS if field in requested]
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    transaction_ops: BaseTransactionOperations,
+    user_id: str
+) -> Optional[Response]:
+    """
+    Responder 304 si el cliente ya tiene el resultado de esta lectura
+    
+    El ETag se deriva de la versión de datos del usuario (cambia con cada
+    escritura de sus transacciones), la ruta y los parámetros de la
+    consulta, así que se compara sin ejecutar la consulta. La versión se lee
+    antes que los datos y solo cuenta escrituras terminadas, y las
+    operaciones de la petición recuerdan la versión leída: la caché de
+    recientes y la agrupación de lecturas solo responden con datos leídos
+    con esa misma versión. Los datos pueden ser más nuevos que el ETag
+    (escritura en medio; la siguiente petición los recibe de nuevo), nunca
+    más viejos.
+    
+    Args:
+        request: Petición (If-None-Match, ruta y parámetros)
+        response: Respuesta del endpoint, donde se agrega el ETag
+        transaction_ops: Operaciones de transacciones
+        user_id: ID del usuario
+        
+    Returns:
+        Optional[Response]: Respuesta 304, o None si hay que ejecutar la consulta
+    """
+    try:
+        version = await transaction_ops.get_version(user_id)
+    except Exception as e:
+        # Sin versión se responde normalmente, sin ETag
+        logger.warning(f"No se pudo obtener la versión de datos del usuario {user_id}: {e}")
+        return None
+    
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{version}|{request.url.path}|{query}".encode(), digest_size=12).hexdigest()
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [value.strip() for value in if_none_match.split(",")]:
+        conditional_requests.inc(labelvalues=("not_modified",))
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    conditional_requests.inc(labelvalues=("modified",))
+    response.headers.update(headers)
+    return None
+
+def encode_sync_token(version: int, after: Optional[str] = None) -> str:
+    """
+    Construir el token de sincronización (versión, momento de emisión y,
+    en una recarga completa que sigue, el último ID entregado)
+    
+    Args:
+        version: Versión hasta la que llegan los cambios entregados
+        after: Último ID entregado de una recarga completa con más páginas
+        
+    Returns:
+        str: Token opaco para el cliente
+    """
+    token = f"{version}.{int(time.time())}" + (f".{after}" if after else "")
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+def decode_sync_token(token: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Leer la versión de un token de sincronización
+    
+    Args:
+        token: Token recibido del cliente
+        
+    Returns:
+        Tuple[Optional[int], Optional[str]]: Versión (None si no hay token, es
+            inválido o es más viejo que las marcas de eliminación: el cliente
+            debe recargar todo) y el ID desde el que sigue una recarga completa
+    """
+    if not token:
+        return None, None
+    try:
+        version, issued, *after = base64.urlsafe_b64decode(token.encode()).decode().split(".", 2)
+        version, issued = int(version), int(issued)
+    except (ValueError, UnicodeDecodeError):
+        return None, None
+    if version < 0 or issued < time.time() - SYNC_TOMBSTONE_TTL_DAYS * 86400:
+        return None, None
+    return version, (after[0] if after else None)
+
+@router.get("/sync", response_model=TransactionSyncResponse)
+async def sync_transactions(
+    user_id: str = Query(..., description="ID del usuario"),
+    sync_token: Optional[str] = Query(None, description="Token de la sincronización anterior"),
+    limit: int = Query(500, ge=1, le=1000, description="Límite de cambios a devolver"),
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
+):
+    """
+    Sincronizar las transacciones del usuario de forma incremental
+    
+    Sin token (o con uno inválido o vencido) devuelve todas las
+    transacciones con reset=true. Con el token de la respuesta anterior
+    devuelve solo las transacciones creadas o actualizadas y los IDs de las
+    eliminadas desde entonces; si nada cambió la respuesta está vacía. Con
+    has_more=true hay que volver a llamar con el token nuevo (también en la
+    recarga completa, que llega por páginas: solo la primera trae
+    reset=true, las siguientes se agregan a la lista).
+    
+    Args:
+        user_id: ID del usuario
+        sync_token: Token de la sincronización anterior
+        limit: Límite de cambios a devolver
+        transaction_ops: Operaciones de transacciones
+        
+    Returns:
+        TransactionSyncResponse: Cambios y token para la siguiente sincronización
+    """
+    try:
+        since, after = decode_sync_token(sync_token)
+        changes = await transaction_ops.get_changes(user_id, since, limit, after)
+        
+        return TransactionSyncResponse(
+            changes=changes.changes,
+            deleted=changes.deleted,
+            sync_token=encode_sync_token(changes.version, changes.after),
+            has_more=changes.has_more,
+            reset=changes.reset
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al sincronizar transacciones"
+        )
+
+@router.get("/autocomplete", response_model=List[AutocompleteSuggestion])
+async def autocomplete(
+    user_id: str = Query(..., description="ID del usuario"),
+    q: str = Query("", max_length=100, description="Texto escrito (sin distinguir mayúsculas ni tildes)"),
+    field: Optional[Literal["category", "description"]] = Query(None, description="Campo a completar (ambos si no se indica)"),
+    transaction_type: Optional[TransactionType] = Query(None, description="Tipo de transacción (income/expense)"),
+    limit: int = Query(10, ge=1, le=50, description="Máximo de sugerencias"),
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
+):
+    """
+    Sugerir categorías y descripciones mientras el usuario escribe
+    
+    Las sugerencias salen de un índice en memoria con los términos de las
+    transacciones recientes del usuario, ordenados por frecuencia y
+    recencia; solo la primera búsqueda consulta la base de datos.
+    
+    Args:
+        user_id: ID del usuario
+        q: Inicio del texto a completar
+        field: Campo a completar
+        transaction_type: Sugerir solo términos usados en ese tipo de transacción
+        limit: Máximo de sugerencias
+        transaction_ops: Operaciones de transacciones
+        
+    Returns:
+        List[AutocompleteSuggestion]: Sugerencias de la más a la menos probable
+    """
+    try:
+        return await autocomplete_index.suggest(
+            transaction_ops,
+            user_id,
+            q,
+            field=field,
+            transaction_type=transaction_type.value if transaction_type else None,
+            limit=limit
+        )
+    except Exception as e:
+        logger.error(f"Error en el autocompletado del usuario {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al obtener sugerencias"
+        )
+
+@router.post("/bulk/update", response_model=TransactionBulkResult)
+async def update_transactions(
+    bulk_data: TransactionBulkUpdate,
+    user_id: str = Query(..., description="ID del usuario"),
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
+):
+    """
+    Aplicar los mismos cambios a varias transacciones
+    
+    Las transacciones se eligen por lista de IDs o por filtro (igual que en
+    el listado). Los IDs que no existen o son de otro usuario se ignoran.
+    
+    Args:
+        bulk_data: Selección de transacciones y cambios a aplicar
+        user_id: ID del usuario propietario
+        transaction_ops: Operaciones de transacciones
+        
+    Returns:
+        TransactionBulkResult: Número e IDs de las transacciones actualizadas
+        
+    Raises:
+        HTTPException: Si la selección supera BULK_MAX_TRANSACTIONS o hay error en el servidor
+    """
+    try:
+        ids = await transaction_ops.update_transactions(
+            user_id, bulk_data.changes, ids=bulk_data.ids, filters=bulk_data.filters
+        )
+        return TransactionBulkResult(count=len(ids), ids=ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error en la actualización masiva del usuario {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al actualizar transacciones"
+        )
+
+@router.post("/bulk/delete", response_model=TransactionBulkResult)
+async def delete_transactions(
+    bulk_data: TransactionBulkDelete,
+    user_id: str = Query(..., description="ID del usuario"),
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
+):
+    """
+    Eliminar varias transacciones
+    
+    Las transacciones se eligen por lista de IDs o por filtro (igual que en
+    el listado). Los IDs que no existen o son de otro usuario se ignoran.
+    
+    Args:
+        bulk_data: Selección de transacciones a eliminar
+        user_id: ID del usuario propietario
+        transaction_ops: Operaciones de transacciones
+        
+    Returns:
+        TransactionBulkResult: Número e IDs de las transacciones eliminadas
+        
+    Raises:
+        HTTPException: Si la selección supera BULK_MAX_TRANSACTIONS o hay error en el servidor
+    """
+    try:
+        ids = await transaction_ops.delete_transactions(user_id, ids=bulk_data.ids, filters=bulk_data.filters)
+        return TransactionBulkResult(count=len(ids), ids=ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error en la eliminación masiva del usuario {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al eliminar transacciones"
+        )
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: str,
     user_id: str = Query(..., description="ID del usuario"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Obtener una transacción específica por ID
@@ -190,7 +533,7 @@ async def update_transaction(
     transaction_id: str,
     update_data: TransactionUpdate,
     user_id: str = Query(..., description="ID del usuario"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Actualizar una transacción existente
@@ -233,7 +576,7 @@ async def update_transaction(
 async def delete_transaction(
     transaction_id: str,
     user_id: str = Query(..., description="ID del usuario"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Eliminar una transacción
@@ -259,7 +602,9 @@ async def get_transaction_stats(
     user_id: str = Query(..., description="ID del usuario"),
     date_from: Optional[datetime] = Query(None, description="Fecha de inicio del período"),
     date_to: Optional[datetime] = Query(None, description="Fecha de fin del período"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    request: Request = None,
+    response: Response = None,
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Obtener estadísticas de transacciones del usuario
@@ -271,12 +616,18 @@ async def get_transaction_stats(
         user_id: ID del usuario
         date_from: Fecha de inicio del período de análisis
         date_to: Fecha de fin del período de análisis
+        request: Petición (para el ETag)
+        response: Respuesta (para el ETag)
         transaction_ops: Operaciones de transacciones
         
     Returns:
-        TransactionStats: Estadísticas de transacciones
+        TransactionStats: Estadísticas de transacciones (304 sin cuerpo si coincide If-None-Match)
     """
     try:
+        not_modified = await check_not_modified(request, response, transaction_ops, user_id)
+        if not_modified:
+            return not_modified
+        
         stats = await transaction_ops.get_transaction_stats(user_id, date_from, date_to)
         return stats
         
@@ -290,7 +641,9 @@ async def get_transaction_stats(
 async def get_categories(
     user_id: str = Query(..., description="ID del usuario"),
     transaction_type: Optional[str] = Query(None, description="Tipo de transacción (income/expense)"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    request: Request = None,
+    response: Response = None,
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Obtener lista de categorías utilizadas por el usuario
@@ -298,12 +651,18 @@ async def get_categories(
     Args:
         user_id: ID del usuario
         transaction_type: Filtrar por tipo de transacción
+        request: Petición (para el ETag)
+        response: Respuesta (para el ETag)
         transaction_ops: Operaciones de transacciones
         
     Returns:
-        List[str]: Lista de categorías únicas
+        List[str]: Lista de categorías únicas (304 sin cuerpo si coincide If-None-Match)
     """
     try:
+        not_modified = await check_not_modified(request, response, transaction_ops, user_id)
+        if not_modified:
+            return not_modified
+        
         categories = await transaction_ops.get_categories(user_id, transaction_type)
         return {"categories": categories}
         
@@ -319,7 +678,7 @@ async def search_transactions(
     query: str = Query(..., min_length=1, description="Término de búsqueda"),
     skip: int = Query(0, ge=0, description="Número de transacciones a saltar"),
     limit: int = Query(50, ge=1, le=100, description="Límite de transacciones a devolver"),
-    transaction_ops: TransactionOperations = Depends(get_transaction_operations)
+    transaction_ops: BaseTransactionOperations = Depends(get_transaction_operations)
 ):
     """
     Buscar transacciones por texto
@@ -8,33 +8,35 @@ relacionadas con usuarios en GastoSmart.
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer
 from typing import List
-from database.connection import get_async_database
-from database.user_operations import UserOperations
+import logging
+from database.backends import BaseUserOperations
+from database.storage import storage
+from services.single_flight import request_coalescer
 from models.user import UserCreate, UserResponse, UserLogin, BudgetUpdate, VerificationCodeRequest, VerificationCodeConfirm
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from middleware.tracing import TracedRoute
+
+logger = logging.getLogger(__name__)
 
 # Crear router para usuarios
-router = APIRouter(prefix="/api/users", tags=["usuarios"])
+router = APIRouter(prefix="/api/users", tags=["usuarios"], route_class=TracedRoute)
 
 # Configurar autenticación 
 security = HTTPBearer()
 
-def get_user_operations(db: AsyncIOMotorDatabase = Depends(get_async_database)) -> UserOperations:
+def get_user_operations() -> BaseUserOperations:
     """
     Obtener instancia de operaciones de usuario
     
-    Args:
-        db: Base de datos MongoDB
-        
     Returns:
-        UserOperations: Instancia para operaciones de usuario
+        BaseUserOperations: Operaciones del backend configurado (STORAGE_BACKEND),
+            con la agrupación de lecturas idénticas concurrentes
     """
-    return UserOperations(db)
+    return request_coalescer.wrap_users(storage.user_operations())
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Registrar un nuevo usuario en GastoSmart
@@ -69,7 +71,7 @@ async def register_user(
 @router.post("/login", response_model=UserResponse)
 async def login_user(
     login_data: UserLogin,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Iniciar sesión de usuario
@@ -86,24 +88,24 @@ async def login_user(
     Raises:
         HTTPException: Si las credenciales son inválidas
     """
-    print(f"[DEBUG] Login attempt for email: {login_data.email}")
+    logger.debug(f"Login attempt for email: {login_data.email}")
     
     user = await user_ops.authenticate_user(login_data)
     
     if not user:
-        print(f"[DEBUG] Login failed for email: {login_data.email}")
+        logger.debug(f"Login failed for email: {login_data.email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas"
         )
     
-    print(f"[DEBUG] Login successful for user: {user.email}")
+    logger.debug(f"Login successful for user: {user.email}")
     return user
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Obtener información de un usuario por ID
@@ -132,7 +134,7 @@ async def get_user(
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Obtener lista de todos los usuarios (con paginación)
@@ -152,7 +154,7 @@ async def get_all_users(
 async def update_user_budget(
     user_id: str,
     budget_data: BudgetUpdate,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Actualizar presupuesto del usuario
@@ -183,7 +185,7 @@ async def update_user_budget(
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deactivate_user(
     user_id: str,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Desactivar usuario (soft delete)
@@ -206,7 +208,7 @@ async def deactivate_user(
 @router.get("/email/{email}", response_model=UserResponse)
 async def get_user_by_email(
     email: str,
-    user_ops: UserOperations = Depends(get_user_operations)
+    user_ops: BaseUserOperations = Depends(get_user_operations)
 ):
     """
     Obtener usuario por correo electrónico
@@ -234,7 +236,7 @@ async def get_user_by_email(
 @router.post("/send-verification-code")
 async def send_verification_code(
     request: VerificationCodeRequest,
-    user_ops: UserOperations = Depends(get_user_operations)):
+    user_ops: BaseUserOperations = Depends(get_user_operations)):
     """
     Enviar código de verificación por correo
     
@@ -245,8 +247,8 @@ async def send_verification_code(
         # Para registro, verificar que el correo no esté ya verificado
         if request.purpose == "registration":
             # Buscar usuario incluyendo los inactivos
-            user_doc = await user_ops.collection.find_one({"email": request.email})
-            if user_doc and user_doc.get("email_verified", False):
+            user = await user_ops.get_user_by_email_any_status(request.email)
+            if user and user.email_verified:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="El correo electrónico ya está registrado y verificado"
@@ -254,9 +256,8 @@ async def send_verification_code(
         
         # Para recuperación de contraseña, verificar que el usuario existe
         elif request.purpose == "password_recovery":
-            # Verificación directa en la base de datos para mejor rendimiento
-            user_doc = await user_ops.collection.find_one({"email": request.email})
-            if not user_doc:
+            user = await user_ops.get_user_by_email_any_status(request.email)
+            if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="No se encontró una cuenta asociada a este correo electrónico"
@@ -287,7 +288,7 @@ async def send_verification_code(
 @router.post("/verify-code")
 async def verify_code(
     request: VerificationCodeConfirm,
-    user_ops: UserOperations = Depends(get_user_operations)):
+    user_ops: BaseUserOperations = Depends(get_user_operations)):
     """
     Verificar código de verificación
     
@@ -324,7 +325,7 @@ async def verify_code(
 @router.post("/reset-password")
 async def reset_password(
     request: dict,
-    user_ops: UserOperations = Depends(get_user_operations)):
+    user_ops: BaseUserOperations = Depends(get_user_operations)):
     """
     Restablecer contraseña después de verificar código
     
@@ -335,10 +336,10 @@ async def reset_password(
         email = request.get("email")
         new_password = request.get("new_password")
         
-        print(f"[DEBUG] Reset password request for email: {email}")
+        logger.debug(f"Reset password request for email: {email}")
         
         if not email or not new_password:
-            print(f"[DEBUG] Missing email or password: email={email}, password={'***' if new_password else None}")
+            logger.debug(f"Missing email or password: email={email}, password={'***' if new_password else None}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email y nueva contraseña son requeridos"
@@ -346,19 +347,19 @@ async def reset_password(
         
         # Verificar que el usuario existe (cualquier estado)
         user = await user_ops.get_user_by_email_any_status(email)
-        print(f"[DEBUG] User found: {user is not None}")
+        logger.debug(f"User found: {user is not None}")
         if not user:
-            print(f"[DEBUG] User not found for email: {email}")
+            logger.debug(f"User not found for email: {email}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Usuario no encontrado"
             )
         
-        print(f"[DEBUG] User found: {user.email}, is_active: {user.is_active}")
+        logger.debug(f"User found: {user.email}, is_active: {user.is_active}")
         
         # Actualizar la contraseña
         success = await user_ops.update_password(email, new_password)
-        print(f"[DEBUG] Password update success: {success}")
+        logger.debug(f"Password update success: {success}")
         
         if success:
             return {"message": "Contraseña actualizada exitosamente"}
@@ -370,8 +371,8 @@ async def reset_password(
             
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"[DEBUG] Exception in reset_password: {str(e)}")
+    except Exception:
+        logger.exception("Error al restablecer la contraseña")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -0,0 +1,270 @@
+"""
+Lanzador de Producción para GastoSmart
+
+Inicia un proceso maestro que abre el socket de escucha y crea N workers
+con fork. Cada worker se calienta (pool de MongoDB, verificación de
+índices y caché de páginas) en el arranque de la aplicación antes de
+aceptar conexiones del socket compartido. Los workers se reciclan al
+alcanzar un número de peticiones o un techo de memoria, y SIGTERM drena
+las conexiones en curso antes de salir.
+
+Uso:
+    python server.py --workers 4 --port 8000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+logger = logging.getLogger("gastosmart.server")
+
+def default_workers() -> int:
+    """
+    Calcular el número de workers según los núcleos disponibles
+
+    Returns:
+        int: Número de workers (WEB_CONCURRENCY tiene prioridad)
+    """
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.getenv("WEB_CONCURRENCY")))
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+def current_rss_mb() -> float:
+    """
+    Obtener la memoria residente del proceso actual en MB
+
+    Returns:
+        float: Memoria residente (0 si no se puede medir)
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            # ru_maxrss es el pico (KB en Linux, bytes en macOS); sirve como aproximación
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+        except Exception:
+            return 0.0
+
+class Worker:
+    """
+    Proceso worker que sirve la aplicación sobre el socket compartido
+    """
+
+    def __init__(self, sock: socket.socket, args: argparse.Namespace):
+        """
+        Inicializar el worker
+
+        Args:
+            sock: Socket de escucha heredado del proceso maestro
+            args: Argumentos de línea de comandos
+        """
+        self.sock = sock
+        self.args = args
+
+    def run(self) -> None:
+        """Ejecutar el servidor hasta que termine o deba reciclarse"""
+        # Repartir el reciclado para que no se reinicien todos a la vez
+        max_requests = None
+        if self.args.max_requests:
+            max_requests = self.args.max_requests + random.randint(0, self.args.max_requests_jitter)
+
+        config = uvicorn.Config(
+            self.args.app,
+            lifespan="on",
+            access_log=False,
+            limit_max_requests=max_requests,
+            timeout_graceful_shutdown=self.args.graceful_timeout,
+            timeout_keep_alive=self.args.keep_alive
+        )
+        server = uvicorn.Server(config)
+        asyncio.run(self._serve(server))
+        if not server.started:
+            raise RuntimeError("La aplicación no pudo iniciar (revisar conexión a MongoDB)")
+
+    async def _serve(self, server: uvicorn.Server) -> None:
+        """Servir peticiones vigilando el techo de memoria"""
+        watchdog = None
+        if self.args.max_memory_mb:
+            watchdog = asyncio.create_task(self._memory_watchdog(server))
+        try:
+            # uvicorn ejecuta el lifespan (calentamiento) antes de aceptar del socket
+            await server.serve(sockets=[self.sock])
+        finally:
+            if watchdog:
+                watchdog.cancel()
+
+    async def _memory_watchdog(self, server: uvicorn.Server) -> None:
+        """Solicitar un cierre ordenado si el worker supera el techo de memoria"""
+        while not server.should_exit:
+            await asyncio.sleep(self.args.memory_check_interval)
+            rss = current_rss_mb()
+            if rss > self.args.max_memory_mb:
+                logger.warning(
+                    f"Worker {os.getpid()} usa {rss:.0f} MB (máximo {self.args.max_memory_mb} MB); reciclando"
+                )
+                server.should_exit = True
+
+class Arbiter:
+    """
+    Proceso maestro: crea, vigila y recicla los workers
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        """
+        Inicializar el proceso maestro
+
+        Args:
+            args: Argumentos de línea de comandos
+        """
+        self.args = args
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}  # pid -> momento de inicio
+        self.shutting_down = False
+
+    def run(self) -> int:
+        """
+        Abrir el socket, crear los workers y vigilarlos hasta el cierre
+
+        Returns:
+            int: Código de salida del proceso
+        """
+        self.sock = self._bind()
+        logger.info(
+            f"GastoSmart escuchando en http://{self.args.host}:{self.args.port} "
+            f"con {self.args.workers} workers"
+        )
+
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+        signal.signal(signal.SIGALRM, self._handle_kill_timeout)
+
+        for _ in range(self.args.workers):
+            self._spawn_worker()
+
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            started = self.workers.pop(pid, None)
+            if started is None or self.shutting_down:
+                continue
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            if exit_code != 0 and time.monotonic() - started < self.args.min_worker_lifetime:
+                # Un worker que muere al arrancar (p. ej. sin MongoDB) no se recicla en bucle
+                logger.error(f"Worker {pid} falló al iniciar (código {exit_code}); deteniendo servidor")
+                self._handle_shutdown(signal.SIGTERM, None)
+                continue
+
+            logger.info(f"Worker {pid} terminó (código {exit_code}); iniciando reemplazo")
+            self._spawn_worker()
+
+        self.sock.close()
+        return 0
+
+    def _bind(self) -> socket.socket:
+        """Crear el socket de escucha compartido por los workers"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Las conexiones aceptadas heredan TCP_NODELAY; sin él, las respuestas
+        # chunked en keep-alive esperan el ACK retardado (~40 ms) del cliente
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(self.args.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn_worker(self) -> None:
+        """Crear un worker con fork"""
+        pid = os.fork()
+        if pid == 0:
+            # Proceso hijo: restaurar señales para que uvicorn instale las suyas
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGALRM, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                Worker(self.sock, self.args).run()
+            except BaseException:
+                logger.exception(f"Error en worker {os.getpid()}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.workers[pid] = time.monotonic()
+
+    def _handle_shutdown(self, signum, frame) -> None:
+        """Reenviar la señal a los workers para que drenen sus conexiones"""
+        if self.shutting_down:
+            return
+        self.shutting_down = True
+        logger.info(f"Cerrando servidor; esperando hasta {self.args.graceful_timeout}s a los workers")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        signal.alarm(self.args.graceful_timeout + 5)
+
+    def _handle_kill_timeout(self, signum, frame) -> None:
+        """Forzar la salida de los workers que no terminaron a tiempo"""
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Leer los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Servidor de producción de GastoSmart")
+    parser.add_argument("--app", default="main:app", help="Aplicación ASGI a servir")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5, help="Segundos de keep-alive")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "0")),
+                        help="Reciclar el worker tras N peticiones (0 = sin límite)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", "0")))
+    parser.add_argument("--max-memory-mb", type=int, default=int(os.getenv("MAX_WORKER_MEMORY_MB", "0")),
+                        help="Reciclar el worker si supera esta memoria residente (0 = sin límite)")
+    parser.add_argument("--memory-check-interval", type=float, default=10.0)
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--min-worker-lifetime", type=float, default=5.0,
+                        help="Un worker que falla antes de este tiempo detiene el servidor")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    """Punto de entrada del lanzador"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+    args = parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        # Windows no tiene fork: usar el supervisor multiproceso de uvicorn
+        logger.warning("fork no disponible; usando el supervisor de uvicorn sin reciclado por memoria")
+        uvicorn.run(
+            args.app, host=args.host, port=args.port, workers=args.workers,
+            limit_max_requests=args.max_requests or None,
+            timeout_graceful_shutdown=args.graceful_timeout
+        )
+        return 0
+
+    return Arbiter(args).run()
+
+if __name__ == "__main__":
+    sys.exit(main())
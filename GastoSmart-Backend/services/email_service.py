@@ -5,6 +5,7 @@
 import os #Sistema operativo: en el proyecto leer variables de entorno
 import random #Generar códigos de verificación random
 import string #Constante con caracteres, usar para generar 6 digitos
+import logging #Registrar errores de envío
 from datetime import datetime, timedelta #Fecha y hora - diferencia de tiempo
 from typing import Optional #Definir tipo de dato opcional, sea de tipo o none
 
@@ -17,6 +18,8 @@ from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from motor.motor_asyncio import AsyncIOMotorDatabase
 #motor: motor asincronico (driver) para interactuar con la base de datos MongoDB
 
+logger = logging.getLogger(__name__)
+
 class EmailService:
     def __init__(self, database: AsyncIOMotorDatabase):
         
@@ -83,7 +86,7 @@ class EmailService:
             await self.fastmail.send_message(message)
             return True
         except Exception as e:
-            print(f"Error al enviar el correo electrónico: {e}")
+            logger.error(f"Error al enviar el correo electrónico: {e}")
             return False
         
     def _create_email_body(self, code:str, purpose:str, user_name:str = None) -> str:
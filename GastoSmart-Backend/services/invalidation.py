@@ -0,0 +1,364 @@
+"""
+Bus de Invalidación entre Workers
+
+Con varios workers de uvicorn cada proceso tiene sus propias cachés en
+memoria (por ejemplo la de transacciones recientes) y no ve las escrituras
+de los demás hasta que vencen. El bus sigue un change stream de MongoDB y
+avisa a las cachés del proceso cuando cambian los datos de un usuario
+(también a las conexiones en vivo del proceso, ver services/live_updates.py).
+
+- Un solo change stream por worker sobre la base de datos, filtrado en el
+  servidor a las colecciones con suscriptores y proyectado a colección,
+  operación e IDs: no viajan documentos completos ni contraseñas
+- transactions: altas y cambios (el user_id llega con
+  fullDocument=updateLookup); solo los cambios que asignan una nueva
+  versión de sincronización, como todas las escrituras de la API (una
+  migración que solo completa category_key no se reparte a los workers);
+  las eliminaciones se leen de las altas en transaction_tombstones, que
+  guardan el user_id
+- users: cambios y eliminaciones, salvo los que solo registran el último
+  acceso (last_access, que se escribe en cada login)
+- Ecos: las escrituras hechas por la API de este proceso (operaciones
+  envueltas con wrap()) ya actualizaron sus cachés y conexiones, así que
+  el bus descarta una vez el evento de cada una antes de repartirlo; los
+  suscriptores solo reciben escrituras de otros procesos
+- El token de reanudación se guarda en memoria para continuar sin perder
+  eventos tras una reconexión; si el oplog ya no tiene ese punto se
+  vacían las cachés suscritas y se empieza de nuevo. No se guarda en la
+  base de datos: un worker que arranca tiene las cachés y las conexiones
+  vacías, así que no hay nada que invalidar con los eventos anteriores
+
+Los change streams requieren un replica set. Para probar en local basta
+uno de un solo nodo:
+
+    mongod --replSet rs0 --dbpath ./data/rs0
+    mongosh --eval "rs.initiate()"
+    MONGODB_URL="mongodb://localhost:27017/?replicaSet=rs0"
+
+Con un MongoDB standalone, o con los backends memory y sqlite, el bus no
+arranca y las cachés dependen de su vencimiento (RECENT_CACHE_TTL_S).
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from database.backends import BaseTransactionOperations, DelegatingTransactionOperations, StorageBackend
+from models.transaction import TransactionCreate, TransactionResponse, TransactionUpdate, TransactionFilter
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Permite desactivar el bus (las cachés quedan limitadas por su vencimiento)
+INVALIDATION_BUS_ENABLED = os.getenv("INVALIDATION_BUS_ENABLED", "true").lower() == "true"
+# Espera antes de reabrir el change stream tras un error
+INVALIDATION_RETRY_S = float(os.getenv("INVALIDATION_RETRY_S", "5"))
+# Escrituras propias recordadas para reconocer su eco en el change stream
+LOCAL_WRITES_MAX = 10000
+
+# Códigos de error de MongoDB
+NOT_REPLICA_SET = 40573
+# El token ya no sirve (oplog rotado o token inválido): hay que empezar de nuevo
+RESUME_LOST_CODES = {260, 280, 286}
+
+# Las eliminaciones de transacciones se leen de sus tombstones
+TOMBSTONES = "transaction_tombstones"
+
+# Operaciones que se avisan a los suscriptores
+INSERT, UPDATE, DELETE = "insert", "update", "delete"
+# operationType del change stream -> operación avisada
+_OPERATIONS = {"insert": INSERT, "update": UPDATE, "replace": UPDATE, "delete": DELETE}
+
+# (user_id, ID del documento, operación) -> None
+InvalidateCallback = Callable[[str, Optional[str], str], None]
+
+invalidation_events = registry.counter(
+    "gastosmart_invalidation_events",
+    "Cambios recibidos por el bus de invalidación por colección",
+    ("collection",)
+)
+invalidation_stream_up = registry.gauge(
+    "gastosmart_invalidation_stream_up",
+    "1 si el change stream del bus de invalidación está abierto"
+)
+
+class InvalidationBus:
+    """
+    Distribuidor de invalidaciones a las cachés del proceso
+    """
+
+    def __init__(
+        self,
+        retry_delay: float = INVALIDATION_RETRY_S,
+        enabled: bool = INVALIDATION_BUS_ENABLED
+    ):
+        """
+        Inicializar el bus
+
+        Args:
+            retry_delay: Segundos de espera antes de reabrir el stream
+            enabled: Si es False start() no abre el change stream
+        """
+        self.retry_delay = retry_delay
+        self.enabled = enabled
+        self._subscribers: Dict[str, List[Tuple[InvalidateCallback, Callable[[], None]]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Último punto del change stream procesado (para reanudar tras una reconexión)
+        self._token: Optional[dict] = None
+        # ID de transacción -> escrituras de este proceso cuyo eco no ha llegado
+        self._local_writes: "OrderedDict[str, int]" = OrderedDict()
+
+    def subscribe(self, collection: str, invalidate: InvalidateCallback, clear: Callable[[], None]) -> None:
+        """
+        Registrar una caché
+
+        Args:
+            collection: "transactions" o "users"
+            invalidate: Función (user_id, document_id, operation) llamada por cada
+                cambio; operation es INSERT, UPDATE o DELETE
+            clear: Función que vacía la caché cuando se pudieron perder eventos
+        """
+        self._subscribers.setdefault(collection, []).append((invalidate, clear))
+
+    def running(self) -> bool:
+        """Indicar si el change stream está abierto o reintentando"""
+        return self._task is not None and not self._task.done()
+
+    def wrap(self, operations: BaseTransactionOperations) -> BaseTransactionOperations:
+        """
+        Registrar las escrituras de unas operaciones para descartar su eco
+
+        Args:
+            operations: Operaciones del backend (sin cachés: cada escritura se
+                registra una sola vez)
+
+        Returns:
+            BaseTransactionOperations: Operaciones que registran sus escrituras,
+                o las mismas si el bus no está corriendo (el eco no llegará)
+        """
+        if not self.running():
+            return operations
+        return LocalWriteOperations(operations, self)
+
+    def record_local(self, transaction_ids: List[str]) -> None:
+        """
+        Recordar escrituras de este proceso para descartar su eco
+
+        Args:
+            transaction_ids: IDs de las transacciones escritas
+        """
+        for transaction_id in transaction_ids:
+            self._local_writes[transaction_id] = self._local_writes.get(transaction_id, 0) + 1
+            self._local_writes.move_to_end(transaction_id)
+        # Los ecos que no llegan (el bus se detuvo) no se acumulan: se olvidan los más viejos
+        while len(self._local_writes) > LOCAL_WRITES_MAX:
+            self._local_writes.popitem(last=False)
+
+    def _consume_echo(self, transaction_id: Optional[str]) -> bool:
+        pending = self._local_writes.get(transaction_id, 0)
+        if not pending:
+            return False
+        if pending == 1:
+            del self._local_writes[transaction_id]
+        else:
+            self._local_writes[transaction_id] = pending - 1
+        return True
+
+    def pipeline(self) -> List[dict]:
+        """
+        Construir el filtro del change stream para las colecciones suscritas
+
+        Returns:
+            List[dict]: Pipeline de agregación del change stream
+        """
+        conditions = []
+        if "transactions" in self._subscribers:
+            conditions.append({"ns.coll": "transactions", "operationType": {"$in": ["insert", "replace"]}})
+            conditions.append({
+                "ns.coll": "transactions",
+                "operationType": "update",
+                "updateDescription.updatedFields.version": {"$exists": True}
+            })
+            conditions.append({"ns.coll": TOMBSTONES, "operationType": "insert"})
+        if "users" in self._subscribers:
+            conditions.append({
+                "ns.coll": "users",
+                "operationType": {"$in": ["update", "replace", "delete"]},
+                "updateDescription.updatedFields.last_access": {"$exists": False}
+            })
+
+        return [
+            {"$match": {"$or": conditions}},
+            {"$project": {
+                "ns.coll": 1,
+                "operationType": 1,
+                "documentKey": 1,
+                "fullDocument.user_id": 1,
+                "fullDocument.transaction_id": 1
+            }}
+        ]
+
+    def handle(self, change: dict) -> None:
+        """
+        Avisar a las cachés suscritas de un evento del change stream
+
+        Args:
+            change: Evento (ya proyectado por pipeline())
+        """
+        collection = change["ns"]["coll"]
+        document = change.get("fullDocument") or {}
+        operation = _OPERATIONS[change["operationType"]]
+        if collection == "users":
+            user_id = document_id = str(change["documentKey"]["_id"])
+        elif collection == TOMBSTONES:
+            # El alta de un tombstone es la eliminación de una transacción
+            collection, operation = "transactions", DELETE
+            user_id, document_id = document.get("user_id"), document.get("transaction_id")
+        else:
+            user_id, document_id = document.get("user_id"), str(change["documentKey"]["_id"])
+
+        # Eco de una escritura de este proceso: sus cachés ya están al día
+        if collection == "transactions" and self._consume_echo(document_id):
+            return
+        # Transacción eliminada antes del updateLookup: su tombstone llega después
+        if user_id is None:
+            return
+
+        invalidation_events.inc(labelvalues=(collection,))
+        for invalidate, _ in self._subscribers.get(collection, ()):
+            invalidate(user_id, document_id, operation)
+
+    def reset(self) -> None:
+        """Vaciar todas las cachés suscritas"""
+        self._local_writes.clear()
+        for subscribers in self._subscribers.values():
+            for _, clear in subscribers:
+                clear()
+
+    async def start(self, storage: StorageBackend) -> None:
+        """
+        Abrir el change stream en segundo plano
+
+        Args:
+            storage: Almacenamiento conectado (solo MongoDB tiene change streams)
+        """
+        if not self.enabled or not self._subscribers or self._task is not None:
+            return
+        if storage.name != "mongo":
+            logger.info(f"Bus de invalidación desactivado: el backend {storage.name} no tiene change streams")
+            return
+        self._task = asyncio.create_task(self._run(storage.database))
+
+    async def stop(self) -> None:
+        """Cerrar el change stream"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, database) -> None:
+        try:
+            while True:
+                try:
+                    async with database.watch(
+                        self.pipeline(),
+                        full_document="updateLookup",
+                        resume_after=self._token
+                    ) as stream:
+                        invalidation_stream_up.set(1)
+                        logger.info("Bus de invalidación escuchando cambios")
+                        while stream.alive:
+                            change = await stream.try_next()
+                            if change is not None:
+                                self.handle(change)
+                            # Avanza también sin eventos (postBatchResumeToken)
+                            self._token = stream.resume_token
+
+                except OperationFailure as e:
+                    if e.code == NOT_REPLICA_SET:
+                        logger.warning("Bus de invalidación desactivado: MongoDB no es un replica set")
+                        return
+                    invalidation_stream_up.set(0)
+                    if e.code in RESUME_LOST_CODES:
+                        # Se perdieron eventos: ninguna entrada en caché es confiable
+                        logger.warning(f"Token de reanudación no válido, se vacían las cachés: {e}")
+                        self._token = None
+                        self.reset()
+                    else:
+                        logger.error(f"Error en el change stream del bus de invalidación: {e}")
+                        await asyncio.sleep(self.retry_delay)
+
+                except Exception as e:
+                    logger.error(f"Error en el change stream del bus de invalidación: {e}")
+                    invalidation_stream_up.set(0)
+                    await asyncio.sleep(self.retry_delay)
+
+        finally:
+            invalidation_stream_up.set(0)
+
+class LocalWriteOperations(DelegatingTransactionOperations):
+    """
+    Operaciones de transacciones que registran sus escrituras en el bus
+    """
+
+    def __init__(self, operations: BaseTransactionOperations, bus: InvalidationBus):
+        """
+        Args:
+            operations: Operaciones del backend
+            bus: Bus de invalidación
+        """
+        super().__init__(operations)
+        self.bus = bus
+
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        transaction = await self.operations.create_transaction(user_id, transaction_data)
+        self.bus.record_local([transaction.id])
+        return transaction
+
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        transaction = await self.operations.update_transaction(transaction_id, user_id, update_data)
+        if transaction is not None:
+            self.bus.record_local([transaction.id])
+        return transaction
+
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        deleted = await self.operations.delete_transaction(transaction_id, user_id)
+        if deleted:
+            self.bus.record_local([transaction_id])
+        return deleted
+
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        updated = await self.operations.update_transactions(user_id, update_data, ids, filters)
+        self.bus.record_local(updated)
+        return updated
+
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        deleted = await self.operations.delete_transactions(user_id, ids, filters)
+        self.bus.record_local(deleted)
+        return deleted
+
+invalidation_bus = InvalidationBus()
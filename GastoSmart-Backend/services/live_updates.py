@@ -0,0 +1,351 @@
+"""
+Actualizaciones en Vivo de Transacciones
+
+Cada usuario conectado (Server-Sent Events o WebSocket, ver
+routers/live.py) recibe un evento cuando se crea, actualiza o elimina una
+de sus transacciones, seguido de sus totales recalculados, en lugar de
+volver a pedir el listado y las estadísticas.
+
+- Hub por proceso: usuario -> colas de sus conexiones; cada evento se
+  codifica a JSON una sola vez y se copia a las colas
+- Conexiones inactivas baratas: cada una espera en su cola sin
+  temporizadores propios; un único latido del hub mantiene vivas todas
+  las conexiones cada LIVE_HEARTBEAT_S segundos
+- Colas acotadas: si un cliente lento acumula LIVE_QUEUE_SIZE eventos se
+  descartan y recibe "resync" para sincronizarse con /api/transactions/sync
+- Los totales solo se calculan si el usuario tiene conexiones abiertas
+
+Eventos (nombre y datos JSON):
+- transaction: {"op": "created" | "updated", "transaction": {...}},
+  {"op": "deleted", "id": "..."} o, tras una operación masiva,
+  {"op": "updated_many", "ids": [...], "fields": {...}} y
+  {"op": "deleted_many", "ids": [...]}
+- stats: totales históricos del usuario (TransactionStats)
+- resync: el cliente perdió eventos y debe sincronizar
+
+Entre workers los eventos viajan por el bus de invalidación
+(services/invalidation.py): cada worker lee la transacción que cambió en
+otro y la publica a sus conexiones con la operación del change stream
+(alta: "created", cambio: "updated", tombstone o transacción que ya no
+existe: "deleted"); varios cambios del mismo
+usuario en LIVE_REMOTE_BATCH_S se publican juntos y, si son muchos (una
+operación masiva), se envía "resync". Sin el bus (backends memory y
+sqlite, o MongoDB sin replica set) los eventos solo llegan a las
+conexiones del worker que hizo la escritura.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from database.backends import BaseTransactionOperations, DelegatingTransactionOperations
+from services.invalidation import INSERT, DELETE
+from models.transaction import TransactionCreate, TransactionResponse, TransactionUpdate, TransactionFilter
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Permite desactivar los eventos (los endpoints responden 503)
+LIVE_UPDATES_ENABLED = os.getenv("LIVE_UPDATES_ENABLED", "true").lower() == "true"
+# Eventos pendientes por conexión antes de pedir resync
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "64"))
+# Intervalo del latido que mantiene abiertas las conexiones inactivas
+LIVE_HEARTBEAT_S = float(os.getenv("LIVE_HEARTBEAT_S", "25"))
+# Conexiones abiertas por worker
+LIVE_MAX_CONNECTIONS = int(os.getenv("LIVE_MAX_CONNECTIONS", "10000"))
+# Espera para agrupar los cambios de otros workers (una operación masiva llega fila por fila)
+LIVE_REMOTE_BATCH_S = float(os.getenv("LIVE_REMOTE_BATCH_S", "0.05"))
+
+# Mensaje de latido (None) y mensaje de resincronización
+HEARTBEAT = None
+RESYNC = ("resync", "{}")
+
+Message = Optional[Tuple[str, str]]
+
+live_events = registry.counter(
+    "gastosmart_live_events",
+    "Eventos en vivo entregados a conexiones por tipo",
+    ("event",)
+)
+
+class LiveUpdateHub:
+    """
+    Distribuidor de eventos a las conexiones abiertas de cada usuario
+    """
+
+    def __init__(
+        self,
+        queue_size: int = LIVE_QUEUE_SIZE,
+        heartbeat: float = LIVE_HEARTBEAT_S,
+        max_connections: int = LIVE_MAX_CONNECTIONS,
+        enabled: bool = LIVE_UPDATES_ENABLED
+    ):
+        """
+        Inicializar el hub
+
+        Args:
+            queue_size: Eventos pendientes por conexión
+            heartbeat: Segundos entre latidos
+            max_connections: Conexiones abiertas permitidas
+            enabled: Si es False wrap() devuelve las operaciones sin eventos
+        """
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.max_connections = max_connections
+        self.enabled = enabled
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._connections = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Tareas de publicación en curso (referencia para que no se recolecten)
+        self._tasks: Set[asyncio.Task] = set()
+        # Usuario -> transacciones cambiadas en otros workers pendientes de publicar y su operación
+        self._remote: Dict[str, Dict[str, str]] = {}
+
+        registry.callback_gauge(
+            "gastosmart_live_connections",
+            "Conexiones de actualizaciones en vivo abiertas",
+            lambda: [({}, self._connections)]
+        )
+
+    def wrap(self, operations: BaseTransactionOperations) -> BaseTransactionOperations:
+        """
+        Agregar la publicación de eventos a las operaciones de un backend
+
+        Args:
+            operations: Operaciones del backend
+
+        Returns:
+            BaseTransactionOperations: Operaciones que publican sus escrituras
+        """
+        if not self.enabled:
+            return operations
+        return LiveTransactionOperations(operations, self)
+
+    def subscribe(self, user_id: str) -> Optional[asyncio.Queue]:
+        """
+        Registrar una conexión del usuario
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            Optional[asyncio.Queue]: Cola de mensajes, o None si se alcanzó el límite de conexiones
+        """
+        if self.full():
+            return None
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        self._connections += 1
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._beat())
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        """Quitar una conexión del usuario"""
+        queues = self._subscribers.get(user_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        self._connections -= 1
+        if not queues:
+            del self._subscribers[user_id]
+
+    def full(self) -> bool:
+        """Verificar si se alcanzó el límite de conexiones"""
+        return self._connections >= self.max_connections
+
+    def has_subscribers(self, user_id: str) -> bool:
+        """Verificar si el usuario tiene conexiones abiertas en este proceso"""
+        return user_id in self._subscribers
+
+    def publish(self, user_id: str, event: str, data: dict) -> None:
+        """
+        Enviar un evento a todas las conexiones del usuario
+
+        Args:
+            user_id: ID del usuario
+            event: Nombre del evento
+            data: Datos del evento (serializables a JSON)
+        """
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        message = (event, json.dumps(data, separators=(",", ":"), default=str))
+        for queue in queues:
+            self._put(queue, message)
+        live_events.inc(len(queues), labelvalues=(event,))
+
+    def _put(self, queue: asyncio.Queue, message: Message) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Cliente lento: se descartan sus eventos y se le pide sincronizar
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    async def publish_stats(self, operations: BaseTransactionOperations, user_id: str) -> None:
+        """
+        Enviar los totales recalculados del usuario a sus conexiones
+
+        Args:
+            operations: Operaciones del backend
+            user_id: ID del usuario
+        """
+        try:
+            stats = await operations.get_transaction_stats(user_id)
+        except Exception as e:
+            logger.warning(f"No se pudieron calcular los totales en vivo del usuario {user_id}: {e}")
+            return
+        self.publish(user_id, "stats", stats.model_dump(exclude={"period_start", "period_end"}))
+
+    def remote_listener(
+        self,
+        operations: Callable[[], BaseTransactionOperations]
+    ) -> Callable[[str, Optional[str], str], None]:
+        """
+        Crear el suscriptor del bus de invalidación que publica las escrituras de otros workers
+
+        Args:
+            operations: Función que devuelve las operaciones del backend (sin
+                las cachés del proceso, que pueden no haber visto el cambio)
+
+        Returns:
+            Callable[[str, Optional[str], str], None]: Función (user_id,
+                transaction_id, operation) para invalidation_bus.subscribe
+        """
+        def on_remote_write(user_id: str, transaction_id: Optional[str], operation: str) -> None:
+            if transaction_id is None or not self.has_subscribers(user_id):
+                return
+            changed = self._remote.get(user_id)
+            if changed is None:
+                changed = self._remote[user_id] = {}
+                self.spawn(self._publish_remote(operations(), user_id))
+            # Una transacción creada sigue siendo "created" tras cambiar; eliminada, "deleted"
+            if operation == DELETE or transaction_id not in changed:
+                changed[transaction_id] = operation
+
+        return on_remote_write
+
+    async def _publish_remote(self, operations: BaseTransactionOperations, user_id: str) -> None:
+        """Publicar los cambios de otros workers acumulados para un usuario"""
+        await asyncio.sleep(LIVE_REMOTE_BATCH_S)
+        changed = self._remote.pop(user_id, {})
+        if not self.has_subscribers(user_id):
+            return
+        # Muchos cambios juntos (operación masiva): es más barato sincronizar
+        if len(changed) > self.queue_size // 2:
+            self.publish(user_id, "resync", {})
+            return
+        for transaction_id, operation in changed.items():
+            if operation == DELETE:
+                self.publish(user_id, "transaction", {"op": "deleted", "id": transaction_id})
+                continue
+            try:
+                transaction = await operations.get_transaction_by_id(transaction_id, user_id)
+            except Exception as e:
+                logger.warning(f"No se pudo leer la transacción {transaction_id} para el evento en vivo: {e}")
+                self.publish(user_id, "resync", {})
+                return
+            if transaction is None:
+                self.publish(user_id, "transaction", {"op": "deleted", "id": transaction_id})
+            else:
+                op = "created" if operation == INSERT else "updated"
+                self.publish(user_id, "transaction", {"op": op, "transaction": transaction.model_dump(mode="json")})
+        await self.publish_stats(operations, user_id)
+
+    def clear(self) -> None:
+        """Pedir resync a todas las conexiones (el bus pudo perder eventos)"""
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, RESYNC)
+
+    def spawn(self, coroutine) -> None:
+        """Ejecutar una publicación en segundo plano (sin demorar la respuesta)"""
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _beat(self) -> None:
+        """Latido único para todas las conexiones; termina cuando no queda ninguna"""
+        while self._subscribers:
+            await asyncio.sleep(self.heartbeat)
+            for queues in list(self._subscribers.values()):
+                for queue in queues:
+                    if queue.empty():
+                        queue.put_nowait(HEARTBEAT)
+
+class LiveTransactionOperations(DelegatingTransactionOperations):
+    """
+    Operaciones de transacciones que publican sus escrituras en el hub
+    """
+
+    def __init__(self, operations: BaseTransactionOperations, hub: LiveUpdateHub):
+        """
+        Args:
+            operations: Operaciones del backend
+            hub: Hub de actualizaciones en vivo
+        """
+        super().__init__(operations)
+        self.hub = hub
+
+    async def _publish(self, user_id: str, data: dict) -> None:
+        self.hub.publish(user_id, "transaction", data)
+        await self.hub.publish_stats(self.operations, user_id)
+
+    def _notify(self, user_id: str, data: dict) -> None:
+        if self.hub.has_subscribers(user_id):
+            self.hub.spawn(self._publish(user_id, data))
+
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        transaction = await self.operations.create_transaction(user_id, transaction_data)
+        self._notify(user_id, {"op": "created", "transaction": transaction.model_dump(mode="json")})
+        return transaction
+
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        transaction = await self.operations.update_transaction(transaction_id, user_id, update_data)
+        if transaction is not None:
+            self._notify(user_id, {"op": "updated", "transaction": transaction.model_dump(mode="json")})
+        return transaction
+
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        deleted = await self.operations.delete_transaction(transaction_id, user_id)
+        if deleted:
+            self._notify(user_id, {"op": "deleted", "id": transaction_id})
+        return deleted
+
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        updated = await self.operations.update_transactions(user_id, update_data, ids, filters)
+        if updated:
+            self._notify(user_id, {
+                "op": "updated_many",
+                "ids": updated,
+                "fields": update_data.model_dump(mode="json", exclude_none=True)
+            })
+        return updated
+
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        deleted = await self.operations.delete_transactions(user_id, ids, filters)
+        if deleted:
+            self._notify(user_id, {"op": "deleted_many", "ids": deleted})
+        return deleted
+
+live_hub = LiveUpdateHub()
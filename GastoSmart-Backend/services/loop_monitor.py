@@ -0,0 +1,151 @@
+"""
+Monitor del Bucle de Eventos para GastoSmart
+
+Este archivo mide continuamente el retraso (lag) del bucle de eventos y
+lo exporta como métrica. Un hilo vigilante detecta cuando el bucle deja
+de avanzar más allá de un umbral y captura la pila del código que lo está
+bloqueando (bcrypt síncrono, lecturas de disco, print, cliente síncrono
+de MongoDB...), para que estas regresiones aparezcan en las pruebas de
+carga en lugar de en producción.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Configuración del monitor (variables de entorno)
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "200"))
+
+event_loop_lag = registry.histogram(
+    "gastosmart_event_loop_lag_seconds",
+    "Retraso del bucle de eventos respecto al intervalo programado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+event_loop_lag_last = registry.gauge(
+    "gastosmart_event_loop_lag_last_seconds",
+    "Último retraso medido del bucle de eventos"
+)
+event_loop_stalls = registry.counter(
+    "gastosmart_event_loop_stalls",
+    "Bloqueos del bucle de eventos que superaron el umbral"
+)
+
+class LoopMonitor:
+    """
+    Medidor de lag y detector de bloqueos del bucle de eventos
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = LOOP_LAG_INTERVAL_MS,
+        stall_threshold_ms: float = LOOP_STALL_THRESHOLD_MS,
+        max_reports: int = 50
+    ):
+        """
+        Inicializar el monitor
+
+        Args:
+            interval_ms: Intervalo entre mediciones de lag
+            stall_threshold_ms: Tiempo sin avanzar a partir del cual se captura la pila
+            max_reports: Número de bloqueos recientes que se conservan
+        """
+        self.interval = interval_ms / 1000
+        self.stall_threshold = stall_threshold_ms / 1000
+        self.reports: Deque[Dict] = deque(maxlen=max_reports)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Reporte del bloqueo en curso, se completa cuando el bucle vuelve a avanzar
+        self._open_report: Optional[Dict] = None
+
+    def start(self) -> None:
+        """Iniciar la medición en el bucle actual y el hilo vigilante"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Detener el monitor"""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    async def _measure(self) -> None:
+        """Medir cuánto tarda en despertar un sleep respecto a lo programado"""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            self._heartbeat = now
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+            report, self._open_report = self._open_report, None
+            if report is not None:
+                report["total_ms"] = round(lag * 1000, 1)
+
+    def _watch(self) -> None:
+        """Hilo vigilante: capturar la pila cuando el bucle deja de avanzar"""
+        reported_heartbeat = None
+        check_every = min(self.interval, self.stall_threshold) / 2
+        while not self._stop.wait(check_every):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+            if stalled_for < self.stall_threshold or heartbeat == reported_heartbeat:
+                continue
+            # Un solo reporte por bloqueo
+            reported_heartbeat = heartbeat
+            self._report_stall(stalled_for)
+
+    def _report_stall(self, stalled_for: float) -> None:
+        """Registrar un bloqueo con la pila del hilo del bucle"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack: List[str] = traceback.format_stack(frame) if frame is not None else []
+        task = asyncio.current_task(self._loop)
+        task_name = task.get_name() if task else None
+        coro_name = getattr(task.get_coro(), "__qualname__", None) if task else None
+
+        event_loop_stalls.inc()
+        report = {
+            "timestamp": time.time(),
+            "stalled_ms": round(stalled_for * 1000, 1),
+            "total_ms": None,
+            "task": task_name,
+            "coroutine": coro_name,
+            "stack": stack
+        }
+        self.reports.append(report)
+        self._open_report = report
+        logger.warning(
+            f"Bucle de eventos bloqueado {report['stalled_ms']} ms "
+            f"(tarea {task_name}, corrutina {coro_name}):\n{''.join(stack[-15:])}"
+        )
+
+# Instancia compartida por la aplicación
+loop_monitor = LoopMonitor()
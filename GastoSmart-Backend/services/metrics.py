@@ -0,0 +1,282 @@
+"""
+Métricas estilo Prometheus para GastoSmart
+
+Este archivo implementa contadores, gauges e histogramas con etiquetas y
+un registro que los exporta en el formato de texto de Prometheus, sin
+dependencias externas. El registro en la ruta caliente es barato: una
+búsqueda en diccionario, un bisect y un incremento bajo un lock.
+
+Las métricas son por proceso: con varios workers cada uno expone las suyas.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Buckets por defecto para latencias (segundos)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Formatear etiquetas como {nombre="valor",...}"""
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+def _format_value(value: float) -> str:
+    """Formatear un valor numérico"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """
+    Base de las familias de métricas con etiquetas
+    """
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Inicializar la familia de métricas
+
+        Args:
+            name: Nombre de la métrica
+            documentation: Descripción para la línea HELP
+            labelnames: Nombres de las etiquetas
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels_dict(self, labelvalues: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labelvalues))
+
+    def collect(self) -> List[Sample]:
+        """Obtener las muestras actuales de la métrica"""
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """
+    Contador monótono
+    """
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, labelvalues: Tuple[str, ...] = ()) -> None:
+        """
+        Incrementar el contador
+
+        Args:
+            amount: Cantidad a sumar
+            labelvalues: Valores de las etiquetas, en el orden de labelnames
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, labelvalues: Tuple[str, ...] = ()) -> float:
+        """Obtener el valor actual del contador"""
+        return self._values.get(labelvalues, 0.0)
+
+    def collect(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(f"{self.name}_total", self._labels_dict(key), value) for key, value in items]
+
+class Gauge(_Metric):
+    """
+    Valor que puede subir y bajar
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, labelvalues: Tuple[str, ...] = ()) -> None:
+        """Fijar el valor del gauge"""
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, amount: float = 1.0, labelvalues: Tuple[str, ...] = ()) -> None:
+        """Incrementar el gauge"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labelvalues: Tuple[str, ...] = ()) -> None:
+        """Decrementar el gauge"""
+        self.inc(-amount, labelvalues)
+
+    def value(self, labelvalues: Tuple[str, ...] = ()) -> float:
+        """Obtener el valor actual del gauge"""
+        return self._values.get(labelvalues, 0.0)
+
+    def collect(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self._labels_dict(key), value) for key, value in items]
+
+class Histogram(_Metric):
+    """
+    Histograma con buckets acumulativos
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [conteos por bucket (+Inf al final), suma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, labelvalues: Tuple[str, ...] = ()) -> None:
+        """
+        Registrar una observación
+
+        Args:
+            value: Valor observado (p. ej. segundos)
+            labelvalues: Valores de las etiquetas, en el orden de labelnames
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> List[Sample]:
+        with self._lock:
+            items = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        samples: List[Sample] = []
+        bounds = self.buckets + (float("inf"),)
+        for key, counts, total_sum, total_count in items:
+            labels = self._labels_dict(key)
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total_sum))
+            samples.append((f"{self.name}_count", labels, total_count))
+        return samples
+
+class CallbackGauge(_Metric):
+    """
+    Gauge cuyo valor se calcula al exportar (sin costo en la ruta caliente)
+    """
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+    ):
+        """
+        Args:
+            name: Nombre de la métrica
+            documentation: Descripción para la línea HELP
+            callback: Función que devuelve pares (etiquetas, valor)
+        """
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def collect(self) -> List[Sample]:
+        return [(self.name, labels, value) for labels, value in self.callback()]
+
+class MetricsRegistry:
+    """
+    Registro de métricas del proceso
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Registrar una métrica (si ya existe una con el mismo nombre se devuelve esa)
+
+        Args:
+            metric: Métrica a registrar
+
+        Returns:
+            _Metric: Métrica registrada
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Crear y registrar un contador"""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Crear y registrar un gauge"""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Crear y registrar un histograma"""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback_gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+    ) -> CallbackGauge:
+        """Crear y registrar un gauge calculado al exportar"""
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Obtener una métrica registrada por nombre"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Exportar todas las métricas en formato de texto de Prometheus
+
+        Returns:
+            str: Exposición de métricas
+        """
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for sample_name, labels, value in metric.collect():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Registro compartido por la aplicación
+registry = MetricsRegistry()
+
+# Content-Type del formato de texto de Prometheus
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
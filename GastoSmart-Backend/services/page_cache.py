@@ -0,0 +1,85 @@
+"""
+Caché de Páginas HTML para GastoSmart
+
+Este archivo mantiene en memoria el contenido de las páginas HTML del
+frontend para no leer el disco en cada petición a las rutas de páginas.
+"""
+
+import logging
+import os
+from typing import Dict
+
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Directorio de las páginas HTML del frontend
+PAGES_DIRECTORY = os.getenv("PAGES_DIRECTORY", "../Front-end/html")
+# Permite desactivar la caché en desarrollo para ver cambios sin reiniciar
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+
+page_cache_requests = registry.counter(
+    "gastosmart_page_cache_requests",
+    "Lecturas de la caché de páginas por resultado",
+    ("result",)
+)
+
+class PageCache:
+    """
+    Caché en memoria de las páginas HTML
+    """
+
+    def __init__(self, directory: str = PAGES_DIRECTORY, enabled: bool = PAGE_CACHE_ENABLED):
+        """
+        Inicializar la caché de páginas
+
+        Args:
+            directory: Directorio donde están las páginas HTML
+            enabled: Si es False las páginas se leen del disco en cada petición
+        """
+        self.directory = directory
+        self.enabled = enabled
+        self._pages: Dict[str, str] = {}
+
+    def load(self) -> int:
+        """
+        Cargar todas las páginas HTML del directorio
+
+        Returns:
+            int: Número de páginas cargadas
+        """
+        if not self.enabled:
+            return 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".html"):
+                self._pages[name] = self._read(name)
+        logger.info("Caché de páginas cargada: %d páginas", len(self._pages))
+        return len(self._pages)
+
+    def get(self, name: str) -> str:
+        """
+        Obtener el contenido de una página
+
+        Args:
+            name: Nombre del archivo HTML (ej: "login.html")
+
+        Returns:
+            str: Contenido de la página
+        """
+        if not self.enabled:
+            return self._read(name)
+        content = self._pages.get(name)
+        if content is None:
+            page_cache_requests.inc(1, ("miss",))
+            content = self._pages[name] = self._read(name)
+        else:
+            page_cache_requests.inc(1, ("hit",))
+        return content
+
+    def _read(self, name: str) -> str:
+        """Leer una página del disco"""
+        with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+            return f.read()
+
+# Instancia compartida por la aplicación
+page_cache = PageCache()
@@ -0,0 +1,452 @@
+"""
+Caché de Transacciones Recientes por Usuario
+
+La pantalla de ingresos y gastos pide casi siempre la
+primera página del listado con el orden por defecto (fecha descendente).
+Esta caché guarda por usuario las RECENT_CACHE_SIZE transacciones más
+recientes y responde esas páginas sin consultar el almacenamiento.
+
+- Write-through: crear, actualizar y eliminar transacciones actualizan la
+  caché del usuario en el mismo proceso, así que un worker nunca responde
+  datos más viejos que sus propias escrituras
+- Representación compacta: cada fila es un registro con __slots__ (sin el
+  user_id, con cadenas repetidas internadas) y se convierte a
+  TransactionResponse solo al responder
+- Acotada: máximo RECENT_CACHE_MAX_USERS usuarios (LRU) y cada entrada
+  vence a los RECENT_CACHE_TTL_S segundos, que es lo máximo que un worker
+  puede tardar en ver escrituras hechas en otro worker si no corre el bus
+  de invalidación (services/invalidation.py)
+- Con el bus, las escrituras de otros workers descartan la entrada del
+  usuario (el bus ya descarta los ecos de las escrituras propias)
+- Cada entrada guarda la versión de datos leída antes de llenarla. Una
+  lectura con ETag (que ya leyó la versión) solo usa la entrada si la
+  versión coincide: así el ETag nunca acompaña datos más viejos que él,
+  aunque la escritura venga de otro worker y el bus aún no haya avisado.
+  Tras una escritura propia la versión de la entrada se desconoce y la
+  siguiente lectura con ETag la vuelve a llenar
+
+Memoria medida con benchmarks/micro.py (Python 3.11, 64 bits, filas del
+dataset sintético): unos 250 bytes por transacción, alrededor de 25 KiB
+por usuario con 100 transacciones (guardar los TransactionResponse ocupa
+unos 130 KiB); con los valores por defecto la caché llena ocupa unos
+50 MiB por worker.
+"""
+
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from database.backends import BaseTransactionOperations, DelegatingTransactionOperations
+from models.transaction import (
+    TransactionCreate, TransactionResponse, TransactionUpdate,
+    TransactionFilter, TransactionSort
+)
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Permite desactivar la caché (por ejemplo para comparar en benchmarks)
+RECENT_CACHE_ENABLED = os.getenv("RECENT_CACHE_ENABLED", "true").lower() == "true"
+# Transacciones guardadas por usuario (el frontend pide páginas de 100)
+RECENT_CACHE_SIZE = int(os.getenv("RECENT_CACHE_SIZE", "100"))
+# Usuarios en caché por worker
+RECENT_CACHE_MAX_USERS = int(os.getenv("RECENT_CACHE_MAX_USERS", "2000"))
+# Vigencia de cada entrada
+RECENT_CACHE_TTL_S = float(os.getenv("RECENT_CACHE_TTL_S", "30"))
+
+recent_cache_requests = registry.counter(
+    "gastosmart_recent_cache_requests",
+    "Listados de transacciones por resultado de la caché de recientes",
+    ("result",)
+)
+
+class _RecentTransaction:
+    """
+    Fila compacta de la caché (sin user_id: es el mismo para toda la entrada)
+    """
+
+    __slots__ = ("id", "type", "amount", "category", "description", "date", "created_at", "updated_at", "currency")
+
+    def __init__(self, transaction: TransactionResponse):
+        self.id = transaction.id
+        self.type = transaction.type
+        self.amount = transaction.amount
+        self.category = sys.intern(transaction.category)
+        self.description = transaction.description
+        self.date = transaction.date
+        self.created_at = transaction.created_at
+        self.updated_at = transaction.updated_at
+        self.currency = sys.intern(transaction.currency)
+
+    def key(self):
+        """Orden del listado por defecto: fecha y luego ID"""
+        return (self.date, self.id)
+
+    def to_response(self, user_id: str) -> TransactionResponse:
+        """
+        Convertir a TransactionResponse
+
+        El constructor normal es más rápido que model_construct en pydantic 2
+        (el validador está compilado y model_construct recorre los campos en Python).
+        """
+        return TransactionResponse(
+            id=self.id,
+            user_id=user_id,
+            type=self.type,
+            amount=self.amount,
+            category=self.category,
+            description=self.description,
+            date=self.date,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            currency=self.currency
+        )
+
+class _UserEntry:
+    """
+    Transacciones recientes de un usuario, de la más nueva a la más vieja
+
+    Invariante: records son exactamente las len(records) transacciones más
+    recientes del usuario; complete indica que no tiene más. version es la
+    versión de datos leída antes de llenarla (None si no se conoce).
+    """
+
+    __slots__ = ("records", "complete", "expires_at", "version")
+
+    def __init__(
+        self,
+        records: List[_RecentTransaction],
+        complete: bool,
+        expires_at: float,
+        version: Optional[int] = None
+    ):
+        self.records = records
+        self.complete = complete
+        self.expires_at = expires_at
+        self.version = version
+
+class RecentTransactionsCache:
+    """
+    Caché en memoria de las transacciones recientes de cada usuario
+    """
+
+    def __init__(
+        self,
+        size: int = RECENT_CACHE_SIZE,
+        max_users: int = RECENT_CACHE_MAX_USERS,
+        ttl: float = RECENT_CACHE_TTL_S,
+        enabled: bool = RECENT_CACHE_ENABLED
+    ):
+        """
+        Inicializar la caché
+
+        Args:
+            size: Transacciones guardadas por usuario
+            max_users: Usuarios guardados (se descarta el menos usado)
+            ttl: Segundos de vigencia de cada entrada
+            enabled: Si es False wrap() devuelve las operaciones sin caché
+        """
+        self.size = size
+        self.max_users = max_users
+        self.ttl = ttl
+        self.enabled = enabled
+        self._users: "OrderedDict[str, _UserEntry]" = OrderedDict()
+        # Consultas de llenado en curso por usuario; una escritura las marca como obsoletas
+        self._fills: Dict[str, List[List[bool]]] = {}
+
+        registry.callback_gauge(
+            "gastosmart_recent_cache_users",
+            "Usuarios en la caché de transacciones recientes",
+            lambda: [({}, len(self._users))]
+        )
+
+    def wrap(self, operations: BaseTransactionOperations) -> BaseTransactionOperations:
+        """
+        Agregar la caché a las operaciones de un backend
+
+        Args:
+            operations: Operaciones del backend
+
+        Returns:
+            BaseTransactionOperations: Operaciones con caché (o las mismas si está desactivada)
+        """
+        if not self.enabled:
+            return operations
+        return CachedTransactionOperations(operations, self)
+
+    def cacheable(
+        self,
+        skip: int,
+        limit: int,
+        filters: Optional[TransactionFilter],
+        sort: Optional[TransactionSort]
+    ) -> bool:
+        """Verificar si el listado es una página del orden por defecto dentro de la caché"""
+        if filters and any([filters.type, filters.category, filters.date_from, filters.date_to,
+                            filters.amount_min, filters.amount_max]):
+            return False
+        if sort and (sort.field != "date" or sort.order != "desc"):
+            return False
+        return 0 < limit and skip + limit <= self.size
+
+    def get_page(
+        self,
+        user_id: str,
+        skip: int,
+        limit: int,
+        version: Optional[int] = None
+    ) -> Optional[List[TransactionResponse]]:
+        """
+        Obtener una página de la caché
+
+        Args:
+            user_id: ID del usuario
+            skip: Transacciones a saltar
+            limit: Transacciones a devolver
+            version: Versión de datos leída por la petición (None si no la leyó)
+
+        Returns:
+            Optional[List[TransactionResponse]]: Página, o None si no está en caché
+                (o se llenó con otra versión)
+        """
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._users[user_id]
+            return None
+        if version is not None and entry.version != version:
+            return None
+        if skip + limit > len(entry.records) and not entry.complete:
+            return None
+        self._users.move_to_end(user_id)
+        return [record.to_response(user_id) for record in entry.records[skip:skip + limit]]
+
+    def begin_fill(self, user_id: str) -> List[bool]:
+        """Registrar una consulta de llenado (se invalida si hay escrituras mientras corre)"""
+        marker = [False]
+        self._fills.setdefault(user_id, []).append(marker)
+        return marker
+
+    def finish_fill(
+        self,
+        user_id: str,
+        marker: List[bool],
+        transactions: Optional[List[TransactionResponse]],
+        version: Optional[int] = None
+    ) -> None:
+        """
+        Guardar el resultado de una consulta de llenado
+
+        Args:
+            user_id: ID del usuario
+            marker: Registro devuelto por begin_fill
+            transactions: Primeras `size` transacciones (None si la consulta falló)
+            version: Versión de datos leída antes de la consulta (None si no se conoce)
+        """
+        markers = self._fills.get(user_id, [])
+        if marker in markers:
+            markers.remove(marker)
+        if not markers:
+            self._fills.pop(user_id, None)
+
+        # Sin resultados no se guarda: el backend también devuelve [] cuando falla
+        if marker[0] or not transactions:
+            return
+        self._users[user_id] = _UserEntry(
+            [_RecentTransaction(transaction) for transaction in transactions],
+            len(transactions) < self.size,
+            time.monotonic() + self.ttl,
+            version
+        )
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def _mark_write(self, user_id: str) -> None:
+        for marker in self._fills.get(user_id, ()):
+            marker[0] = True
+        # La escritura cambió la versión y no se sabe a cuál
+        entry = self._users.get(user_id)
+        if entry is not None:
+            entry.version = None
+
+    def _insert(self, entry: _UserEntry, record: _RecentTransaction) -> None:
+        records = entry.records
+        # Más vieja que la última guardada: solo entra si la entrada tiene todo
+        if not entry.complete and (not records or record.key() < records[-1].key()):
+            return
+        position = 0
+        while position < len(records) and records[position].key() > record.key():
+            position += 1
+        records.insert(position, record)
+        if len(records) > self.size:
+            records.pop()
+            entry.complete = False
+
+    def _remove(self, user_id: str, entry: _UserEntry, transaction_id: str) -> None:
+        entry.records = [record for record in entry.records if record.id != transaction_id]
+        # Sin filas ni garantía de tenerlas todas no se puede ubicar la siguiente escritura
+        if not entry.records and not entry.complete:
+            del self._users[user_id]
+
+    def on_create(self, user_id: str, transaction: TransactionResponse) -> None:
+        """Agregar una transacción creada"""
+        self._mark_write(user_id)
+        entry = self._users.get(user_id)
+        if entry is not None:
+            self._insert(entry, _RecentTransaction(transaction))
+
+    def on_update(self, user_id: str, transaction: TransactionResponse) -> None:
+        """Reemplazar una transacción actualizada (puede cambiar de posición)"""
+        self._mark_write(user_id)
+        entry = self._users.get(user_id)
+        if entry is not None:
+            self._remove(user_id, entry, transaction.id)
+            if user_id in self._users:
+                self._insert(entry, _RecentTransaction(transaction))
+
+    def on_delete(self, user_id: str, transaction_id: str) -> None:
+        """Quitar una transacción eliminada"""
+        self._mark_write(user_id)
+        entry = self._users.get(user_id)
+        if entry is not None:
+            self._remove(user_id, entry, transaction_id)
+
+    def invalidate(self, user_id: str) -> None:
+        """Descartar la entrada de un usuario"""
+        self._mark_write(user_id)
+        self._users.pop(user_id, None)
+
+    def on_remote_write(self, user_id: str, transaction_id: Optional[str], operation: str) -> None:
+        """
+        Aplicar un cambio de otro proceso avisado por el bus de invalidación
+
+        Args:
+            user_id: ID del usuario
+            transaction_id: ID de la transacción modificada
+            operation: Operación (cualquiera descarta la entrada del usuario)
+        """
+        self.invalidate(user_id)
+
+    def clear(self) -> None:
+        """Descartar todas las entradas"""
+        for user_id in list(self._fills):
+            self._mark_write(user_id)
+        self._users.clear()
+
+class CachedTransactionOperations(DelegatingTransactionOperations):
+    """
+    Operaciones de transacciones con la caché de recientes
+
+    Delega todo en las operaciones del backend; los listados por defecto
+    se responden desde la caché y las escrituras la actualizan. Se crea una
+    por petición: recuerda la versión de datos que leyó la petición (ETag).
+    """
+
+    def __init__(self, operations: BaseTransactionOperations, cache: RecentTransactionsCache):
+        """
+        Args:
+            operations: Operaciones del backend
+            cache: Caché de transacciones recientes
+        """
+        super().__init__(operations)
+        self.cache = cache
+        self.version: Optional[int] = None
+
+    async def get_version(self, user_id: str) -> int:
+        self.version = await self.operations.get_version(user_id)
+        return self.version
+
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        transaction = await self.operations.create_transaction(user_id, transaction_data)
+        self.cache.on_create(user_id, transaction)
+        return transaction
+
+    async def get_user_transactions(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[TransactionResponse]:
+        if not self.cache.cacheable(skip, limit, filters, sort):
+            recent_cache_requests.inc(labelvalues=("bypass",))
+            return await self.operations.get_user_transactions(user_id, skip, limit, filters, sort)
+
+        page = self.cache.get_page(user_id, skip, limit, self.version)
+        if page is not None:
+            recent_cache_requests.inc(labelvalues=("hit",))
+            return page
+
+        recent_cache_requests.inc(labelvalues=("miss",))
+        marker = self.cache.begin_fill(user_id)
+        transactions = None
+        try:
+            transactions = await self.operations.get_user_transactions(user_id, 0, self.cache.size)
+        finally:
+            self.cache.finish_fill(user_id, marker, transactions, self.version)
+        return transactions[skip:skip + limit]
+
+    async def get_user_transaction_fields(
+        self,
+        user_id: str,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None,
+        sort: Optional[TransactionSort] = None
+    ) -> List[Dict[str, Any]]:
+        # La primera página por defecto también se responde desde la caché
+        if not self.cache.cacheable(skip, limit, filters, sort):
+            return await self.operations.get_user_transaction_fields(user_id, fields, skip, limit, filters, sort)
+        transactions = await self.get_user_transactions(user_id, skip, limit, filters, sort)
+        return [transaction.model_dump(mode="json", include=set(fields)) for transaction in transactions]
+
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        transaction = await self.operations.update_transaction(transaction_id, user_id, update_data)
+        if transaction is not None:
+            self.cache.on_update(user_id, transaction)
+        return transaction
+
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        deleted = await self.operations.delete_transaction(transaction_id, user_id)
+        if deleted:
+            self.cache.on_delete(user_id, transaction_id)
+        return deleted
+
+    # Las operaciones masivas descartan la entrada del usuario (aunque fallen a medias)
+
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        try:
+            return await self.operations.update_transactions(user_id, update_data, ids, filters)
+        finally:
+            self.cache.invalidate(user_id)
+
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        try:
+            return await self.operations.delete_transactions(user_id, ids, filters)
+        finally:
+            self.cache.invalidate(user_id)
+
+recent_cache = RecentTransactionsCache()
@@ -0,0 +1,287 @@
+"""
+Agrupación de Lecturas Idénticas Concurrentes (single-flight)
+
+Con el panel abierto en varias pestañas, o cuando el frontend repite una
+petición, llegan a la vez lecturas idénticas de estadísticas, categorías
+o del usuario. En lugar de ejecutar cada una contra el almacenamiento,
+la primera se ejecuta y las que llegan mientras está en curso esperan el
+mismo resultado (o la misma excepción).
+
+- Solo se agrupan llamadas en curso: no es una caché, al terminar la
+  consulta la siguiente llamada vuelve a ejecutarse
+- Las escrituras de un usuario lo "olvidan": una lectura que llega
+  después de una escritura nunca recibe el resultado de una consulta que
+  empezó antes
+- Las lecturas con ETag solo se unen a consultas iniciadas con la misma
+  versión de datos: una escritura de otro worker no pasa por este proceso,
+  y sin esto el ETag nuevo acompañaría el resultado de antes de la escritura
+- La consulta corre en su propia tarea: si el cliente que la inició se
+  desconecta, las demás siguen esperando el resultado
+- gastosmart_single_flight_calls{result="shared"} cuenta las consultas
+  ahorradas
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from database.backends import (
+    BaseTransactionOperations, BaseUserOperations,
+    DelegatingTransactionOperations, DelegatingUserOperations
+)
+from models.transaction import (
+    TransactionCreate, TransactionResponse, TransactionUpdate, TransactionStats, TransactionFilter
+)
+from models.user import UserResponse, UserLogin, BudgetUpdate
+from services.metrics import registry
+
+# Permite desactivar la agrupación (por ejemplo para comparar en benchmarks)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+T = TypeVar("T")
+
+single_flight_calls = registry.counter(
+    "gastosmart_single_flight_calls",
+    "Lecturas agrupadas por operación: executed (consultó el almacenamiento) o shared (reutilizó una consulta en curso)",
+    ("operation", "result")
+)
+
+class SingleFlight:
+    """
+    Registro de consultas en curso por usuario y argumentos
+    """
+
+    def __init__(self):
+        """Inicializar sin consultas en curso"""
+        self._calls: Dict[str, Dict[Tuple, asyncio.Task]] = {}
+
+    async def do(self, user_id: str, key: Tuple, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecutar una consulta o unirse a la idéntica que ya está en curso
+
+        Args:
+            user_id: Usuario dueño de los datos (para olvidar sus consultas al escribir)
+            key: Operación y argumentos; key[0] es el nombre de la operación
+            factory: Función que crea la corrutina de la consulta
+
+        Returns:
+            T: Resultado de la consulta
+        """
+        calls = self._calls.setdefault(user_id, {})
+        task = calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            calls[key] = task
+            task.add_done_callback(partial(self._done, user_id, key))
+            single_flight_calls.inc(labelvalues=(key[0], "executed"))
+        else:
+            single_flight_calls.inc(labelvalues=(key[0], "shared"))
+        # shield: cancelar a un cliente no cancela la consulta de los demás
+        return await asyncio.shield(task)
+
+    def _done(self, user_id: str, key: Tuple, task: asyncio.Task) -> None:
+        calls = self._calls.get(user_id)
+        if calls is not None and calls.get(key) is task:
+            del calls[key]
+            if not calls:
+                del self._calls[user_id]
+        # Marcar la excepción como leída aunque todos los clientes se hayan ido
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, user_id: str) -> None:
+        """Hacer que las próximas lecturas del usuario no se unan a las que están en curso"""
+        self._calls.pop(user_id, None)
+
+    def forget_all(self) -> None:
+        """Olvidar las consultas en curso de todos los usuarios"""
+        self._calls.clear()
+
+class RequestCoalescer:
+    """
+    Agrupación de lecturas para las operaciones de transacciones y usuarios
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        """
+        Args:
+            enabled: Si es False los wrap_* devuelven las operaciones sin cambios
+        """
+        self.enabled = enabled
+        self.transactions = SingleFlight()
+        self.users = SingleFlight()
+
+    def wrap_transactions(self, operations: BaseTransactionOperations) -> BaseTransactionOperations:
+        """
+        Agrupar las lecturas de estadísticas y categorías de un backend
+
+        Args:
+            operations: Operaciones del backend
+
+        Returns:
+            BaseTransactionOperations: Operaciones con agrupación (o las mismas si está desactivada)
+        """
+        if not self.enabled:
+            return operations
+        return CoalescingTransactionOperations(operations, self.transactions)
+
+    def wrap_users(self, operations: BaseUserOperations) -> BaseUserOperations:
+        """
+        Agrupar las lecturas de usuario por ID de un backend
+
+        Args:
+            operations: Operaciones del backend
+
+        Returns:
+            BaseUserOperations: Operaciones con agrupación (o las mismas si está desactivada)
+        """
+        if not self.enabled:
+            return operations
+        return CoalescingUserOperations(operations, self.users)
+
+class CoalescingTransactionOperations(DelegatingTransactionOperations):
+    """
+    Operaciones de transacciones que agrupan estadísticas y categorías
+
+    Se crea una por petición: recuerda la versión de datos que leyó la
+    petición (ETag) y la agrega a la clave de las consultas.
+    """
+
+    def __init__(self, operations: BaseTransactionOperations, flights: SingleFlight):
+        """
+        Args:
+            operations: Operaciones del backend
+            flights: Consultas en curso compartidas entre peticiones
+        """
+        super().__init__(operations)
+        self.flights = flights
+        self.version: Optional[int] = None
+
+    async def get_version(self, user_id: str) -> int:
+        self.version = await self.operations.get_version(user_id)
+        return self.version
+
+    async def get_transaction_stats(
+        self,
+        user_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> TransactionStats:
+        return await self.flights.do(
+            user_id,
+            ("get_transaction_stats", date_from, date_to, self.version),
+            lambda: self.operations.get_transaction_stats(user_id, date_from, date_to)
+        )
+
+    async def get_categories(self, user_id: str, transaction_type: Optional[str] = None) -> List[str]:
+        return await self.flights.do(
+            user_id,
+            ("get_categories", transaction_type, self.version),
+            lambda: self.operations.get_categories(user_id, transaction_type)
+        )
+
+    # Las escrituras olvidan al usuario al terminar (aunque fallen)
+
+    async def create_transaction(self, user_id: str, transaction_data: TransactionCreate) -> TransactionResponse:
+        try:
+            return await self.operations.create_transaction(user_id, transaction_data)
+        finally:
+            self.flights.forget(user_id)
+
+    async def update_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        update_data: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        try:
+            return await self.operations.update_transaction(transaction_id, user_id, update_data)
+        finally:
+            self.flights.forget(user_id)
+
+    async def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
+        try:
+            return await self.operations.delete_transaction(transaction_id, user_id)
+        finally:
+            self.flights.forget(user_id)
+
+    async def update_transactions(
+        self,
+        user_id: str,
+        update_data: TransactionUpdate,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        try:
+            return await self.operations.update_transactions(user_id, update_data, ids, filters)
+        finally:
+            self.flights.forget(user_id)
+
+    async def delete_transactions(
+        self,
+        user_id: str,
+        ids: Optional[List[str]] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> List[str]:
+        try:
+            return await self.operations.delete_transactions(user_id, ids, filters)
+        finally:
+            self.flights.forget(user_id)
+
+class CoalescingUserOperations(DelegatingUserOperations):
+    """
+    Operaciones de usuario que agrupan las lecturas por ID
+    """
+
+    def __init__(self, operations: BaseUserOperations, flights: SingleFlight):
+        """
+        Args:
+            operations: Operaciones del backend
+            flights: Consultas en curso compartidas entre peticiones
+        """
+        super().__init__(operations)
+        self.flights = flights
+
+    async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
+        return await self.flights.do(
+            user_id,
+            ("get_user_by_id",),
+            lambda: self.operations.get_user_by_id(user_id)
+        )
+
+    async def authenticate_user(self, login_data: UserLogin) -> Optional[UserResponse]:
+        # El login actualiza last_access
+        user = await self.operations.authenticate_user(login_data)
+        if user is not None:
+            self.flights.forget(user.id)
+        return user
+
+    async def update_budget(self, user_id: str, budget_data: BudgetUpdate) -> Optional[UserResponse]:
+        try:
+            return await self.operations.update_budget(user_id, budget_data)
+        finally:
+            self.flights.forget(user_id)
+
+    async def deactivate_user(self, user_id: str) -> bool:
+        try:
+            return await self.operations.deactivate_user(user_id)
+        finally:
+            self.flights.forget(user_id)
+
+    # Las escrituras por correo no conocen el ID: se olvidan todas (son poco frecuentes)
+
+    async def activate_user_account(self, email: str) -> bool:
+        try:
+            return await self.operations.activate_user_account(email)
+        finally:
+            self.flights.forget_all()
+
+    async def update_password(self, email: str, new_password: str) -> bool:
+        try:
+            return await self.operations.update_password(email, new_password)
+        finally:
+            self.flights.forget_all()
+
+request_coalescer = RequestCoalescer()
@@ -0,0 +1,312 @@
+"""
+Trazas Locales para GastoSmart
+
+Este archivo implementa spans ligeros para ver en qué se va el tiempo de
+una petición: resolución de dependencias, construcción de la consulta,
+iteración del cursor de Motor, conversión de documentos y codificación
+JSON. Cada petición es una traza; sus spans se guardan en un buffer
+circular en memoria y las trazas más lentas que un umbral se exportan a
+un archivo local en un hilo de fondo. No requiere un colector externo.
+
+El span actual se propaga con contextvars, así que los spans creados en
+los hilos del ejecutor de Motor (listener de comandos) quedan anidados
+bajo el span que hizo la llamada.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuración de las trazas (variables de entorno)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "500"))
+TRACE_EXPORT_THRESHOLD_MS = float(os.getenv("TRACE_EXPORT_THRESHOLD_MS", "250"))
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+
+# Archivo de exportación dentro de TRACE_DIR
+TRACES_FILE = "traces.jsonl"
+
+_span_ids = itertools.count(1)
+
+class Span:
+    """
+    Intervalo de tiempo con nombre dentro de una traza
+    """
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[int], start: float, attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.start = start
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes) -> None:
+        """Agregar atributos al span"""
+        self.attributes.update(attributes)
+
+class Trace:
+    """
+    Conjunto de spans de una petición
+    """
+
+    def __init__(self, trace_id: str, name: str):
+        """
+        Args:
+            trace_id: Identificador de la traza (el ID de la petición)
+            name: Nombre inicial (se reemplaza por la ruta al terminar)
+        """
+        self.trace_id = trace_id
+        self.name = name
+        self.timestamp = time.time()
+        self.root = Span(name, None, time.perf_counter(), {})
+        self.spans: List[Span] = [self.root]
+        self.dropped_spans = 0
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def add(self, span: Span) -> bool:
+        """Agregar un span respetando el máximo por traza"""
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped_spans += 1
+            return False
+        # list.append es atómico: los listeners de Motor agregan spans desde otros hilos
+        self.spans.append(span)
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializar la traza con tiempos relativos a su inicio
+
+        Returns:
+            Dict[str, Any]: Traza con sus spans en milisegundos
+        """
+        origin = self.root.start
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.root.attributes,
+            "dropped_spans": self.dropped_spans,
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_ms": round((span.start - origin) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                    "attributes": span.attributes,
+                    "error": span.error
+                }
+                for span in sorted(self.spans[1:], key=lambda span: span.start)
+            ]
+        }
+
+# Traza y span en curso
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+def current_trace() -> Optional[Trace]:
+    """Obtener la traza en curso (None fuera de una petición)"""
+    return _current_trace.get()
+
+def current_span() -> Optional[Span]:
+    """Obtener el span en curso (None fuera de una traza)"""
+    return _current_span.get()
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Medir un bloque de código como span hijo del span actual
+
+    Fuera de una traza no hace nada y entrega None.
+
+    Args:
+        name: Nombre del span
+        **attributes: Atributos iniciales del span
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, time.perf_counter(), attributes)
+    if not trace.add(current):
+        yield current
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+def record_span(
+    name: str,
+    start: float,
+    end: float,
+    parent: Optional[Span] = None,
+    **attributes
+) -> Optional[Span]:
+    """
+    Registrar un span ya terminado (medido por otro medio)
+
+    Args:
+        name: Nombre del span
+        start: Inicio según time.perf_counter()
+        end: Fin según time.perf_counter()
+        parent: Span padre (el span actual si no se indica)
+        **attributes: Atributos del span
+
+    Returns:
+        Optional[Span]: Span registrado o None fuera de una traza
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = parent or _current_span.get()
+    recorded = Span(name, parent.span_id if parent else None, start, attributes)
+    recorded.end = end
+    return recorded if trace.add(recorded) else None
+
+def traced(name: Optional[str] = None):
+    """
+    Decorador que mide una función asíncrona como span
+
+    Args:
+        name: Nombre del span (por defecto el nombre calificado de la función)
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class Tracer:
+    """
+    Buffer de trazas recientes y exportador a archivo
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = TRACE_BUFFER_SIZE,
+        export_threshold_ms: float = TRACE_EXPORT_THRESHOLD_MS,
+        directory: str = TRACE_DIR
+    ):
+        """
+        Inicializar el trazador
+
+        Args:
+            buffer_size: Número de trazas recientes que se conservan en memoria
+            export_threshold_ms: Duración mínima para exportar una traza (negativo desactiva)
+            directory: Directorio del archivo de exportación
+        """
+        self.buffer: Deque[Trace] = deque(maxlen=buffer_size)
+        self.export_threshold = export_threshold_ms / 1000
+        self.directory = directory
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+
+    def start_trace(self, trace_id: str, name: str):
+        """
+        Iniciar una traza en el contexto actual
+
+        Returns:
+            Tuple: Traza creada y tokens para restaurar el contexto
+        """
+        trace = Trace(trace_id, name)
+        tokens = (_current_trace.set(trace), _current_span.set(trace.root))
+        return trace, tokens
+
+    def finish_trace(self, trace: Trace, tokens) -> None:
+        """
+        Cerrar una traza, guardarla en el buffer y exportarla si es lenta
+
+        Args:
+            trace: Traza devuelta por start_trace
+            tokens: Tokens devueltos por start_trace
+        """
+        trace.root.end = time.perf_counter()
+        _current_span.reset(tokens[1])
+        _current_trace.reset(tokens[0])
+        self.buffer.append(trace)
+        if self.export_threshold >= 0 and trace.duration >= self.export_threshold:
+            self._export(trace)
+
+    def slowest(self, limit: int = 20, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Obtener las trazas recientes más lentas
+
+        Args:
+            limit: Número máximo de trazas
+            name: Filtrar por nombre de traza (método y ruta)
+
+        Returns:
+            List[Dict[str, Any]]: Trazas ordenadas de mayor a menor duración
+        """
+        traces = [trace for trace in list(self.buffer) if name is None or trace.name == name]
+        traces.sort(key=lambda trace: trace.duration, reverse=True)
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def _export(self, trace: Trace) -> None:
+        """Encolar una traza para escribirla en segundo plano"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass
+
+    def _run(self) -> None:
+        """Escribir las trazas exportadas como líneas JSON"""
+        path = os.path.join(self.directory, TRACES_FILE)
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+            except OSError as e:
+                logger.warning(f"No se pudo exportar la traza {trace.trace_id}: {e}")
+
+    def stop(self) -> None:
+        """Detener el exportador después de escribir lo pendiente"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+# Instancia compartida por la aplicación
+tracer = Tracer()
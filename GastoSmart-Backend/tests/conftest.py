@@ -0,0 +1,17 @@
+"""
+Configuración de las pruebas
+
+La aplicación lee su configuración de variables de entorno al importarse,
+así que se fijan aquí antes de que las pruebas importen main: backend
+sqlite en un archivo temporal y sin trazas.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gastosmart-tests-"), "gastosmart.db")
+os.environ["TRACING_ENABLED"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
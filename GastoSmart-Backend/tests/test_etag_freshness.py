@@ -0,0 +1,137 @@
+"""
+Regresión: el ETag nunca acompaña datos más viejos que él
+
+Una escritura de otro worker no pasa por la caché de recientes ni por la
+agrupación de lecturas de este proceso. Se simula escribiendo directo en el
+backend: la siguiente lectura con el ETag anterior debe responder 200 con
+un ETag nuevo y los datos nuevos, no 304 ni la página guardada. Tampoco
+debe unirse a una lectura idéntica que empezó antes de la escritura.
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional
+
+import pytest
+from bson import ObjectId
+
+import main
+from database.backends import DelegatingTransactionOperations
+from database.storage import storage
+from models.transaction import TransactionCreate
+
+EXPENSE = {"type": "expense", "amount": 5, "category": "Comida", "date": "2025-01-01T00:00:00"}
+REMOTE_EXPENSE = {**EXPENSE, "amount": 7, "category": "Transporte"}
+
+async def request(method: str, path: str, query: str, body: Optional[dict] = None, headers: Optional[Dict[str, str]] = None) -> dict:
+    """Ejecutar una petición contra la aplicación ASGI sin servidor"""
+    raw_headers = [(b"host", b"test")] + [(key.encode(), value.encode()) for key, value in (headers or {}).items()]
+    data = b""
+    if body is not None:
+        data = json.dumps(body).encode()
+        raw_headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http", "http_version": "1.1", "scheme": "http", "method": method,
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": raw_headers, "server": ("test", 80), "client": ("127.0.0.1", 1), "app": main.app
+    }
+    received = False
+
+    async def receive() -> dict:
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": data, "more_body": False}
+
+    response = {"status": None, "headers": {}, "body": b""}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {key.decode(): value.decode() for key, value in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await main.app(scope, receive, send)
+    return response
+
+@pytest.mark.parametrize("path, read", [
+    # Caché de transacciones recientes
+    ("/api/transactions/", lambda body: sorted(transaction["category"] for transaction in body)),
+    # Agrupación de lecturas idénticas (single flight)
+    ("/api/transactions/stats/summary", lambda body: body["transaction_count"]),
+    ("/api/transactions/categories/list", lambda body: sorted(body["categories"])),
+])
+def test_remote_write_changes_etag_and_body(path, read):
+    async def run():
+        await storage.connect()
+        try:
+            user_id = str(ObjectId())
+            query = f"user_id={user_id}"
+            created = await request("POST", "/api/transactions/", query, EXPENSE)
+            assert created["status"] == 201
+
+            first = await request("GET", path, query)
+            assert first["status"] == 200
+            etag = first["headers"]["etag"]
+
+            # Escritura "de otro worker": sin los wrappers de este proceso
+            await storage.transaction_operations().create_transaction(user_id, TransactionCreate(**REMOTE_EXPENSE))
+
+            second = await request("GET", path, query, headers={"if-none-match": etag})
+            assert second["status"] == 200
+            assert second["headers"]["etag"] != etag
+            assert read(json.loads(second["body"])) != read(json.loads(first["body"]))
+
+            third = await request("GET", path, query, headers={"if-none-match": second["headers"]["etag"]})
+            assert third["status"] == 304
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+
+class SlowStatsOperations(DelegatingTransactionOperations):
+    """Operaciones cuya primera lectura de totales se queda esperando tras leer"""
+
+    def __init__(self, operations, gate: asyncio.Event, started: asyncio.Event):
+        super().__init__(operations)
+        self.gate = gate
+        self.started = started
+
+    async def get_transaction_stats(self, user_id, date_from=None, date_to=None):
+        stats = await self.operations.get_transaction_stats(user_id, date_from, date_to)
+        if not self.started.is_set():
+            self.started.set()
+            await self.gate.wait()
+        return stats
+
+def test_remote_write_does_not_join_older_flight(monkeypatch):
+    async def run():
+        await storage.connect()
+        try:
+            user_id = str(ObjectId())
+            query = f"user_id={user_id}"
+            assert (await request("POST", "/api/transactions/", query, EXPENSE))["status"] == 201
+
+            gate, started = asyncio.Event(), asyncio.Event()
+            bare = storage.transaction_operations
+            monkeypatch.setattr(storage, "transaction_operations", lambda: SlowStatsOperations(bare(), gate, started))
+
+            # Lectura que ya leyó los datos viejos y sigue en curso
+            older = asyncio.create_task(request("GET", "/api/transactions/stats/summary", query))
+            await started.wait()
+
+            await bare().create_transaction(user_id, TransactionCreate(**REMOTE_EXPENSE))
+
+            newer = await asyncio.wait_for(request("GET", "/api/transactions/stats/summary", query), 5)
+            gate.set()
+            older = await older
+
+            assert json.loads(older["body"])["transaction_count"] == 1
+            assert json.loads(newer["body"])["transaction_count"] == 2
+            assert newer["headers"]["etag"] != older["headers"]["etag"]
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
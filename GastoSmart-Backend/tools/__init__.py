@@ -0,0 +1,9 @@
+"""
+Paquete de Herramientas de Línea de Comandos para GastoSmart
+
+Este paquete contiene utilidades de operación que se ejecutan desde la
+carpeta GastoSmart-Backend, por ejemplo:
+
+    python -m tools.slow_queries report
+    python -m tools.migrate_category_keys --dry-run
+"""
@@ -0,0 +1,454 @@
+"""
+Generador de Datos Sintéticos para Pruebas de Escala
+
+Genera usuarios y transacciones realistas para GastoSmart: categorías de
+IncomeCategory/ExpenseCategory con frecuencias y montos propios de cada
+una (en pesos colombianos), salario en los días de pago (quincenal o
+mensual), primas en junio y diciembre, y gasto concentrado en los días
+posteriores al pago.
+
+Los datos de cada usuario (incluidas la fecha de registro y la sal del
+hash de la contraseña) dependen solo de la semilla, su índice y la fecha
+final, así que el resultado es el mismo en cada ejecución y sin importar
+el número de procesos. Los datos se cargan en MongoDB con insert_many en paralelo o se
+escriben como NDJSON (formato de mongoimport).
+
+Por defecto se carga en la base gastosmart_bench; --drop solo se acepta en
+bases cuyo nombre incluya "bench" para no borrar los datos reales.
+
+Uso (desde GastoSmart-Backend):
+    python -m tools.generate_dataset --users 20000 --months 12 --database gastosmart_bench --drop --create-indexes
+    python -m tools.generate_dataset --users 1000 --format ndjson --out dataset/
+"""
+
+import argparse
+import base64
+import bisect
+import calendar
+import json
+import math
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+
+from models.transaction import ExpenseCategory, IncomeCategory, normalize_category
+
+# Contraseña de todos los usuarios generados
+DEFAULT_PASSWORD = "Benchmark123!"
+# Costo del hash de la contraseña (el mismo de bcrypt.gensalt)
+BCRYPT_ROUNDS = 12
+# Alfabeto base64 estándar -> alfabeto de bcrypt
+_BCRYPT_ALPHABET = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+)
+
+# Gastos: (veces por mes (mín, máx), mediana del monto, dispersión, descripciones)
+EXPENSE_PROFILES: Dict[str, Tuple[Tuple[int, int], float, float, List[str]]] = {
+    ExpenseCategory.FOOD.value: ((8, 22), 45_000, 0.7, ["Mercado", "Almuerzo", "Panadería", "Domicilio", "Tienda"]),
+    ExpenseCategory.TRANSPORT.value: ((6, 22), 12_000, 0.6, ["Bus", "Taxi", "Gasolina", "Parqueadero", "TransMilenio"]),
+    ExpenseCategory.SERVICES.value: ((3, 5), 110_000, 0.6, ["Energía", "Agua", "Gas", "Internet", "Celular"]),
+    ExpenseCategory.ENTERTAINMENT.value: ((1, 6), 60_000, 0.8, ["Cine", "Restaurante", "Streaming", "Concierto"]),
+    ExpenseCategory.HEALTH.value: ((0, 2), 80_000, 0.9, ["Droguería", "Cita médica", "Medicina prepagada"]),
+    ExpenseCategory.EDUCATION.value: ((0, 1), 350_000, 0.6, ["Curso", "Libros", "Matrícula"]),
+    ExpenseCategory.CLOTHING.value: ((0, 2), 120_000, 0.7, ["Ropa", "Zapatos"]),
+    ExpenseCategory.OTHER_EXPENSES.value: ((0, 3), 50_000, 1.0, ["Regalo", "Varios", "Mascota"])
+}
+
+# Ingresos ocasionales: (probabilidad por mes, mediana del monto, dispersión)
+OCCASIONAL_INCOME: Dict[str, Tuple[float, float, float]] = {
+    IncomeCategory.FREELANCE.value: (0.15, 800_000, 0.7),
+    IncomeCategory.INVESTMENTS.value: (0.10, 300_000, 0.9),
+    IncomeCategory.SALES.value: (0.05, 400_000, 0.8),
+    IncomeCategory.OTHER_INCOME.value: (0.05, 150_000, 0.8)
+}
+
+# Fecha fija de los ObjectId de usuarios (para que sean deterministas)
+_USER_ID_TIMESTAMP = 1_700_000_000
+
+def user_object_id(seed: int, index: int) -> ObjectId:
+    """
+    ObjectId determinista de un usuario generado
+
+    Args:
+        seed: Semilla del conjunto de datos
+        index: Índice del usuario
+
+    Returns:
+        ObjectId: Identificador del usuario
+    """
+    return ObjectId(struct.pack(">IIi", _USER_ID_TIMESTAMP, seed & 0xFFFFFFFF, index))
+
+def dataset_salt(seed: int, rounds: int = BCRYPT_ROUNDS) -> bytes:
+    """
+    Sal de bcrypt derivada de la semilla
+
+    bcrypt.gensalt es aleatoria y cambiaría users.ndjson en cada ejecución;
+    una sal predecible no importa porque la contraseña del conjunto es pública.
+
+    Args:
+        seed: Semilla del conjunto de datos
+        rounds: Costo del hash
+
+    Returns:
+        bytes: Sal en el formato de bcrypt.gensalt
+    """
+    raw = random.Random(f"{seed}:password").getrandbits(128).to_bytes(16, "big")
+    return b"$2b$%02d$" % rounds + base64.b64encode(raw)[:22].translate(_BCRYPT_ALPHABET)
+
+def _day_weights(paydays: Tuple[int, ...]) -> List[float]:
+    """
+    Pesos acumulados de los días 1-28 para el gasto discrecional
+
+    El gasto es mayor en los días posteriores a cada pago y decae con
+    los días (estacionalidad de día de pago).
+    """
+    weights = []
+    for day in range(1, 29):
+        since_payday = min((day - payday) % 30 for payday in paydays)
+        weights.append(1.0 + 1.5 * math.exp(-since_payday / 4))
+    cumulative, total = [], 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+_MONTHLY_WEIGHTS = _day_weights((30,))
+_BIWEEKLY_WEIGHTS = _day_weights((15, 30))
+
+def _months(end: date, count: int) -> List[Tuple[int, int]]:
+    """Los últimos `count` meses (año, mes) hasta la fecha final, en orden"""
+    year, month = end.year, end.month
+    months = []
+    for _ in range(count):
+        months.append((year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+class UserDataset:
+    """
+    Generador de los datos de un usuario
+    """
+
+    def __init__(self, seed: int, index: int, end: date, months: int, activity: float = 1.0):
+        """
+        Inicializar el generador del usuario
+
+        Args:
+            seed: Semilla del conjunto de datos
+            index: Índice del usuario
+            end: Fecha final (no se generan transacciones posteriores)
+            months: Meses de historia
+            activity: Multiplicador del número de gastos
+        """
+        self.rng = random.Random(seed * 1_000_003 + index)
+        self.index = index
+        self.user_id = user_object_id(seed, index)
+        self.end = end
+        self.months = months
+        rng = self.rng
+        # Salario mensual: la mayoría cerca del mínimo, cola larga hacia arriba
+        self.salary = round(max(1_300_000, rng.lognormvariate(math.log(2_800_000), 0.6)), -3)
+        self.biweekly = rng.random() < 0.4
+        # Usuarios más y menos activos que el promedio
+        self.activity = activity * rng.lognormvariate(0, 0.35)
+        # Registro hasta 90 días antes del primer mes de historia (con su
+        # propio generador para no cambiar las transacciones de cada semilla)
+        first_year, first_month = _months(end, months)[0]
+        registration_rng = random.Random(f"{seed}:{index}:registration")
+        self.registration_date = datetime(
+            first_year, first_month, 1, registration_rng.randrange(7, 22), registration_rng.randrange(60)
+        ) - timedelta(days=registration_rng.randrange(1, 91))
+
+    def user_document(self, password_hash: str) -> Dict[str, Any]:
+        """Documento de la colección users"""
+        return {
+            "_id": self.user_id,
+            "first_name": "Usuario",
+            "last_name": f"Sintético {self.index}",
+            "email": f"user{self.index}@dataset.gastosmart.co",
+            "password": password_hash,
+            "initial_budget": round(self.salary * 0.8, -3),
+            "budget_period": "quincenal" if self.biweekly else "mensual",
+            "budget_configured": True,
+            "registration_date": self.registration_date,
+            "is_active": True,
+            "email_verified": True,
+            "last_access": None,
+            "currency": "COP",
+            "timezone": "America/Bogota"
+        }
+
+    def transactions(self) -> Iterator[Tuple[str, float, str, str, datetime]]:
+        """
+        Generar las transacciones del usuario
+
+        Yields:
+            Tuple: (tipo, monto, categoría, descripción, fecha)
+        """
+        rng = self.rng
+        random_ = rng.random
+        lognorm = rng.lognormvariate
+        weights = _BIWEEKLY_WEIGHTS if self.biweekly else _MONTHLY_WEIGHTS
+        total_weight = weights[-1]
+        end = self.end
+        rent = round(self.salary * rng.uniform(0.2, 0.35), -4)
+
+        for year, month in _months(end, self.months):
+            last_day = calendar.monthrange(year, month)[1]
+            # En el mes de la fecha final no se generan días posteriores
+            cutoff = end.day if (year, month) == (end.year, end.month) else last_day
+
+            def at(day: int, hour: Optional[int] = None) -> Optional[datetime]:
+                if day > cutoff:
+                    return None
+                return datetime(year, month, day, 7 + int(random_() * 15) if hour is None else hour, int(random_() * 60))
+
+            # Salario en los días de pago
+            paydays = (15, last_day) if self.biweekly else (last_day,)
+            for payday in paydays:
+                when = at(payday, 8)
+                if when:
+                    yield "income", self.salary / len(paydays), IncomeCategory.SALARY.value, "Pago de nómina", when
+
+            # Prima de servicios en junio y diciembre
+            if month in (6, 12) and random_() < 0.7:
+                when = at(rng.randrange(15, last_day + 1))
+                if when:
+                    yield "income", round(self.salary / 2, -2), IncomeCategory.BONUSES.value, "Prima de servicios", when
+
+            for category, (probability, median, sigma) in OCCASIONAL_INCOME.items():
+                if random_() < probability:
+                    when = at(rng.randrange(1, last_day + 1))
+                    if when:
+                        yield "income", round(lognorm(math.log(median), sigma), -2), category, category, when
+
+            # Arriendo al inicio del mes
+            when = at(rng.randrange(1, 6))
+            if when:
+                yield "expense", rent, ExpenseCategory.HOUSING.value, "Arriendo", when
+
+            for category, ((low, high), median, sigma, descriptions) in EXPENSE_PROFILES.items():
+                count = int(rng.randint(low, high) * self.activity + random_())
+                log_median = math.log(median)
+                for _ in range(count):
+                    day = bisect.bisect(weights, random_() * total_weight) + 1
+                    if last_day > 28 and random_() < (last_day - 28) / last_day:
+                        day = rng.randrange(29, last_day + 1)
+                    when = at(day)
+                    if when:
+                        amount = max(1_000.0, round(lognorm(log_median, sigma), -2))
+                        yield "expense", amount, category, descriptions[int(random_() * len(descriptions))], when
+
+def _mongo_batches(
+    seed: int,
+    first: int,
+    last: int,
+    end: date,
+    months: int,
+    activity: float,
+    batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Documentos de transacciones de un rango de usuarios en lotes"""
+    batch: List[Dict[str, Any]] = []
+    for index in range(first, last):
+        user = UserDataset(seed, index, end, months, activity)
+        user_id = str(user.user_id)
+        for kind, amount, category, description, when in user.transactions():
+            batch.append({
+                "user_id": user_id,
+                "type": kind,
+                "amount": amount,
+                "category": category,
+                "category_key": normalize_category(category),
+                "description": description,
+                "date": when,
+                "created_at": when,
+                "updated_at": None,
+                "currency": "COP"
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+# Cliente de MongoDB de cada proceso de carga
+_worker_client = None
+
+def _init_mongo_worker(mongodb_url: str) -> None:
+    global _worker_client
+    from pymongo import MongoClient
+    _worker_client = MongoClient(mongodb_url, w=1)
+
+def _load_chunk_mongo(job: Tuple) -> int:
+    """Proceso de carga: generar e insertar las transacciones de un rango de usuarios"""
+    database_name, seed, first, last, end, months, activity, batch_size = job
+    collection = _worker_client[database_name].transactions
+    inserted = 0
+    for batch in _mongo_batches(seed, first, last, end, months, activity, batch_size):
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+def _write_chunk_ndjson(job: Tuple) -> int:
+    """Proceso de escritura: generar las transacciones de un rango de usuarios en un archivo"""
+    directory, chunk, seed, first, last, end, months, activity = job
+    dumps = json.dumps
+    # Las cadenas repetidas se codifican una sola vez
+    encoded: Dict[str, str] = {}
+    written = 0
+    path = os.path.join(directory, f"transactions-{chunk:05d}.ndjson")
+    with open(path, "w", encoding="utf-8") as f:
+        lines: List[str] = []
+        for index in range(first, last):
+            user = UserDataset(seed, index, end, months, activity)
+            user_id = str(user.user_id)
+            for kind, amount, category, description, when in user.transactions():
+                category_json = encoded.get(category) or encoded.setdefault(category, dumps(category, ensure_ascii=False))
+                key = normalize_category(category)
+                key_json = encoded.get(key) or encoded.setdefault(key, dumps(key, ensure_ascii=False))
+                description_json = encoded.get(description) or encoded.setdefault(
+                    description, dumps(description, ensure_ascii=False)
+                )
+                moment = when.strftime("%Y-%m-%dT%H:%M:%SZ")
+                lines.append(
+                    f'{{"user_id":"{user_id}","type":"{kind}","amount":{amount},"category":{category_json},'
+                    f'"category_key":{key_json},'
+                    f'"description":{description_json},"date":{{"$date":"{moment}"}},'
+                    f'"created_at":{{"$date":"{moment}"}},"updated_at":null,"currency":"COP"}}\n'
+                )
+            if len(lines) >= 10000:
+                f.write("".join(lines))
+                written += len(lines)
+                lines = []
+        f.write("".join(lines))
+        written += len(lines)
+    return written
+
+def _chunks(users: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(first, min(users, first + chunk_size)) for first in range(0, users, chunk_size)]
+
+def generate(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Generar y cargar (o escribir) el conjunto de datos
+
+    Args:
+        args: Argumentos de la línea de comandos
+
+    Returns:
+        Dict[str, Any]: Usuarios, transacciones, segundos y documentos por segundo
+
+    Raises:
+        ValueError: Si se pide --drop en una base de datos que no es de benchmark
+    """
+    import bcrypt
+
+    if args.format == "mongo" and args.drop and "bench" not in args.database:
+        raise ValueError(f"La base de datos '{args.database}' no parece de benchmark; no se borrará")
+
+    end = args.end_date
+    start = time.perf_counter()
+    # Un solo hash para todos: bcrypt es intencionalmente lento
+    password_hash = bcrypt.hashpw(args.password.encode("utf-8"), dataset_salt(args.seed)).decode("utf-8")
+    users = [UserDataset(args.seed, index, end, args.months, args.activity) for index in range(args.users)]
+    chunks = _chunks(args.users, args.chunk_size)
+
+    if args.format == "mongo":
+        from pymongo import MongoClient
+
+        client = MongoClient(args.mongodb_url)
+        db = client[args.database]
+        if args.drop:
+            db.users.drop()
+            db.transactions.drop()
+        for first, last in chunks:
+            db.users.insert_many([user.user_document(password_hash) for user in users[first:last]], ordered=False)
+
+        jobs = [
+            (args.database, args.seed, first, last, end, args.months, args.activity, args.batch_size)
+            for first, last in chunks
+        ]
+        with multiprocessing.Pool(args.processes, initializer=_init_mongo_worker, initargs=(args.mongodb_url,)) as pool:
+            transactions = sum(pool.imap_unordered(_load_chunk_mongo, jobs))
+        elapsed = time.perf_counter() - start
+
+        if args.create_indexes:
+            # Crear los índices después de la carga es más rápido que mantenerlos durante ella
+            from database.indexes import REQUIRED_INDEXES
+            for collection_name, indexes in REQUIRED_INDEXES.items():
+                for name, keys in indexes:
+                    db[collection_name].create_index(keys, name=name)
+        client.close()
+    else:
+        os.makedirs(args.out, exist_ok=True)
+        with open(os.path.join(args.out, "users.ndjson"), "w", encoding="utf-8") as f:
+            for user in users:
+                document = user.user_document(password_hash)
+                document["_id"] = {"$oid": str(document["_id"])}
+                document["registration_date"] = {"$date": user.registration_date.strftime("%Y-%m-%dT%H:%M:%SZ")}
+                f.write(json.dumps(document, ensure_ascii=False) + "\n")
+
+        jobs = [
+            (args.out, chunk, args.seed, first, last, end, args.months, args.activity)
+            for chunk, (first, last) in enumerate(chunks)
+        ]
+        with multiprocessing.Pool(args.processes) as pool:
+            transactions = sum(pool.imap_unordered(_write_chunk_ndjson, jobs))
+        elapsed = time.perf_counter() - start
+
+        with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "seed": args.seed,
+                "users": args.users,
+                "months": args.months,
+                "end_date": end.isoformat(),
+                "activity": args.activity,
+                "transactions": transactions
+            }, f, indent=2)
+
+    return {
+        "users": args.users,
+        "transactions": transactions,
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(transactions / elapsed) if elapsed else 0
+    }
+
+def main(argv=None) -> int:
+    """Punto de entrada del generador"""
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos de GastoSmart")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=12, help="Meses de historia por usuario")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(),
+                        help="Última fecha (AAAA-MM-DD); fijarla para reproducir un conjunto")
+    parser.add_argument("--activity", type=float, default=1.0, help="Multiplicador del número de gastos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Contraseña de los usuarios")
+    parser.add_argument("--format", choices=("mongo", "ndjson"), default="mongo")
+    parser.add_argument("--out", default="dataset", help="Directorio de salida para NDJSON")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="gastosmart_bench", help="Base de datos de benchmark")
+    parser.add_argument("--drop", action="store_true",
+                        help="Borrar usuarios y transacciones antes de cargar (solo bases con \"bench\" en el nombre)")
+    parser.add_argument("--create-indexes", action="store_true", help="Crear los índices al terminar la carga")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200, help="Usuarios por tarea")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documentos por insert_many")
+    args = parser.parse_args(argv)
+    if args.format == "mongo" and args.drop and "bench" not in args.database:
+        parser.error(f"--drop solo se permite en bases de benchmark (con \"bench\" en el nombre): {args.database}")
+
+    result = generate(args)
+    print(f"{result['users']} usuarios, {result['transactions']} transacciones en {result['seconds']}s "
+          f"({result['docs_per_second']} docs/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
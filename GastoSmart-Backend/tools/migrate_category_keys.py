@@ -0,0 +1,101 @@
+"""
+Migración: Clave Normalizada de Categoría en las Transacciones
+
+Los filtros por categoría usan el campo category_key (categoría sin
+mayúsculas, tildes ni espacios repetidos, ver normalize_category) y el
+índice user_category_key. Las transacciones guardadas antes de ese campo
+no lo tienen y no aparecen al filtrar hasta ejecutar esta migración.
+
+- Crea los índices que falten (ensure_indexes), incluido user_category_key
+- Agrupa las transacciones sin category_key por categoría y actualiza
+  cada grupo con un update_many: pocas operaciones aunque haya millones
+  de documentos, y se puede repetir sin efecto si ya terminó
+- No cambia la versión de sincronización: category_key no forma parte de
+  las respuestas de la API
+
+Con SQLite la columna se agrega y se completa sola al conectar; el backend
+en memoria no necesita migración.
+
+Uso (desde GastoSmart-Backend):
+    python -m tools.migrate_category_keys --dry-run
+    python -m tools.migrate_category_keys
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from database.indexes import ensure_indexes
+from models.transaction import normalize_category
+
+# Transacciones sin la clave normalizada
+MISSING_KEY = {"category_key": {"$exists": False}}
+
+async def migrate(mongodb_url: str, database_name: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Completar category_key en las transacciones que no la tienen
+
+    Args:
+        mongodb_url: URL de MongoDB
+        database_name: Nombre de la base de datos
+        dry_run: Solo contar lo que se actualizaría
+
+    Returns:
+        Dict[str, Any]: Categorías y transacciones actualizadas (o por actualizar) y duración
+    """
+    client = AsyncIOMotorClient(mongodb_url)
+    try:
+        database = client[database_name]
+        collection = database.transactions
+        start = time.perf_counter()
+
+        groups = collection.aggregate(
+            [{"$match": MISSING_KEY}, {"$group": {"_id": "$category", "count": {"$sum": 1}}}],
+            allowDiskUse=True
+        )
+        categories = updated = 0
+        async for group in groups:
+            categories += 1
+            if dry_run:
+                updated += group["count"]
+                continue
+            result = await collection.update_many(
+                {"category": group["_id"], **MISSING_KEY},
+                {"$set": {"category_key": normalize_category(group["_id"])}}
+            )
+            updated += result.modified_count
+
+        # El índice se crea al final para construirlo una sola vez con las claves completas
+        created = [] if dry_run else await ensure_indexes(database)
+        return {
+            "categories": categories,
+            "transactions": updated,
+            "indexes_created": created,
+            "seconds": round(time.perf_counter() - start, 2)
+        }
+    finally:
+        client.close()
+
+def main(argv=None) -> int:
+    """Punto de entrada de la migración"""
+    parser = argparse.ArgumentParser(description="Completar category_key en las transacciones de GastoSmart")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default=os.getenv("DATABASE_NAME", "gastosmart"))
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar las transacciones sin category_key")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(migrate(args.mongodb_url, args.database, args.dry_run))
+    action = "por actualizar" if args.dry_run else "actualizadas"
+    print(f"{result['transactions']} transacciones {action} en {result['categories']} categorías "
+          f"({result['seconds']}s)")
+    if result["indexes_created"]:
+        print(f"Índices creados: {', '.join(result['indexes_created'])}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
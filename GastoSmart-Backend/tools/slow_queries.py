@@ -0,0 +1,266 @@
+"""
+Reporte de Consultas Lentas y Asesor de Índices
+
+Lee las muestras y planes guardados por database/slow_queries.py, resume
+las formas de consulta más costosas y sugiere el índice compuesto que las
+cubriría siguiendo la regla ESR (campos de igualdad, luego de orden y al
+final de rango).
+
+Uso:
+    python -m tools.slow_queries report --top 10
+    python -m tools.slow_queries report --json
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from database.indexes import REQUIRED_INDEXES
+from database.slow_queries import EXPLAINS_DIR, RANGE_OPERATORS, SAMPLES_FILE, SLOW_QUERY_DIR
+
+def load_samples(directory: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Agrupar las muestras por forma de consulta
+
+    Args:
+        directory: Directorio del registro de consultas lentas
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Forma y duraciones por identificador
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    path = os.path.join(directory, SAMPLES_FILE)
+    if not os.path.exists(path):
+        return groups
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            group = groups.setdefault(record["shape_id"], {"shape": record["shape"], "durations": []})
+            group["durations"].append(record["duration_ms"])
+    return groups
+
+def load_explain(directory: str, sid: str) -> Optional[Dict[str, Any]]:
+    """Cargar el plan capturado para una forma (si existe)"""
+    path = os.path.join(directory, EXPLAINS_DIR, f"{sid}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("explain")
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _find_key(document: Any, key: str) -> Optional[Any]:
+    """Buscar recursivamente la primera aparición de una clave"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        for value in document.values():
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    elif isinstance(document, list):
+        for item in document:
+            found = _find_key(item, key)
+            if found is not None:
+                return found
+    return None
+
+def _plan_stages(plan: Any, stages: List[Dict[str, Any]]) -> None:
+    """Recorrer el árbol del plan ganador acumulando sus etapas"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan)
+        for key in ("inputStage", "queryPlan"):
+            if key in plan:
+                _plan_stages(plan[key], stages)
+        for child in plan.get("inputStages", []):
+            _plan_stages(child, stages)
+
+def summarize_plan(explain: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Resumir un plan de ejecución
+
+    Args:
+        explain: Resultado de explain("executionStats")
+
+    Returns:
+        Dict[str, Any]: Etapas, índice usado y documentos examinados/devueltos
+    """
+    if not explain:
+        return {"captured": False}
+    stages: List[Dict[str, Any]] = []
+    _plan_stages(_find_key(explain, "winningPlan"), stages)
+    index_stage = next((s for s in stages if s["stage"] == "IXSCAN"), None)
+    stats = _find_key(explain, "executionStats") or {}
+    return {
+        "captured": True,
+        "stages": [s["stage"] for s in stages],
+        "collscan": any(s["stage"] == "COLLSCAN" for s in stages),
+        "in_memory_sort": any(s["stage"] == "SORT" for s in stages),
+        "index_name": index_stage.get("indexName") if index_stage else None,
+        "index_keys": index_stage.get("keyPattern") if index_stage else None,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned")
+    }
+
+def _filter_and_sort(shape: Dict[str, Any]) -> Tuple[Dict[str, Any], List[List[Any]]]:
+    """Obtener el filtro y el orden de una forma (incluidas agregaciones)"""
+    if shape.get("command") == "aggregate":
+        match: Dict[str, Any] = {}
+        sort: List[List[Any]] = []
+        for stage in shape.get("pipeline", []):
+            if "$match" in stage and not match and not sort:
+                match = stage["$match"]
+            elif "$sort" in stage and not sort:
+                sort = [[field, direction] for field, direction in stage["$sort"].items()]
+            else:
+                break
+        return match, sort
+    return shape.get("filter", {}), shape.get("sort", [])
+
+def suggest_index(shape: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """
+    Sugerir un índice compuesto para una forma según la regla ESR
+
+    Args:
+        shape: Forma normalizada de la consulta
+
+    Returns:
+        List[Tuple[str, int]]: Claves del índice sugerido
+    """
+    query, sort = _filter_and_sort(shape)
+    equality, ranges = [], []
+    for field, condition in query.items():
+        if field.startswith("$"):
+            continue
+        if isinstance(condition, dict) and any(op in RANGE_OPERATORS for op in condition):
+            ranges.append(field)
+        else:
+            equality.append(field)
+
+    # user_id primero: todas las consultas de la aplicación son por usuario
+    equality.sort(key=lambda field: (field != "user_id", field))
+    keys = [(field, 1) for field in equality]
+    for field, direction in sort:
+        if field not in equality:
+            keys.append((field, int(direction)))
+    for field in ranges:
+        if field not in dict(keys):
+            keys.append((field, 1))
+    return keys
+
+def _index_covers(existing: Optional[Dict[str, int]], suggested: List[Tuple[str, int]]) -> bool:
+    """Verificar si un índice existente empieza con las claves sugeridas"""
+    if not existing or not suggested:
+        return False
+    existing_keys = [(field, int(direction)) for field, direction in existing.items()]
+    return existing_keys[:len(suggested)] == suggested
+
+def _declared_index(collection: str, keys: List[Tuple[str, int]]) -> Optional[str]:
+    """Nombre del índice de database/indexes.py con esas claves (si existe)"""
+    for name, index_keys in REQUIRED_INDEXES.get(collection, []):
+        if list(index_keys) == keys:
+            return name
+    return None
+
+def build_report(directory: str, top: int) -> List[Dict[str, Any]]:
+    """
+    Construir el reporte de las formas más costosas
+
+    Args:
+        directory: Directorio del registro de consultas lentas
+        top: Número de formas a incluir
+
+    Returns:
+        List[Dict[str, Any]]: Entradas ordenadas por tiempo total
+    """
+    entries = []
+    for sid, group in load_samples(directory).items():
+        durations = group["durations"]
+        shape = group["shape"]
+        plan = summarize_plan(load_explain(directory, sid))
+        keys = suggest_index(shape)
+
+        if not keys:
+            needs_index = False
+        elif not plan.get("captured") or plan.get("collscan") or plan.get("in_memory_sort"):
+            needs_index = True
+        elif _index_covers(plan.get("index_keys"), keys):
+            needs_index = False
+        else:
+            # Usa otro índice: solo sugerir si examina muchos más documentos de los que devuelve
+            needs_index = (plan.get("docs_examined") or 0) > 10 * max(plan.get("returned") or 0, 1)
+
+        entries.append({
+            "shape_id": sid,
+            "shape": shape,
+            "count": len(durations),
+            "total_ms": round(sum(durations), 1),
+            "p50_ms": _percentile(durations, 0.50),
+            "p95_ms": _percentile(durations, 0.95),
+            "max_ms": max(durations),
+            "plan": plan,
+            "suggested_index": keys if needs_index else None,
+            "declared_index": _declared_index(shape.get("collection"), keys) if needs_index else None
+        })
+    entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    return entries[:top]
+
+def _format_index(collection: str, keys: List[Tuple[str, int]]) -> str:
+    fields = ", ".join(f"{field}: {direction}" for field, direction in keys)
+    return f"db.{collection}.createIndex({{{fields}}})"
+
+def print_report(entries: List[Dict[str, Any]]) -> None:
+    """Mostrar el reporte en formato legible"""
+    if not entries:
+        print("No hay consultas lentas registradas (¿SLOW_QUERY_LOG_ENABLED=true?)")
+        return
+    for position, entry in enumerate(entries, 1):
+        shape, plan = entry["shape"], entry["plan"]
+        print(f"#{position} [{entry['shape_id']}] {shape.get('collection')}.{shape.get('command')}")
+        print(f"    muestras={entry['count']} total={entry['total_ms']}ms "
+              f"p50={entry['p50_ms']}ms p95={entry['p95_ms']}ms max={entry['max_ms']}ms")
+        print(f"    forma: {json.dumps({k: v for k, v in shape.items() if k not in ('collection', 'command')})}")
+        if plan.get("captured"):
+            print(f"    plan: {' <- '.join(plan['stages'])} índice={plan['index_name'] or '-'} "
+                  f"examinados={plan['docs_examined']} devueltos={plan['returned']}")
+        else:
+            print("    plan: no capturado")
+        if entry["suggested_index"]:
+            suggestion = _format_index(shape.get("collection"), entry["suggested_index"])
+            note = f" (declarado en database/indexes.py como '{entry['declared_index']}', ¿falta crearlo?)" \
+                if entry["declared_index"] else " (agregar a database/indexes.py)"
+            print(f"    sugerencia: {suggestion}{note}")
+        print()
+
+def main(argv=None) -> int:
+    """Punto de entrada de la herramienta"""
+    parser = argparse.ArgumentParser(description="Resumen de consultas lentas de GastoSmart")
+    subparsers = parser.add_subparsers(dest="command")
+    report = subparsers.add_parser("report", help="Mostrar las formas más costosas y sugerir índices")
+    report.add_argument("--dir", default=SLOW_QUERY_DIR, help="Directorio del registro")
+    report.add_argument("--top", type=int, default=10, help="Número de formas a mostrar")
+    report.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    if args.command != "report":
+        parser.print_help()
+        return 1
+
+    entries = build_report(args.dir, args.top)
+    if args.json:
+        print(json.dumps(entries, indent=2, default=str))
+    else:
+        print_report(entries)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())